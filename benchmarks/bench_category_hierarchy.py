@@ -0,0 +1,124 @@
+# benchmarks/bench_category_hierarchy.py
+"""
+Pomiar czasu układania hierarchii kategorii i budowy ścieżek drzewa na syntetycznym katalogu.
+
+Uruchomienie (z katalogu głównego projektu):
+    python benchmarks/bench_category_hierarchy.py [liczba_kategorii]
+
+Dla kolejnych rozmiarów katalogu (1/8, 1/4, 1/2 i całość) wypisywany jest czas oraz czas na kategorię;
+przy złożoności liniowej czas na kategorię pozostaje w przybliżeniu stały.
+
+Na końcu oba etapy uruchamiane są na katalogu z jedną gałęzią o głębokości CHAIN_DEPTH poziomów, co sprawdza,
+że przejście drzewa nie jest ograniczone limitem rekurencji, a koszt rośnie liniowo. Ścieżki, slugi rodziców
+i linki w gałęzi mają długość proporcjonalną do głębokości, więc czas budowy drzewa odnoszony jest do łącznej
+długości wyliczonych pól (rozmiaru wyniku), a czas sortowania - do liczby kategorii.
+"""
+import gc
+import os
+import sys
+import time
+import random
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.product_categories_processing_helper import ProductCategoriesProcessingHelper
+from src.modules.config_helper import ConfigHelper
+
+CHAIN_DEPTH = 10_000
+# Dopuszczalny wzrost kosztu jednostkowego przy dwukrotnie większym katalogu (przy złożoności kwadratowej byłby ~2x)
+SCALING_TOLERANCE = 1.5
+
+
+def generate_catalog(size, seed=0):
+    """
+    Generuje katalog łączący szerokie poziomy (wiele dzieci jednego rodzica) z bardzo głębokimi gałęziami.
+    """
+    rng = random.Random(seed)
+    categories = []
+    for category_id in range(1, size + 1):
+        if category_id % 10 == 0 or category_id < 100:
+            parent_id = 0 if category_id < 100 else category_id - 1
+        else:
+            parent_id = rng.randint(1, category_id - 1)
+        categories.append({'id': category_id, 'parent': parent_id, 'name': f'Kategoria {category_id}', 'slug': f'kategoria-{category_id}'})
+    rng.shuffle(categories)
+    return categories
+
+
+def generate_chain(depth, seed=0):
+    """
+    Generuje katalog będący jedną gałęzią: każda kategoria jest dzieckiem poprzedniej.
+    """
+    categories = [{'id': category_id, 'parent': category_id - 1, 'name': 'k', 'slug': 'k'} for category_id in range(1, depth + 1)]
+    random.Random(seed).shuffle(categories)
+    return categories
+
+
+def measure(helper, categories, repeats=3):
+    """
+    Zwraca najlepszy z kilku pomiarów czasu sortowania i budowy drzewa (przy wyłączonym odśmiecaniu, jak w timeit).
+    """
+    sort_time = tree_time = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            sorted_categories = helper.sort_and_group_by_hierarchy(categories)
+            sort_time = min(sort_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            helper.build_category_tree(sorted_categories)
+            tree_time = min(tree_time, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return sort_time, tree_time, sorted_categories
+
+
+def check_chain_scaling(helper, depth):
+    """
+    Mierzy oba etapy na gałęziach o głębokości depth/2 i depth i sprawdza, że koszt jednostkowy nie rośnie.
+    """
+    print(f"\n{'poziomy':>10} {'sortowanie [s]':>15} {'drzewo [s]':>11} {'µs/kategorię':>13} {'ns/znak wyniku':>15}")
+    costs = []
+    for chain_depth in (depth // 2, depth):
+        sort_time, tree_time, sorted_categories = measure(helper, generate_chain(chain_depth))
+
+        assert [category['id'] for category in sorted_categories] == list(range(1, chain_depth + 1))
+        deepest = sorted_categories[-1]
+        assert deepest['category_xpath'].count('\\') == chain_depth - 1
+        output_size = sum(len(category['category_xpath']) + len(category['parent_slug']) + len(category['link']) for category in sorted_categories)
+
+        costs.append((sort_time / chain_depth, tree_time / output_size))
+        print(f"{chain_depth:>10} {sort_time:>15.3f} {tree_time:>11.3f} {(sort_time + tree_time) / chain_depth * 1e6:>13.2f} {tree_time / output_size * 1e9:>15.3f}")
+
+    (half_sort, half_tree), (full_sort, full_tree) = costs
+    assert full_sort <= half_sort * SCALING_TOLERANCE, "Sortowanie gałęzi nie skaluje się liniowo z liczbą kategorii"
+    assert full_tree <= half_tree * SCALING_TOLERANCE, "Budowa drzewa gałęzi nie skaluje się liniowo z rozmiarem wyniku"
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    config = ConfigHelper(os.path.join(os.path.dirname(__file__), '..', 'src', 'config', 'config.json'))
+    helper = ProductCategoriesProcessingHelper([], 'sklep.pl', 'kategoria-produktu', config, transport=MagicMock())
+
+    print(f"{'kategorie':>10} {'sortowanie [s]':>15} {'drzewo [s]':>11} {'µs/kategorię':>13}")
+    for size in (total // 8, total // 4, total // 2, total):
+        categories = generate_catalog(size)
+
+        start = time.perf_counter()
+        sorted_categories = helper.sort_and_group_by_hierarchy(categories)
+        sort_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        helper.build_category_tree(sorted_categories)
+        tree_time = time.perf_counter() - start
+
+        assert len(sorted_categories) == size
+        print(f"{size:>10} {sort_time:>15.3f} {tree_time:>11.3f} {(sort_time + tree_time) / size * 1e6:>13.2f}")
+
+    check_chain_scaling(helper, CHAIN_DEPTH)
+
+
+if __name__ == '__main__':
+    main()
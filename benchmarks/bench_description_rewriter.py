@@ -0,0 +1,70 @@
+# benchmarks/bench_description_rewriter.py
+"""
+Porównanie podmiany adresów grafik w dużym opisie HTML: cztery str.replace na każdą grafikę
+(dotychczasowe podejście) wobec jednoprzebiegowego AssetUrlRewriter.
+
+Uruchomienie (z katalogu głównego projektu):
+    python benchmarks/bench_description_rewriter.py [liczba_grafik]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.asset_url_rewriter_helper import AssetUrlRewriter
+
+
+def generate_description(images):
+    """
+    Generuje opis w stylu strony docelowej: akapity tekstu przeplatane grafikami z srcset i tłami w stylach.
+    """
+    parts = []
+    for index in range(images):
+        parts.append(f'<p>{"Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8}</p>')
+        if index % 5 == 0:
+            parts.append(f'<section style="background-image: url(\'/wp-content/uploads/bg-{index}.jpg\')">')
+            parts.append('</section>')
+        parts.append(
+            f'<img src="/wp-content/uploads/image-{index}.jpg" '
+            f'srcset="/wp-content/uploads/image-{index}-300x200.jpg 300w, /wp-content/uploads/image-{index}.jpg 1024w" alt="">'
+        )
+    return ''.join(parts)
+
+
+def replace_with_str_replace(description, replacements):
+    updated_description = description
+    for original_url, new_path in replacements.items():
+        updated_description = updated_description.replace(f'src="{original_url}"', f'src="{new_path}"')
+        updated_description = updated_description.replace(f"src='{original_url}'", f"src='{new_path}'")
+        updated_description = updated_description.replace(f'data-src="{original_url}"', f'data-src="{new_path}"')
+        updated_description = updated_description.replace(f"data-src='{original_url}'", f"data-src='{new_path}'")
+    return updated_description
+
+
+def measure(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rewriter = AssetUrlRewriter()
+
+    print(f"{'grafiki':>8} {'rozmiar [KB]':>13} {'str.replace [s]':>16} {'rewriter [s]':>13}")
+    for images in (total // 8, total // 4, total // 2, total):
+        description = generate_description(images)
+        replacements = {url: f'/data/include/cms/description/{url.rsplit("/", 1)[-1]}' for url in rewriter.find(description)}
+
+        replace_time = measure(replace_with_str_replace, description, replacements)
+        rewriter_time = measure(rewriter.rewrite, description, replacements)
+        print(f"{images:>8} {len(description) / 1024:>13.0f} {replace_time:>16.3f} {rewriter_time:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,6 @@ import os
 import importlib
 import platform
 import asyncio
-import httpx
 import json
 from rich.console import Console
 from rich.prompt import Prompt
@@ -22,11 +21,13 @@ from rich.style import Style
 
 from modules.config_helper import ConfigHelper
 from modules.oauth_helper import OAuthHelper
+from modules.http_transport_helper import HttpTransportHelper
 from modules.product_categories_download_helper import CategoriesDownloadHelper
 from modules.product_categories_processing_helper import ProductCategoriesProcessingHelper
 from modules.product_categories_export_helper import ProductCategoriesExportHelper
 from modules.product_categories_import_helper import ProductCategoriesImportHelper
 from modules.product_navigations_import import ProductNavigationsImport
+from modules.image_upload_helper import ImageUploadHelper, create_upload_target, referenced_image_paths
 
 
 # Funkcja do czyszczenia ekranu
@@ -102,7 +103,6 @@ def load_config():
  
 async def main():  
     console = Console()
-    session = None    
     
     # Wczytanie konfiguracji połączenia
     config = load_config()
@@ -114,29 +114,60 @@ async def main():
 
 
 # Pobieranie drzewa kategorii z API WooCommerce    
-    async with httpx.AsyncClient() as session:
+    # Wspólna warstwa transportowa HTTP z osobną pulą połączeń dla każdego hosta, zamykana po zakończeniu operacji
+    async with HttpTransportHelper(config) as transport:
         if opcja_operacji == "1":
-            product_categories_downloader = CategoriesDownloadHelper(session=session, config=config)
+            product_categories_downloader = CategoriesDownloadHelper(session=transport.woocommerce, config=config)
             endpoint = product_categories_downloader.wybor_trybu_pobierania_kategorii()
             all_categories = await product_categories_downloader.pobieranie_wszystkich_kategorii(endpoint)
+            # W trybie przyrostowym dalsze etapy dotyczą tylko nowych i zmienionych kategorii
+            categories_delta = product_categories_downloader.categories_delta
             
             # DEBUG
             # console.print(f"Pobrano {len(all_categories)} kategorii produktów.")        
             
             # Tworzenie instancji ProcessoraCategoriesProcessor
-            processor = ProductCategoriesProcessingHelper(all_categories, config.WOOCOMMERCE_API_DOMAIN, config.WOOCOMMERCE_ALIAS_PRODUCT_CATEGORY, config)
+            processor = ProductCategoriesProcessingHelper(all_categories, config.WOOCOMMERCE_API_DOMAIN, config.WOOCOMMERCE_ALIAS_PRODUCT_CATEGORY, config, transport=transport, changed_category_ids=categories_delta.changed_ids if categories_delta else None)
 
-            # Przetwarzanie kategorii
-            all_categories_process = await processor.process_categories()       
-            
-            # Transformacja kategorii
-            all_categories_transformed = processor.transform_categories()
+            try:
+                # Przetwarzanie kategorii
+                all_categories_process = await processor.process_categories()
+
+                # Transformacja kategorii
+                all_categories_transformed = processor.transform_categories()
+            finally:
+                # Zapis indeksów magazynu grafik i zamknięcie puli procesów optymalizacji
+                await processor.close()
             
             # Eksport kategorii
             exporter = ProductCategoriesExportHelper(config)
             exporter.export_categories(all_categories, all_categories_process, all_categories_transformed)
             
-            if all_categories:
+            if categories_delta is not None and categories_delta.deleted:
+                console.print(f"[bold yellow]Uwaga:[/bold yellow] Kategorie usunięte w WooCommerce od ostatniej synchronizacji (identyfikatory): {', '.join(map(str, categories_delta.deleted))}", style="bold yellow")
+
+            # Wynik importu kategorii i menu (None - import nie był wykonywany)
+            categories_imported = menu_imported = None
+            if categories_delta is not None and not categories_delta.changed_ids:
+                console.print("👊 Brak nowych i zmienionych kategorii do zaimportowania. Do zobaczenia wkrótce 👊", style="bold yellow")
+                # Nie ma nic do zaimportowania, więc migawkę można od razu zapisać
+                product_categories_downloader.commit_snapshot()
+
+            elif all_categories:
+
+                # -------------------------------------------------------- #
+                #       Pytanie o wysyłkę grafik z opisów do sklepu        #
+                # -------------------------------------------------------- #
+                upload_target = create_upload_target(config)
+                if upload_target is not None:
+                    console.print()
+                    console.print("[black on yellow] Czy chcesz wysłać grafiki z opisów do sklepu ([bold]/data/include/cms/description[/bold])? [/black on yellow]", end=" ")
+                    odpowiedz_wysylka_grafik = input("(Tak/Nie): ").lower()
+                    if odpowiedz_wysylka_grafik in ['t', 'tak', 'y', '1', 'yes']:
+                        console.print("[black on green] Wybrano [/black on green] : Tak\n")
+                        await ImageUploadHelper(config, upload_target, referenced_paths=referenced_image_paths(all_categories_transformed)).upload_all()
+                    else:
+                        console.print("[black on green] Wybrano [/black on green] : Nie\n")
                 
                 # -------------------------------------------------------- #
                 # Pytanie o import kategorii jako kategorie towarów panelu #
@@ -166,10 +197,13 @@ async def main():
                     config = ConfigHelper(CONFIG_FILE_PATH)
                     
                     # Tworzymy instancję ProductCategoriesImport
-                    importer = ProductCategoriesImportHelper(config, config.IDOSELL_API_KEY)
+                    importer = ProductCategoriesImportHelper(config, config.IDOSELL_API_KEY, http_client=transport.idosell)
                     
-                    # Wywołujemy metodę importu kategorii
-                    await importer.import_categories_into_idosell_as_product_categories_in_the_panel(all_categories_transformed)
+                    # Wywołujemy metodę importu kategorii; powiązania zapisujemy także po przerwaniu importu błędem
+                    try:
+                        categories_imported = await importer.import_categories_into_idosell_as_product_categories_in_the_panel(all_categories_transformed, incremental=categories_delta is not None)
+                    finally:
+                        await importer.close()
                 
                 
                 # -------------------------------------------------------- # 
@@ -197,9 +231,20 @@ async def main():
                 console.print(f"[black on green] Wybrano [/black on green] : {formatted_response}\n")
 
                 if odpowiedz_import_menu in true_values:
-                    importer = ProductNavigationsImport(config)
-                    await importer.import_categories_into_idosell_as_navigation_menu_in_shop(all_categories_transformed)
+                    importer = ProductNavigationsImport(config, http_client=transport.idosell)
+                    try:
+                        menu_imported = await importer.import_categories_into_idosell_as_navigation_menu_in_shop(all_categories_transformed, incremental=categories_delta is not None)
+                    finally:
+                        await importer.close()
 
+                # Migawkę zapisujemy, gdy powiodły się wszystkie wykonane importy - w przeciwnym razie
+                # niezaimportowane zmiany nie zostałyby wykryte przy kolejnej synchronizacji
+                if all(imported for imported in (categories_imported, menu_imported) if imported is not None):
+                    product_categories_downloader.commit_snapshot()
+                elif product_categories_downloader.pending_snapshot is not None:
+                    console.print("[bold yellow]Uwaga:[/bold yellow] Migawka kategorii nie została zapisana. Nowe i zmienione kategorie zostaną ponownie uwzględnione przy kolejnej synchronizacji.", style="bold yellow")
+
+                if odpowiedz_import_menu in true_values:
                     console.print()
                     console.print("👊 Kończymy na dziś. Opuszczasz Matrixa. Do zobaczenia wkrótce 👊", style="bold yellow")
                 elif odpowiedz_import_menu in false_values:
@@ -0,0 +1,246 @@
+import asyncio
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .retry_helper import MAX_RETRY_AFTER
+
+
+def parse_retry_after(value):
+    """
+    Zamienia wartość nagłówka 'Retry-After' na liczbę sekund oczekiwania.
+
+    Args:
+        value (str): Liczba sekund lub data HTTP (RFC 7231).
+
+    Returns:
+        float or None: Liczba sekund (nieujemna) lub None, jeśli nagłówka nie da się odczytać.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit równoległych zapytań dostosowywany metodą AIMD (additive increase, multiplicative decrease).
+
+    Limit rośnie o increase_step po każdej serii udanych odpowiedzi równej bieżącemu limitowi
+    (czyli mniej więcej raz na "okno"), a maleje multiplikatywnie, gdy serwer odpowiada 429/503,
+    rośnie odsetek błędów lub opóźnienie odpowiedzi przekracza latency_tolerance razy opóźnienie bazowe
+    (minimum z ostatnich window_size odpowiedzi).
+    Nagłówek 'Retry-After' wstrzymuje uruchamianie nowych zapytań do wskazanego momentu (najwyżej na max_pause sekund).
+    """
+
+    THROTTLE_STATUS_CODES = (429, 503)
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=50, increase_step=1, decrease_factor=0.5,
+                 latency_tolerance=2.0, error_rate_threshold=0.2, window_size=20, max_pause=MAX_RETRY_AFTER):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_threshold = error_rate_threshold
+        self.max_pause = max_pause
+
+        self._outcomes = deque(maxlen=window_size)
+        # Ostatnie opóźnienia - opóźnienie bazowe to ich minimum, więc pojedyncza wyjątkowo szybka
+        # odpowiedź przestaje wpływać na limit po window_size kolejnych odpowiedziach
+        self._recent_latencies = deque(maxlen=window_size)
+        self._successes_since_increase = 0
+        self._baseline_latency = None
+        self._smoothed_latency = None
+        self._last_decrease_at = 0.0
+        self._paused_until = 0.0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def pause_remaining(self):
+        """
+        Zwraca liczbę sekund, przez które nie należy uruchamiać nowych zapytań (0, jeśli brak wstrzymania).
+        """
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def record_response(self, status_code, latency, retry_after=None):
+        """
+        Rejestruje odpowiedź serwera i na jej podstawie koryguje limit.
+
+        Args:
+            status_code (int): Kod statusu HTTP.
+            latency (float): Czas odpowiedzi w sekundach.
+            retry_after (str, optional): Surowa wartość nagłówka 'Retry-After'.
+        """
+        if status_code in self.THROTTLE_STATUS_CODES:
+            self.record_failure(retry_after=parse_retry_after(retry_after))
+        elif status_code >= 500:
+            self.record_failure()
+        elif status_code < 400:
+            self.record_success(latency)
+        # Pozostałe 4xx (np. 400, 404) dotyczą samego zapytania, a nie obciążenia serwera - nie zmieniają limitu
+
+    def record_success(self, latency):
+        self._outcomes.append(True)
+        self._update_latency(latency)
+
+        if self._smoothed_latency > self._baseline_latency * self.latency_tolerance:
+            # Serwer zwalnia pod obciążeniem: zmniejszamy równoległość, zanim zacznie zwracać błędy
+            self._decrease()
+            return
+
+        self._successes_since_increase += 1
+        if self._successes_since_increase >= self.limit:
+            self._successes_since_increase = 0
+            self._limit = min(self.max_limit, self._limit + self.increase_step)
+
+    def record_failure(self, retry_after=None):
+        """
+        Rejestruje nieudane zapytanie (timeout, błąd połączenia, 429/5xx).
+
+        Args:
+            retry_after (float, optional): Liczba sekund, przez które serwer prosi o wstrzymanie zapytań.
+        """
+        self._outcomes.append(False)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + min(retry_after, self.max_pause))
+            self._decrease()
+        elif self._error_rate() >= self.error_rate_threshold:
+            self._decrease()
+
+    def _error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _update_latency(self, latency):
+        self._recent_latencies.append(latency)
+        self._baseline_latency = max(min(self._recent_latencies), 1e-3)
+        if self._smoothed_latency is None:
+            self._smoothed_latency = latency
+        else:
+            self._smoothed_latency = 0.8 * self._smoothed_latency + 0.2 * latency
+
+    def _decrease(self):
+        now = time.monotonic()
+        # Jedno zmniejszenie na "okno" opóźnienia: wiele zapytań będących w locie zgłasza ten sam problem
+        cooldown = self._smoothed_latency or 0.0
+        if now - self._last_decrease_at < cooldown:
+            return
+        self._last_decrease_at = now
+        self._successes_since_increase = 0
+        self._limit = max(self.min_limit, math.floor(self._limit * self.decrease_factor))
+        if self._smoothed_latency is not None and self._baseline_latency is not None:
+            # Po zmniejszeniu limitu wracamy z wygładzonym opóźnieniem w stronę bazowego
+            self._smoothed_latency = self._baseline_latency * self.latency_tolerance
+
+
+class AdaptiveBatchSizer:
+    """
+    Liczba elementów wysyłanych w jednym zapytaniu, dostosowywana do limitu rozmiaru treści i docelowego czasu odpowiedzi.
+
+    Po szybkiej odpowiedzi na pełną paczkę rozmiar rośnie o increase_step, a po odpowiedzi wolniejszej niż
+    target_latency lub po błędzie maleje multiplikatywnie. Niezależnie od bieżącego rozmiaru paczka
+    jest przycinana tak, aby jej treść nie przekroczyła max_payload_bytes.
+    """
+
+    def __init__(self, initial_size=50, min_size=1, max_size=100, target_latency=10.0, max_payload_bytes=512 * 1024,
+                 increase_step=10, decrease_factor=0.5):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self._size = min(max(initial_size, self.min_size), self.max_size)
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+    @property
+    def size(self):
+        return self._size
+
+    def take(self, item_sizes):
+        """
+        Wyznacza liczbę pierwszych elementów, które zmieszczą się w następnej paczce.
+
+        Args:
+            item_sizes (list): Rozmiary (w bajtach) kolejnych kandydatów do paczki; wystarczy podać co najwyżej self.size pierwszych.
+
+        Returns:
+            int: Liczba elementów paczki (co najmniej 1, o ile lista nie jest pusta).
+        """
+        count = total = 0
+        for item_size in item_sizes[:self._size]:
+            if count and total + item_size > self.max_payload_bytes:
+                break
+            total += item_size
+            count += 1
+        return count
+
+    def record_success(self, latency, batch_size):
+        if latency > self.target_latency:
+            self._decrease(batch_size)
+        elif batch_size >= self._size:
+            # Rośniemy tylko po pełnej paczce - krótka końcówka poziomu nie świadczy o zapasie przepustowości
+            self._size = min(self.max_size, self._size + self.increase_step)
+
+    def record_failure(self, batch_size):
+        self._decrease(batch_size)
+
+    def _decrease(self, batch_size):
+        # Zmniejszamy względem faktycznie wysłanej paczki, która mogła być mniejsza od bieżącego rozmiaru
+        self._size = max(self.min_size, math.floor(min(self._size, batch_size) * self.decrease_factor))
+
+
+async def run_sliding_window(items, worker, limiter, on_result=None):
+    """
+    Uruchamia worker(item) dla każdego elementu, utrzymując w locie tyle zadań, ile wynosi limiter.limit.
+
+    Nowe zadanie startuje natychmiast po zakończeniu dowolnego z trwających (okno przesuwne),
+    a nie dopiero po zakończeniu całej paczki. Wyjątki nie przerywają pozostałych zadań.
+
+    Args:
+        items (iterable): Elementy do przetworzenia (np. numery stron).
+        worker (callable): Funkcja asynchroniczna wywoływana dla każdego elementu.
+        limiter (AdaptiveConcurrencyLimiter): Limit równoległości.
+        on_result (callable, optional): Wywoływana jako on_result(item, result) po zakończeniu zadania;
+            w przypadku błędu result jest wyjątkiem.
+
+    Returns:
+        dict: Wyniki (lub wyjątki) przypisane do elementów.
+    """
+    queue = deque(items)
+    tasks = {}
+    results = {}
+
+    while queue or tasks:
+        pause = limiter.pause_remaining()
+        while queue and len(tasks) < limiter.limit and pause == 0:
+            item = queue.popleft()
+            tasks[asyncio.ensure_future(worker(item))] = item
+
+        if not tasks:
+            await asyncio.sleep(pause)
+            continue
+
+        done, _ = await asyncio.wait(tasks.keys(), timeout=pause or None, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            item = tasks.pop(task)
+            result = task.exception() if task.exception() is not None else task.result()
+            results[item] = result
+            if on_result is not None:
+                on_result(item, result)
+
+    return results
@@ -0,0 +1,88 @@
+import re
+
+# Znacznik HTML z atrybutami; nazwa znacznika decyduje, które atrybuty zawierają adresy grafik
+TAG_PATTERN = re.compile(r'<([a-zA-Z][\w-]*)(\s[^>]*)>')
+ATTRIBUTE_PATTERN = re.compile(r'(?<![\w-])(src|data-src|srcset|data-srcset|style)(\s*=\s*)(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+SRCSET_CANDIDATE_PATTERN = re.compile(r'(^|,)(\s*)([^\s,]+)')
+CSS_URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+
+IMAGE_TAGS = frozenset(('img', 'source'))
+SRC_ATTRIBUTES = frozenset(('src', 'data-src'))
+SRCSET_ATTRIBUTES = frozenset(('srcset', 'data-srcset'))
+
+
+class AssetUrlRewriter:
+    """
+    Wyszukuje i podmienia adresy grafik w opisach HTML w jednym przejściu.
+
+    Obsługiwane są atrybuty src, data-src, srcset i data-srcset znaczników img i source
+    oraz adresy url(...) w stylach inline dowolnego znacznika. Wyrażenia regularne są kompilowane
+    raz, a podmiana wszystkich adresów odbywa się jednym re.sub z jedną mapą zamian,
+    więc koszt jest liniowy względem długości opisu, niezależnie od liczby grafik.
+    """
+
+    def find(self, html):
+        """
+        Zwraca adresy grafik w kolejności występowania (z powtórzeniami). Adresy 'data:' są pomijane.
+        """
+        return [url for url in self.find_all(html) if not url.lower().startswith('data:')]
+
+    def find_all(self, html):
+        """
+        Zwraca wszystkie odwołania do grafik w kolejności występowania, łącznie z grafikami osadzonymi ('data:').
+        """
+        urls = []
+        self._scan(html, lambda url: urls.append(url) or url)
+        return urls
+
+    def rewrite(self, html, replacements):
+        """
+        Podmienia adresy grafik według mapy {oryginalny adres: nowy adres}. Pozostałe adresy nie są zmieniane.
+        """
+        if not html or not replacements:
+            return html
+        return self._scan(html, lambda url: replacements.get(url, url))
+
+    def _scan(self, html, replace_url):
+        if not html:
+            return html
+
+        def replace_srcset(value):
+            # Adresy 'data:' zawierają przecinki, więc takiego srcset nie da się bezpiecznie podzielić na kandydatów
+            if 'data:' in value.lower():
+                return value
+            return SRCSET_CANDIDATE_PATTERN.sub(lambda match: f"{match.group(1)}{match.group(2)}{replace_url(match.group(3))}", value)
+
+        def replace_style(value):
+            return CSS_URL_PATTERN.sub(lambda match: f"url({match.group(1)}{replace_url(match.group(2).strip())}{match.group(1)})", value)
+
+        def replace_attribute(match, is_image_tag):
+            name = match.group(1).lower()
+            double_quoted = match.group(3) is not None
+            value = match.group(3) if double_quoted else match.group(4)
+
+            if name == 'style':
+                new_value = replace_style(value) if 'url(' in value.lower() else value
+            elif not is_image_tag:
+                return match.group(0)
+            elif name in SRC_ATTRIBUTES:
+                new_value = replace_url(value)
+            else:
+                new_value = replace_srcset(value)
+
+            if new_value == value:
+                return match.group(0)
+            quote = '"' if double_quoted else "'"
+            return f"{match.group(1)}{match.group(2)}{quote}{new_value}{quote}"
+
+        def replace_tag(match):
+            attributes = match.group(2)
+            is_image_tag = match.group(1).lower() in IMAGE_TAGS
+            if not is_image_tag and 'style' not in attributes.lower():
+                return match.group(0)
+            new_attributes = ATTRIBUTE_PATTERN.sub(lambda attribute: replace_attribute(attribute, is_image_tag), attributes)
+            if new_attributes == attributes:
+                return match.group(0)
+            return f"<{match.group(1)}{new_attributes}>"
+
+        return TAG_PATTERN.sub(replace_tag, html)
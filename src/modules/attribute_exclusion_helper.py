@@ -0,0 +1,177 @@
+import os
+import json
+
+from .config_helper import ConfigHelper
+
+EXCLUDE_CATEGORY_ATTRIBUTES_FILENAME = 'exclude_category_attributes.json'
+
+
+class _NestedExclusionRule:
+    """
+    Skompilowana reguła dla zagnieżdżonej ścieżki, np. 'yoast_head_json.schema.@graph'.
+    """
+
+    __slots__ = ('path', 'drop_keys', 'delete_indexes', 'item_drop_keys')
+
+    def __init__(self, path, drop_keys=frozenset(), delete_indexes=None, item_drop_keys=frozenset()):
+        self.path = path
+        self.drop_keys = drop_keys
+        self.delete_indexes = delete_indexes
+        self.item_drop_keys = item_drop_keys
+
+    def transform(self, data):
+        if isinstance(data, list):
+            # Reguły dla list działają tylko wtedy, gdy wskazano indeksy elementów do usunięcia
+            if self.delete_indexes is None:
+                return data
+            item_drop_keys = self.item_drop_keys
+            return [
+                {key: value for key, value in item.items() if key not in item_drop_keys} if item_drop_keys and isinstance(item, dict) else item
+                for index, item in enumerate(data) if index not in self.delete_indexes
+            ]
+        if isinstance(data, dict) and self.drop_keys:
+            return {key: value for key, value in data.items() if key not in self.drop_keys}
+        return data
+
+
+class AttributeExclusionPlan:
+    """
+    Plan usuwania atrybutów kategorii skompilowany z reguł 'exclude_category_attributes.json'.
+
+    Ścieżki są dzielone, a indeksy i klucze zamieniane na zbiory jednokrotnie, przy kompilacji.
+    Zastosowanie planu nie modyfikuje rekordu wejściowego: kopiowane są tylko słowniki leżące
+    na ścieżkach, z których coś usunięto, a pozostałe dane są współdzielone z oryginałem.
+
+    Format reguł:
+        "general": ["klucz", ...]                       - klucze usuwane z poziomu głównego,
+        "a.b": ["klucz", ...]                           - klucze usuwane ze słownika pod ścieżką,
+        "a.b": {"delete_item_index": [0, 2],            - elementy listy pod ścieżką usuwane wg indeksów
+                "exclude_attributes": ["klucz", ...]}     oraz klucze usuwane z pozostałych elementów.
+    """
+
+    def __init__(self, general_keys=frozenset(), nested_rules=()):
+        self.general_keys = frozenset(general_keys)
+        self.nested_rules = tuple(nested_rules)
+
+    @property
+    def is_empty(self):
+        return not self.general_keys and not self.nested_rules
+
+    @classmethod
+    def compile(cls, rules):
+        """
+        Waliduje reguły i kompiluje je do planu.
+
+        Args:
+            rules (dict): Reguły w formacie pliku 'exclude_category_attributes.json'.
+
+        Returns:
+            AttributeExclusionPlan: Skompilowany plan.
+
+        Raises:
+            ValueError: Jeśli reguły mają niepoprawną strukturę.
+        """
+        if not isinstance(rules, dict):
+            raise ValueError("Reguły wykluczania atrybutów muszą być obiektem JSON.")
+
+        general_keys = rules.get('general', [])
+        if not cls._is_list_of_strings(general_keys):
+            raise ValueError("Reguła 'general' musi być listą nazw atrybutów.")
+
+        nested_rules = []
+        for key, excluded_info in rules.items():
+            if key == 'general':
+                continue
+            path = tuple(key.split('.'))
+            if not all(path):
+                raise ValueError(f"Niepoprawna ścieżka atrybutu: '{key}'.")
+
+            if cls._is_list_of_strings(excluded_info):
+                nested_rules.append(_NestedExclusionRule(path, drop_keys=frozenset(excluded_info)))
+            elif isinstance(excluded_info, dict):
+                unknown_keys = set(excluded_info) - {'delete_item_index', 'exclude_attributes'}
+                if unknown_keys:
+                    raise ValueError(f"Nieznane klucze reguły '{key}': {', '.join(sorted(unknown_keys))}.")
+
+                indexes = excluded_info.get('delete_item_index')
+                if isinstance(indexes, int):
+                    indexes = [indexes]
+                if indexes is not None and not (isinstance(indexes, list) and all(isinstance(index, int) for index in indexes)):
+                    raise ValueError(f"Reguła '{key}': 'delete_item_index' musi być liczbą lub listą liczb.")
+
+                item_drop_keys = excluded_info.get('exclude_attributes', [])
+                if not cls._is_list_of_strings(item_drop_keys):
+                    raise ValueError(f"Reguła '{key}': 'exclude_attributes' musi być listą nazw atrybutów.")
+
+                nested_rules.append(_NestedExclusionRule(
+                    path,
+                    delete_indexes=frozenset(indexes) if indexes is not None else None,
+                    item_drop_keys=frozenset(item_drop_keys)
+                ))
+            else:
+                raise ValueError(f"Reguła '{key}' musi być listą atrybutów lub obiektem z 'delete_item_index'.")
+
+        return cls(general_keys, nested_rules)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Wczytuje i kompiluje reguły z pliku JSON. Brak pliku lub niepoprawny JSON oznacza pusty plan.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                rules = json.load(file)
+        except FileNotFoundError:
+            print(f"Plik {path} nie został znaleziony. Atrybuty kategorii nie będą wykluczane.")
+            return cls()
+        except json.JSONDecodeError:
+            print(f"Plik {path} zawiera niepoprawny format JSON. Atrybuty kategorii nie będą wykluczane.")
+            return cls()
+        return cls.compile(rules)
+
+    @staticmethod
+    def _is_list_of_strings(value):
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+    def apply(self, record):
+        """
+        Zwraca rekord bez wykluczonych atrybutów. Rekord wejściowy nie jest modyfikowany.
+        """
+        if self.is_empty:
+            return record
+
+        general_keys = self.general_keys
+        result = {key: value for key, value in record.items() if key not in general_keys} if general_keys else dict(record)
+        for rule in self.nested_rules:
+            head = rule.path[0]
+            if head in result:
+                result[head] = self._apply_rule(result[head], rule.path, 1, rule)
+        return result
+
+    def _apply_rule(self, node, path, depth, rule):
+        if depth == len(path):
+            return rule.transform(node)
+        part = path[depth]
+        if not isinstance(node, dict) or part not in node:
+            return node
+        child = node[part]
+        new_child = self._apply_rule(child, path, depth + 1, rule)
+        if new_child is child:
+            return node
+        copied = dict(node)
+        copied[part] = new_child
+        return copied
+
+
+_exclusion_plans = {}
+
+
+def load_exclusion_plan(config: ConfigHelper):
+    """
+    Zwraca plan wykluczania atrybutów kategorii wczytany z katalogu danych kategorii.
+    Plik jest wczytywany i walidowany raz na przebieg programu, a plan współdzielony przez wszystkie helpery.
+    """
+    path = os.path.join(config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, EXCLUDE_CATEGORY_ATTRIBUTES_FILENAME)
+    if path not in _exclusion_plans:
+        _exclusion_plans[path] = AttributeExclusionPlan.from_file(path)
+    return _exclusion_plans[path]
@@ -37,6 +37,8 @@ class ConfigHelper:
         self.OUTPUT_DATA_FOLDER_FOR_MENU = os.path.join(self.OUTPUT_DATA_FOLDER, "json", "menu")
         self.OUTPUT_DATA_FOLDER_FOR_PRODUCTS = os.path.join(self.OUTPUT_DATA_FOLDER, "json", "products")
         self.OUTPUT_DATA_FOLDER_FOR_CUSTOMERS = os.path.join(self.OUTPUT_DATA_FOLDER, "json", "customers")
+        # Baza SQLite z powiązaniami identyfikatorów WooCommerce i IdoSell (zastępuje pliki category_cache.json i menu_cache.json)
+        self.STATE_DB_PATH = config_dict.get('state_db_path', os.path.join(self.OUTPUT_DATA_FOLDER, "migration_state.db"))
         
         self.OUTPUT_CSV_FOLDER = os.path.join(self.OUTPUT_DATA_FOLDER, "csv")
         self.OUTPUT_CSV_FOLDER_FOR_SETTINGS = os.path.join(self.OUTPUT_CSV_FOLDER, "settings")
@@ -48,7 +50,9 @@ class ConfigHelper:
         self.OUTPUT_IMG_FOLDER = os.path.join(self.OUTPUT_DATA_FOLDER, "img")
         self.OUTPUT_IMG_FOLDER_FOR_CATEGORIES = os.path.join(self.OUTPUT_IMG_FOLDER, "categories")
         self.OUTPUT_IMG_FOLDER_FOR_MENU = os.path.join(self.OUTPUT_IMG_FOLDER, "menu")
-        self.OUTPUT_IMG_FOLDER_FOR_PRODUCTS = os.path.join(self.OUTPUT_IMG_FOLDER, "products")              
+        self.OUTPUT_IMG_FOLDER_FOR_PRODUCTS = os.path.join(self.OUTPUT_IMG_FOLDER, "products")
+        # Wspólny magazyn grafik z opisów kategorii i produktów (odpowiednik /data/include/cms/description/ w panelu)
+        self.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS = os.path.join(self.OUTPUT_IMG_FOLDER, "description")              
         
         self.OUTPUT_LOGS_FOLDER = os.path.join(self.DIR_PATH, "logs")
         self.OUTPUT_LOGS_FOLDER_FOR_SETTINGS = os.path.join(self.OUTPUT_LOGS_FOLDER, "settings")
@@ -59,6 +63,51 @@ class ConfigHelper:
 
         self.SUPPORTED_LANGUAGES = config_dict.get('supported_languages', ['pl', 'en'])
 
+        # Ustawienia współdzielonej warstwy transportowej HTTP (osobna pula połączeń dla każdego hosta)
+        self.HTTP2_ENABLED = config_dict.get('http2_enabled', False)
+        self.HTTP_MAX_CONNECTIONS_PER_HOST = config_dict.get('http_max_connections_per_host', 20)
+        self.HTTP_MAX_KEEPALIVE_CONNECTIONS_PER_HOST = config_dict.get('http_max_keepalive_connections_per_host', 10)
+        self.HTTP_KEEPALIVE_EXPIRY = config_dict.get('http_keepalive_expiry', 30.0)
+        self.HTTP_TIMEOUT = config_dict.get('http_timeout', 60.0)
+
+        # Początkowa i maksymalna liczba równoległych zapytań do API WooCommerce (limit dostosowuje się w trakcie pobierania)
+        self.WOOCOMMERCE_INITIAL_CONCURRENCY = config_dict.get('woocommerce_initial_concurrency', 4)
+        self.WOOCOMMERCE_MAX_CONCURRENCY = config_dict.get('woocommerce_max_concurrency', 50)
+
+        # Liczba zapytań importu kategorii i menu do API IdoSell wykonywanych równolegle (rodzic zawsze przed dziećmi)
+        self.IDOSELL_IMPORT_CONCURRENCY = config_dict.get('idosell_import_concurrency', 4)
+        # Paczki kategorii wysyłane jednym zapytaniem PUT do API IdoSell: rozmiar początkowy i maksymalny
+        # (rozmiar dostosowuje się w trakcie importu), limit rozmiaru treści zapytania i docelowy czas odpowiedzi w sekundach
+        self.IDOSELL_CATEGORIES_BATCH_SIZE = config_dict.get('idosell_categories_batch_size', 50)
+        self.IDOSELL_CATEGORIES_MAX_BATCH_SIZE = config_dict.get('idosell_categories_max_batch_size', 100)
+        self.IDOSELL_BATCH_MAX_PAYLOAD_KB = config_dict.get('idosell_batch_max_payload_kb', 512)
+        self.IDOSELL_BATCH_TARGET_LATENCY = config_dict.get('idosell_batch_target_latency', 10.0)
+
+        # Liczba równoległych pobrań grafik z opisów (łącznie i na jeden host)
+        self.IMAGE_DOWNLOAD_CONCURRENCY = config_dict.get('image_download_concurrency', 16)
+        self.IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST = config_dict.get('image_download_concurrency_per_host', 6)
+        # Maksymalny rozmiar pobieranej grafiki; większe pliki (np. błędnie podlinkowane filmy) są pomijane
+        self.IMAGE_MAX_SIZE_MB = config_dict.get('image_max_size_mb', 20)
+        # Czas (w godzinach), przez który pobrana grafika uznawana jest za aktualną bez pytania serwera
+        self.IMAGE_CACHE_TTL_HOURS = config_dict.get('image_cache_ttl_hours', 24)
+        # Czy warianty rozmiaru WordPressa ('-300x200.jpg') zastępować jedną grafiką - oryginałem lub największym wariantem
+        self.IMAGE_COLLAPSE_SIZE_VARIANTS = config_dict.get('image_collapse_size_variants', False)
+        # Opcjonalna optymalizacja grafik (wymaga Pillow): skalowanie do maksymalnego wymiaru i kodowanie do WebP lub JPEG
+        self.IMAGE_RECOMPRESSION_ENABLED = config_dict.get('image_recompression_enabled', False)
+        self.IMAGE_RECOMPRESSION_MAX_DIMENSION = config_dict.get('image_recompression_max_dimension', 1920)
+        self.IMAGE_RECOMPRESSION_FORMAT = config_dict.get('image_recompression_format', 'webp')
+        self.IMAGE_RECOMPRESSION_QUALITY = config_dict.get('image_recompression_quality', 82)
+
+        # Wysyłka grafik z opisów do sklepu: serwer FTP IdoSell lub (alternatywnie) katalog lokalny
+        self.IDOSELL_FTP_HOST = config_dict.get('idosell_ftp_host', '')
+        self.IDOSELL_FTP_PORT = config_dict.get('idosell_ftp_port', 21)
+        self.IDOSELL_FTP_USER = config_dict.get('idosell_ftp_user', '')
+        self.IDOSELL_FTP_PASSWORD = config_dict.get('idosell_ftp_password', '')
+        self.IDOSELL_FTP_TLS = config_dict.get('idosell_ftp_tls', True)
+        self.IDOSELL_FTP_IMAGES_ROOT = config_dict.get('idosell_ftp_images_root', '/data/include/cms/description')
+        self.IMAGE_UPLOAD_LOCAL_DIR = config_dict.get('image_upload_local_dir', '')
+        self.IMAGE_UPLOAD_CONCURRENCY = config_dict.get('image_upload_concurrency', 4)
+
         # Teraz, gdy wszystkie atrybuty są zainicjalizowane, możemy utworzyć katalogi
         self.create_directories()
 
@@ -68,7 +117,7 @@ class ConfigHelper:
             self.OUTPUT_DATA_FOLDER_FOR_MENU, self.OUTPUT_DATA_FOLDER_FOR_PRODUCTS, self.OUTPUT_DATA_FOLDER_FOR_CUSTOMERS,
             self.OUTPUT_CSV_FOLDER, self.OUTPUT_CSV_FOLDER_FOR_SETTINGS, self.OUTPUT_CSV_FOLDER_FOR_CATEGORIES,
             self.OUTPUT_CSV_FOLDER_FOR_MENU, self.OUTPUT_CSV_FOLDER_FOR_PRODUCTS, self.OUTPUT_CSV_FOLDER_FOR_CUSTOMERS,
-            self.OUTPUT_IMG_FOLDER, self.OUTPUT_IMG_FOLDER_FOR_CATEGORIES, self.OUTPUT_IMG_FOLDER_FOR_MENU, self.OUTPUT_IMG_FOLDER_FOR_PRODUCTS,         
+            self.OUTPUT_IMG_FOLDER, self.OUTPUT_IMG_FOLDER_FOR_CATEGORIES, self.OUTPUT_IMG_FOLDER_FOR_MENU, self.OUTPUT_IMG_FOLDER_FOR_PRODUCTS, self.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS,         
             self.OUTPUT_LOGS_FOLDER, self.OUTPUT_LOGS_FOLDER_FOR_SETTINGS, self.OUTPUT_LOGS_FOLDER_FOR_CATEGORIES,
             self.OUTPUT_LOGS_FOLDER_FOR_MENU, self.OUTPUT_LOGS_FOLDER_FOR_PRODUCTS, self.OUTPUT_LOGS_FOLDER_FOR_CUSTOMERS,
 
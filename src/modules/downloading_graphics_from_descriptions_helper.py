@@ -1,83 +1,382 @@
 import os
 import re
+import html
+import base64
+import asyncio
+import binascii
 import hashlib
+import mimetypes
 from urllib.parse import urlparse, urljoin
 import httpx
 import aiofiles
+from rich.console import Console
+
+from .http_transport_helper import HttpTransportHelper
+from .asset_url_rewriter_helper import AssetUrlRewriter
+from .image_store_helper import ImageStore
+from .image_url_cache_helper import ImageUrlCache
+from .image_recompression_helper import ImageRecompressionHelper
+
+# Ścieżka grafik z opisów w sklepie IdoSell
+DESCRIPTION_IMAGES_PATH = '/data/include/cms/description/'
+
+# Rozmiar porcji przy strumieniowym pobieraniu grafik
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+# Grafika osadzona w opisie: data:<typ>[;parametry],<dane>
+DATA_URI_PATTERN = re.compile(r'data:(image/[\w.+-]+)((?:;[^,]*)?),(.*)', re.IGNORECASE | re.DOTALL)
+INLINE_IMAGE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif', 'image/webp': '.webp', 'image/svg+xml': '.svg'}
+
+# Przyrostek wariantu rozmiaru tworzonego przez WordPress, np. '-300x200.jpg'
+SIZE_VARIANT_PATTERN = re.compile(r'-(\d+)x(\d+)(\.[A-Za-z0-9]+)$')
 
 class ImageProcessor:
-    def __init__(self, config):
+    """
+    Pobiera grafiki z opisów i podmienia ich adresy na ścieżki w panelu IdoSell.
+
+    Adresy grafik zbierane są ze wszystkich opisów naraz, normalizowane i deduplikowane, a następnie
+    pobierane równolegle przez ograniczoną pulę zadań z osobnym limitem dla każdego hosta.
+    Równoczesne żądania tego samego adresu są scalane (single-flight), a wynik jest zapamiętywany,
+    więc grafika użyta w wielu opisach pobierana jest tylko raz.
+    """
+
+    def __init__(self, config, transport=None, max_concurrency=None, max_concurrency_per_host=None):
         self.config = config
         self.base_api_url = f"https://{config.WOOCOMMERCE_API_DOMAIN}"
-        self.http_client = httpx.AsyncClient()
-
-    async def process_images_in_description(self, description, client, is_product=False):
-        # Znajdź wszystkie tagi img z src lub data-src
-        image_tags = re.findall(r'<img[^>]+(?:src|data-src)=["\'](.*?)["\']', description)
-        updated_description = description
-
-        for original_url in image_tags:
-            url = original_url
-            # Sprawdzamy, czy URL jest względny (nie zawiera schematu http:// lub https://)
-            if not urlparse(url).scheme:
-                # Jeśli URL zaczyna się od "/", dodajemy tylko domenę
-                if url.startswith('/'):
-                    url = f"https://{self.config.WOOCOMMERCE_API_DOMAIN}{url}"
-                # W przeciwnym razie dodajemy pełny base_api_url
-                else:
-                    url = urljoin(self.base_api_url, url)
-            
+        # Klienci HTTP pochodzą ze wspólnej warstwy transportowej; własna jest tworzona tylko wtedy, gdy nie została wstrzyknięta
+        self.owns_transport = transport is None
+        self.transport = transport if transport is not None else HttpTransportHelper(config)
+        self.max_concurrency = max_concurrency or config.IMAGE_DOWNLOAD_CONCURRENCY
+        self.max_concurrency_per_host = max_concurrency_per_host or config.IMAGE_DOWNLOAD_CONCURRENCY_PER_HOST
+        self.max_image_size = config.IMAGE_MAX_SIZE_MB * 1024 * 1024
+        self.collapse_size_variants = config.IMAGE_COLLAPSE_SIZE_VARIANTS
+        self._semaphore = None
+        self._host_semaphores = {}
+        # Znormalizowany URL -> zadanie pobierania (wspólne dla wszystkich opisów, w których występuje grafika)
+        self._image_tasks = {}
+        self.rewriter = AssetUrlRewriter()
+        self.console = Console()
+        self.image_store = ImageStore(config)
+        # Metadane pobranych grafik (ETag, Last-Modified, skrót) pozwalają pominąć pobieranie przy kolejnych uruchomieniach
+        self.url_cache = ImageUrlCache(config)
+        # Opcjonalne skalowanie i ponowne kodowanie grafik (wymaga Pillow)
+        self.recompressor = ImageRecompressionHelper(config, self.image_store)
+
+    def extract_image_urls(self, description):
+        """
+        Zwraca adresy grafik (src, data-src, srcset, style url(...)) w kolejności występowania.
+        """
+        return self.rewriter.find(description)
+
+    def normalize_image_url(self, url):
+        """
+        Zamienia adres względny na bezwzględny, usuwa fragment i ujednolica wielkość liter w nazwie hosta.
+        """
+        # Adresy w atrybutach HTML mogą zawierać encje, np. '&amp;' w parametrach zapytania
+        url = html.unescape(url.strip()).strip('\'"')
+        # Sprawdzamy, czy URL jest względny (nie zawiera schematu http:// lub https://)
+        if not urlparse(url).scheme:
+            # Jeśli URL zaczyna się od "/", dodajemy tylko domenę
+            if url.startswith('/'):
+                url = f"https://{self.config.WOOCOMMERCE_API_DOMAIN}{url}"
+            # W przeciwnym razie dodajemy pełny base_api_url
+            else:
+                url = urljoin(self.base_api_url, url)
+        parsed = urlparse(url)
+        return parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(), fragment='').geturl()
+
+    async def process_images_in_description(self, description, client=None, is_product=False):
+        descriptions = await self.process_images_in_descriptions([description], client=client, is_product=is_product)
+        return descriptions[0]
+
+    async def process_images_in_descriptions(self, descriptions, client=None, is_product=False):
+        """
+        Pobiera grafiki ze wszystkich opisów i podmienia w nich adresy na ścieżki w panelu.
+
+        Args:
+            descriptions (list): Opisy HTML.
+            client (httpx.AsyncClient, optional): Klient HTTP; domyślnie klient hosta z warstwy transportowej.
+            is_product (bool): Czy opisy dotyczą produktów (wpływa na katalog zapisu grafik).
+
+        Returns:
+            list: Opisy z podmienionymi adresami, w tej samej kolejności.
+        """
+        references_by_description = [self.rewriter.find_all(description) for description in descriptions]
+        urls_by_description = [[url for url in references if not self.is_data_uri(url)] for references in references_by_description]
+        data_uris_by_description = [[url for url in references if self.is_data_uri(url)] for references in references_by_description]
+
+        # Grafiki osadzone w opisach zapisujemy w magazynie bez zapytań sieciowych
+        inline_paths = await self.extract_inline_images(
+            uri for data_uris in data_uris_by_description for uri in data_uris
+        )
+        unique_urls = list(dict.fromkeys(
+            self.normalize_image_url(original_url) for urls in urls_by_description for original_url in urls
+        ))
+        new_paths = await self.fetch_images(unique_urls, client, is_product)
+
+        updated_descriptions = []
+        for description, urls, data_uris in zip(descriptions, urls_by_description, data_uris_by_description):
+            replacements = {}
+            for original_url in urls:
+                new_path = new_paths.get(self.normalize_image_url(original_url))
+                if new_path:
+                    replacements[original_url] = new_path
+            for data_uri in data_uris:
+                if inline_paths.get(data_uri):
+                    replacements[data_uri] = inline_paths[data_uri]
+            updated_descriptions.append(self.replace_image_urls(description, replacements))
+        return updated_descriptions
+
+    @staticmethod
+    def is_data_uri(url):
+        return url.lstrip().lower().startswith('data:')
+
+    async def extract_inline_images(self, data_uris):
+        """
+        Dekoduje grafiki osadzone w opisach jako 'data:image/...;base64,...' i zapisuje je w magazynie.
+        Nazwą pliku jest fragment skrótu treści, więc ta sama grafika osadzona w wielu opisach zapisywana jest raz.
+
+        Returns:
+            dict: Adres 'data:' -> ścieżka w panelu (tylko dla poprawnie zdekodowanych grafik).
+        """
+        inline_paths = {}
+        for data_uri in dict.fromkeys(data_uris):
+            match = DATA_URI_PATTERN.match(data_uri.strip())
+            if not match or ';base64' not in (match.group(2) or '').lower():
+                continue
+            media_type = match.group(1).lower()
             try:
-                response = await client.get(url)
-                if response.status_code == 200:
-                    image_path = await self.save_image(response.content, urlparse(url).path, is_product)
-                    new_path = f'/data/include/cms/description/{image_path}'
-                    # Zastąp wszystkie wystąpienia oryginalnego URL nową ścieżką
-                    updated_description = updated_description.replace(f'src="{original_url}"', f'src="{new_path}"')
-                    updated_description = updated_description.replace(f"src='{original_url}'", f"src='{new_path}'")
-                    updated_description = updated_description.replace(f'data-src="{original_url}"', f'data-src="{new_path}"')
-                    updated_description = updated_description.replace(f"data-src='{original_url}'", f"data-src='{new_path}'")
-                else:
-                    print(f"Failed to fetch image (status code {response.status_code}): {url}")
-            except httpx.RequestError as e:
-                print(f"Failed to fetch image: {url}. Error: {str(e)}")
-
-        return updated_description
-
-    async def save_image(self, image_data, image_url_path, is_product):
-        hash_digest = hashlib.md5(image_data).hexdigest()
+                image_data = base64.b64decode(re.sub(r'\s+', '', match.group(3)), validate=True)
+            except (binascii.Error, ValueError):
+                print(f"Skipped inline image with invalid base64 data ({media_type}).")
+                continue
+            if not image_data or len(image_data) > self.max_image_size:
+                continue
+
+            digest = self.image_store.compute_digest(image_data)
+            extension = INLINE_IMAGE_EXTENSIONS.get(media_type) or mimetypes.guess_extension(media_type) or '.img'
+            stored_path = await self.image_store.put(image_data, f"inline/{digest[:16]}{extension}", digest)
+            inline_paths[data_uri] = f'{DESCRIPTION_IMAGES_PATH}{stored_path}'
+        return await self.optimize_new_paths(inline_paths)
+
+    def split_size_variant(self, url):
+        """
+        Rozpoznaje wariant rozmiaru WordPressa, np. 'zdjecie-300x200.jpg'.
+
+        Returns:
+            tuple: (adres oryginału, powierzchnia wariantu w pikselach) lub (url, None), gdy adres nie jest wariantem.
+        """
+        parsed = urlparse(url)
+        match = SIZE_VARIANT_PATTERN.search(parsed.path)
+        if not match:
+            return url, None
+        original_path = f"{parsed.path[:match.start()]}{match.group(3)}"
+        return parsed._replace(path=original_path).geturl(), int(match.group(1)) * int(match.group(2))
+
+    async def fetch_collapsed_size_variants(self, urls, client=None, is_product=False):
+        """
+        Pobiera jedną grafikę dla wszystkich wariantów rozmiaru tego samego zdjęcia.
+
+        Najpierw pobierany jest oryginał (adres bez przyrostka '-SZERxWYS'); jeżeli go nie ma,
+        największy z wariantów występujących w opisach. Wszystkie warianty wskazują potem na ten sam plik.
+
+        Returns:
+            dict: Znormalizowany URL -> ścieżka w panelu lub None.
+        """
+        variants_by_original = {}
+        for url in urls:
+            original_url, area = self.split_size_variant(url)
+            variants_by_original.setdefault(original_url, []).append((area or 0, url))
+
+        async def fetch_group(original_url, variants):
+            candidates = [original_url] + [url for area, url in sorted(variants, reverse=True) if url != original_url]
+            for candidate in candidates:
+                new_path = await self.fetch_image(candidate, client, is_product)
+                if new_path:
+                    return new_path
+            return None
+
+        originals = list(variants_by_original)
+        results = await asyncio.gather(*(fetch_group(original_url, variants_by_original[original_url]) for original_url in originals))
+
+        new_paths = {}
+        for original_url, new_path in zip(originals, results):
+            for area, url in variants_by_original[original_url]:
+                new_paths[url] = new_path
+        return new_paths
+
+    async def fetch_images(self, unique_urls, client=None, is_product=False):
+        """
+        Pobiera grafiki spod znormalizowanych adresów przez wspólną pulę zadań i zapisuje indeksy magazynu.
+
+        Returns:
+            dict: Znormalizowany URL -> ścieżka w panelu lub None.
+        """
+        if self.collapse_size_variants:
+            new_paths = await self.fetch_collapsed_size_variants(unique_urls, client, is_product)
+        else:
+            results = await asyncio.gather(*(self.fetch_image(url, client, is_product) for url in unique_urls))
+            new_paths = dict(zip(unique_urls, results))
+        new_paths = await self.optimize_new_paths(new_paths)
+        self.image_store.save()
+        self.url_cache.save()
+        return new_paths
+
+    async def optimize_new_paths(self, new_paths):
+        """
+        Zamienia ścieżki grafik na ścieżki wersji zoptymalizowanych, jeżeli optymalizacja jest włączona.
+        """
+        if not self.recompressor.enabled:
+            return new_paths
+        relative_paths = {key: path[len(DESCRIPTION_IMAGES_PATH):] for key, path in new_paths.items() if path}
+        optimized_paths = await self.recompressor.optimize_paths(relative_paths.values())
+        return {
+            key: f'{DESCRIPTION_IMAGES_PATH}{optimized_paths[relative_paths[key]]}' if key in relative_paths else path
+            for key, path in new_paths.items()
+        }
+
+    async def process_image_urls(self, urls, client=None, is_product=False):
+        """
+        Pobiera grafiki spod podanych adresów (np. miniatury kategorii) do magazynu.
+
+        Returns:
+            dict: Oryginalny URL -> ścieżka w panelu (tylko dla pobranych grafik).
+        """
+        urls = [url for url in urls if url and not self.is_data_uri(url)]
+        normalized_urls = {url: self.normalize_image_url(url) for url in urls}
+        new_paths = await self.fetch_images(list(dict.fromkeys(normalized_urls.values())), client, is_product)
+        return {url: new_paths[normalized_url] for url, normalized_url in normalized_urls.items() if new_paths.get(normalized_url)}
+
+    def replace_image_urls(self, description, replacements):
+        """
+        Podmienia oryginalne adresy grafik na nowe ścieżki w jednym przejściu przez opis.
+        """
+        return self.rewriter.rewrite(description, replacements)
+
+    def fetch_image(self, url, client=None, is_product=False):
+        """
+        Zwraca zadanie pobierania grafiki. Kolejne wywołania dla tego samego adresu dostają to samo zadanie.
+        """
+        task = self._image_tasks.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download_image(url, client, is_product))
+            self._image_tasks[url] = task
+        return task
+
+    async def _download_image(self, url, client=None, is_product=False):
+        # W okresie ważności pamięci podręcznej grafika z magazynu jest używana bez zapytania do serwera
+        cached = self.url_cache.get(url)
+        if self.url_cache.is_fresh(cached):
+            stored_path = self.image_store.stored_path(cached.get('digest'))
+            if stored_path is not None:
+                return f'{DESCRIPTION_IMAGES_PATH}{stored_path}'
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        host = urlparse(url).netloc
+        host_semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency_per_host))
+
+        async with self._semaphore, host_semaphore:
+            try:
+                image_path = await self._stream_image(client or self.transport.client_for(url), url)
+                if image_path is not None:
+                    return f'{DESCRIPTION_IMAGES_PATH}{image_path}'
+            except (httpx.HTTPError, httpx.InvalidURL, OSError) as e:
+                # Błąd jednej grafiki nie może przerwać przetwarzania pozostałych opisów - zostaje oryginalny adres
+                self.console.print(f"[bold yellow]Uwaga:[/bold yellow] Nie udało się pobrać grafiki {url}: {e}", style="bold yellow")
+        return None
+
+    def is_allowed_content_type(self, content_type):
+        """
+        Dopuszcza odpowiedzi z typem image/* oraz bez określonego typu (część serwerów nie wysyła nagłówka).
+        """
+        media_type = (content_type or '').split(';', 1)[0].strip().lower()
+        return not media_type or media_type == 'application/octet-stream' or media_type.startswith('image/')
+
+    async def _stream_image(self, client, url):
+        """
+        Pobiera grafikę strumieniowo do pliku tymczasowego w magazynie, licząc skrót SHA-256 w trakcie pobierania.
+        Pobieranie jest przerywane, gdy typ treści nie jest grafiką lub rozmiar przekracza limit.
+
+        Returns:
+            str: Ścieżka grafiki w magazynie lub None, jeśli grafiki nie zapisano.
+        """
+        cached = self.url_cache.get(url)
+        stored_path = self.image_store.stored_path(cached.get('digest')) if cached else None
+        headers = self.url_cache.conditional_headers(cached) if stored_path else {}
+
+        async with client.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304 and stored_path is not None:
+                # Grafika nie zmieniła się od ostatniego pobrania - używamy pliku z magazynu
+                self.url_cache.touch(url)
+                return stored_path
+            if response.status_code != 200:
+                print(f"Failed to fetch image (status code {response.status_code}): {url}")
+                return None
+
+            content_type = response.headers.get('Content-Type')
+            if not self.is_allowed_content_type(content_type):
+                print(f"Skipped image with unsupported content type ({content_type}): {url}")
+                return None
+
+            content_length = response.headers.get('Content-Length')
+            if content_length and content_length.isdigit() and int(content_length) > self.max_image_size:
+                print(f"Skipped image larger than {self.max_image_size} bytes ({content_length} bytes): {url}")
+                return None
+
+            digest = hashlib.sha256()
+            size = 0
+            temp_path = self.image_store.create_temp_file()
+            try:
+                async with aiofiles.open(temp_path, 'wb') as file:
+                    async for chunk in response.aiter_bytes(IMAGE_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image_size:
+                            print(f"Skipped image larger than {self.max_image_size} bytes: {url}")
+                            break
+                        digest.update(chunk)
+                        await file.write(chunk)
+                if size > self.max_image_size:
+                    os.remove(temp_path)
+                    return None
+                relative_path = self.build_relative_path(urlparse(url).path)
+                stored_path = self.image_store.commit_temp_file(temp_path, digest.hexdigest(), relative_path)
+                self.url_cache.update(
+                    url, digest.hexdigest(), size,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+                return stored_path
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+    async def save_image(self, image_data, image_url_path, is_product=False):
+        """
+        Zapisuje grafikę we wspólnym magazynie (dla kategorii i produktów), odwzorowując ścieżkę z adresu URL.
+        Grafika o treści, która jest już w magazynie, nie jest zapisywana ponownie.
+
+        Returns:
+            str: Ścieżka grafiki względem /data/include/cms/description/.
+        """
+        return await self.image_store.put(image_data, self.build_relative_path(image_url_path))
+
+    def build_relative_path(self, image_url_path):
+        """
+        Odwzorowuje ścieżkę z adresu URL grafiki na ścieżkę w magazynie, normalizując nazwę pliku.
+        """
         image_path_parts = image_url_path.strip('/').split('/')
         normalized_image_name = self.normalize_filename(image_path_parts[-1])
-        
-        if is_product:
-            output_folder = self.config.OUTPUT_IMG_FOLDER_FOR_PRODUCTS
-        else:
-            output_folder = self.config.OUTPUT_IMG_FOLDER_FOR_CATEGORIES
-        
-        image_dir = os.path.join(output_folder, *image_path_parts[:-1])
-        os.makedirs(image_dir, exist_ok=True)
-        full_image_path = os.path.join(image_dir, normalized_image_name)
-        
-        if not await self.image_already_saved(hash_digest, image_dir):
-            async with aiofiles.open(full_image_path, 'wb') as f:
-                await f.write(image_data)
-        
-        return f'{"/".join(image_path_parts[:-1])}/{normalized_image_name}'
-
-    async def image_already_saved(self, hash_digest, directory):
-        hash_file = os.path.join(directory, 'hashes.txt')
-        if os.path.exists(hash_file):
-            async with aiofiles.open(hash_file, 'r') as f:
-                content = await f.read()
-                if hash_digest in content:
-                    return True
-        async with aiofiles.open(hash_file, 'a') as f:
-            await f.write(hash_digest + '\n')
-        return False
+        return '/'.join(image_path_parts[:-1] + [normalized_image_name])
 
     def normalize_filename(self, filename):
         normalized_name = re.sub(r'[^\w\-_.]', '_', filename)
         return normalized_name
 
     async def close(self):
-        await self.http_client.aclose()
+        self.image_store.save()
+        self.url_cache.save()
+        await self.recompressor.close()
+        if self.owns_transport:
+            await self.transport.close()
@@ -0,0 +1,88 @@
+import asyncio
+from collections import defaultdict, deque
+
+
+async def run_hierarchical_ready_queue(nodes, node_key, parent_key, worker, concurrency=4, take_batch=None, on_skipped=None):
+    """
+    Przetwarza węzły drzewa (np. kategorie) tak, aby rodzic zawsze został zakończony przed swoimi dziećmi,
+    a niezależne węzły (rodzeństwo, osobne gałęzie) były przetwarzane równolegle.
+
+    Węzeł trafia do kolejki gotowych, gdy jego rodzic został przetworzony albo gdy rodzica nie ma wśród węzłów
+    (kategoria główna, import przyrostowy). Wolny worker od razu pobiera z kolejki kolejną paczkę, więc dzieci
+    startują zaraz po rodzicu - bez czekania na zakończenie całego poziomu drzewa. Poddrzewo węzła, którego
+    nie udało się przetworzyć, jest pomijane (dzieci nie miałyby do czego się podpiąć).
+
+    Args:
+        nodes (iterable): Węzły do przetworzenia (w dowolnej kolejności).
+        node_key (callable): Zwraca klucz węzła.
+        parent_key (callable): Zwraca klucz rodzica węzła.
+        worker (callable): Funkcja asynchroniczna wywoływana jako worker(batch) dla listy gotowych węzłów.
+            Zwraca None albo krotkę (węzły do ponowienia, węzły nieudane). Węzły do ponowienia wracają
+            na początek kolejki, a potomkowie węzłów nieudanych nie są przetwarzani.
+        concurrency (int): Maksymalna liczba paczek przetwarzanych jednocześnie.
+        take_batch (callable, optional): Wywoływana jako take_batch(ready) z kolejką gotowych węzłów;
+            zwraca liczbę węzłów do następnej paczki (domyślnie 1).
+        on_skipped (callable, optional): Wywoływana jako on_skipped(node, skipped) z nieudanym węzłem
+            i listą jego potomków pominiętych z tego powodu.
+
+    Returns:
+        int: Liczba wysłanych paczek.
+    """
+    nodes = list(nodes)
+    keys = {node_key(node) for node in nodes}
+    children = defaultdict(list)
+    ready = deque()
+    for node in nodes:
+        parent = parent_key(node)
+        if parent in keys and parent != node_key(node):
+            children[parent].append(node)
+        else:
+            ready.append(node)
+
+    def pop_subtree(key):
+        skipped = []
+        stack = list(children.pop(key, []))
+        while stack:
+            node = stack.pop()
+            skipped.append(node)
+            stack.extend(children.pop(node_key(node), []))
+        return skipped
+
+    tasks = {}
+    batches = 0
+    try:
+        while ready or tasks or children:
+            while ready and len(tasks) < concurrency:
+                count = take_batch(ready) if take_batch is not None else 1
+                batch = [ready.popleft() for _ in range(max(1, min(count, len(ready))))]
+                tasks[asyncio.ensure_future(worker(batch))] = batch
+                batches += 1
+
+            if not tasks:
+                # Pozostały węzły, których rodzice nigdy nie zostaną przetworzeni (cykl) - traktujemy je jak główne
+                for waiting in children.values():
+                    ready.extend(waiting)
+                children.clear()
+                continue
+
+            done, _ = await asyncio.wait(tasks.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch = tasks.pop(task)
+                retry, failed = task.result() or ([], [])
+                retry_keys = {node_key(node) for node in retry}
+                failed_keys = {node_key(node) for node in failed}
+                ready.extendleft(reversed(retry))
+                for node in batch:
+                    key = node_key(node)
+                    if key in failed_keys:
+                        skipped = pop_subtree(key)
+                        if skipped and on_skipped is not None:
+                            on_skipped(node, skipped)
+                    elif key not in retry_keys:
+                        ready.extend(children.pop(key, []))
+    finally:
+        # Błąd jednej paczki przerywa import - pozostałe zadania anulujemy i czekamy na ich zakończenie
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return batches
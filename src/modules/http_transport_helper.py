@@ -0,0 +1,95 @@
+import importlib.util
+from urllib.parse import urlparse
+
+import httpx
+from rich.console import Console
+
+from .config_helper import ConfigHelper
+
+
+class HttpTransportHelper:
+    """
+    Wspólna warstwa transportowa HTTP dla całego przebiegu migracji.
+
+    Dla każdego hosta (API WooCommerce, API IdoSell, serwery z grafikami) utrzymywana jest
+    osobna pula połączeń keep-alive z własnymi limitami, dzięki czemu kolejne zapytania
+    nie płacą za ponowny handshake TLS, a jeden wolny host nie zajmuje połączeń pozostałych.
+    Klienci są tworzeni leniwie i zamykani razem w metodzie close().
+    """
+
+    def __init__(self, config: ConfigHelper, http2=None, max_connections_per_host=None, max_keepalive_connections_per_host=None, timeout=None):
+        self.config = config
+        self.console = Console()
+        self.max_connections_per_host = max_connections_per_host or config.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.max_keepalive_connections_per_host = max_keepalive_connections_per_host or config.HTTP_MAX_KEEPALIVE_CONNECTIONS_PER_HOST
+        self.keepalive_expiry = config.HTTP_KEEPALIVE_EXPIRY
+        self.timeout = timeout or config.HTTP_TIMEOUT
+        self.http2 = self._resolve_http2(config.HTTP2_ENABLED if http2 is None else http2)
+        self._clients = {}
+        self._closed = False
+
+    def _resolve_http2(self, requested):
+        """
+        Włącza HTTP/2 tylko wtedy, gdy dostępny jest pakiet 'h2' wymagany przez httpx.
+        """
+        if requested and importlib.util.find_spec("h2") is None:
+            self.console.print("[bold yellow]Uwaga:[/bold yellow] Pakiet 'h2' nie jest zainstalowany. Połączenia będą realizowane przez HTTP/1.1.", style="bold yellow")
+            return False
+        return bool(requested)
+
+    def _create_client(self, host):
+        limits = httpx.Limits(
+            max_connections=self.max_connections_per_host,
+            max_keepalive_connections=self.max_keepalive_connections_per_host,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=limits,
+            timeout=httpx.Timeout(self.timeout),
+            follow_redirects=True
+        )
+
+    def client_for(self, url_or_host):
+        """
+        Zwraca klienta HTTP z pulą połączeń przypisaną do hosta podanego adresu URL.
+
+        Args:
+            url_or_host (str): Pełny adres URL lub sama nazwa domeny.
+
+        Returns:
+            httpx.AsyncClient: Klient współdzielony przez wszystkie zapytania do tego hosta.
+        """
+        if self._closed:
+            raise RuntimeError("Warstwa transportowa HTTP została już zamknięta.")
+
+        host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+        host = host.lower()
+        client = self._clients.get(host)
+        if client is None:
+            client = self._create_client(host)
+            self._clients[host] = client
+        return client
+
+    @property
+    def woocommerce(self):
+        return self.client_for(self.config.WOOCOMMERCE_API_DOMAIN)
+
+    @property
+    def idosell(self):
+        return self.client_for(self.config.IDOSELL_API_DOMAIN)
+
+    async def close(self):
+        """
+        Zamyka wszystkie pule połączeń. Wywołanie wielokrotne jest bezpieczne.
+        """
+        self._closed = True
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,128 @@
+import time
+
+import httpx
+from rich.console import Console
+from tenacity import retry, stop_after_attempt
+
+from .config_helper import ConfigHelper
+from .adaptive_concurrency_helper import AdaptiveConcurrencyLimiter, parse_retry_after, run_sliding_window
+from .retry_helper import raise_for_retryable_status, retry_if_retryable_error, wait_decorrelated_jitter
+
+
+class IdoSellCategoryIndex:
+    """
+    Drzewo kategorii towarów istniejących w IdoSell, pobierane raz na początku importu.
+
+    Strony listy kategorii pobierane są równolegle (okno przesuwne z limitem AIMD), a kategorie indeksowane
+    są według ścieżki nazw (np. 'Meble\\Łóżka') w języku głównym - tej samej postaci co 'category_xpath'
+    kategorii z WooCommerce. Dzięki temu importer wie przed wysłaniem zapytania, czy kategorię trzeba dodać,
+    zaktualizować, czy można ją pominąć.
+    """
+
+    PAGE_LIMIT = 100
+
+    def __init__(self, config: ConfigHelper, idosell_api_key, http_client: httpx.AsyncClient, lang_id='pol'):
+        self.config = config
+        self.idosell_api_key = idosell_api_key
+        self.http_client = http_client
+        self.lang_id = lang_id
+        self.url = config.IDOSELL_API_CATEGORIES_GATE_URL
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=config.IDOSELL_IMPORT_CONCURRENCY, max_limit=config.IDOSELL_IMPORT_CONCURRENCY * 2)
+        self.console = Console()
+        # Identyfikator kategorii w IdoSell -> kategoria (id, parent_id, nazwy według lang_id)
+        self.categories = {}
+        # Ścieżka nazw -> kategoria
+        self.by_xpath = {}
+        self.complete = False
+
+    async def load(self):
+        """
+        Pobiera wszystkie strony listy kategorii i buduje indeks ścieżek.
+
+        Returns:
+            bool: Czy udało się pobrać wszystkie strony (przy niepełnym indeksie brakujące kategorie są po prostu dodawane).
+        """
+        first_page = await self.fetch_page(0)
+        pages = {0: first_page}
+        pages_count = int(first_page.get('resultsNumberPage') or 1)
+        if pages_count > 1:
+            pages.update(await run_sliding_window(range(1, pages_count), self.fetch_page, self.concurrency_limiter))
+
+        failed_pages = [page for page, result in pages.items() if isinstance(result, BaseException)]
+        for page, result in pages.items():
+            if not isinstance(result, BaseException):
+                for category in self.page_categories(result):
+                    self.add_category(category)
+        self.build_paths()
+
+        self.complete = not failed_pages
+        if failed_pages:
+            self.console.print(f"[bold yellow]Uwaga:[/bold yellow] Nie udało się pobrać {len(failed_pages)} stron drzewa kategorii IdoSell. Brakujące kategorie zostaną dodane.", style="bold yellow")
+        return self.complete
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_decorrelated_jitter(base=1, cap=30),
+        retry=retry_if_retryable_error,
+        reraise=True
+    )
+    async def fetch_page(self, page):
+        headers = {
+            "accept": "application/json",
+            "X-API-KEY": self.idosell_api_key
+        }
+        params = {"resultsPage": page, "resultsLimit": self.PAGE_LIMIT}
+        start_time = time.monotonic()
+        try:
+            response = await self.http_client.get(self.url, params=params, headers=headers)
+        except httpx.TransportError:
+            self.concurrency_limiter.record_failure()
+            raise
+        retry_after = response.headers.get('Retry-After')
+        self.concurrency_limiter.record_response(response.status_code, time.monotonic() - start_time, retry_after)
+        raise_for_retryable_status(response, parse_retry_after(retry_after))
+        return response.json()
+
+    @staticmethod
+    def page_categories(page_data):
+        result = page_data.get('result', [])
+        return result.get('categories', []) if isinstance(result, dict) else result or []
+
+    def add_category(self, category):
+        names = {lang.get('lang_id'): lang.get('singular_name') or lang.get('plural_name') for lang in category.get('lang_data', [])}
+        self.categories[category['id']] = {
+            "id": category['id'],
+            "parent_id": category.get('parent_id') or 0,
+            "names": names
+        }
+
+    def build_paths(self):
+        """
+        Wyznacza ścieżki nazw wszystkich kategorii (iteracyjnie, z ochroną przed cyklami).
+        """
+        paths = {}
+        for category_id in self.categories:
+            chain = []
+            current_id = category_id
+            while current_id in self.categories and current_id not in paths and current_id not in chain:
+                chain.append(current_id)
+                current_id = self.categories[current_id]['parent_id']
+            prefix = paths.get(current_id)
+            for node_id in reversed(chain):
+                name = self.categories[node_id]['names'].get(self.lang_id)
+                if name is None or (prefix is None and self.categories[node_id]['parent_id']):
+                    # Bez nazwy w języku głównym lub z nieznaną ścieżką rodzica kategorii nie da się dopasować
+                    paths[node_id] = None
+                    prefix = None
+                    continue
+                prefix = name if not prefix else f"{prefix}\\{name}"
+                paths[node_id] = prefix
+
+        self.by_xpath = {}
+        for category_id, path in paths.items():
+            # Przy zdublowanych ścieżkach w IdoSell dopasowujemy pierwszą kategorię
+            if path is not None:
+                self.by_xpath.setdefault(path, self.categories[category_id])
+
+    def find(self, xpath):
+        return self.by_xpath.get(xpath)
@@ -0,0 +1,172 @@
+import os
+import asyncio
+import hashlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+from rich.console import Console
+
+from .config_helper import ConfigHelper
+from .image_store_helper import ImageStore
+from .json_storage_helper import load_json, atomic_write_json
+
+# Rozszerzenia grafik rastrowych, które można bezpiecznie przeskalować (GIF może być animowany, SVG jest wektorowy)
+RECOMPRESSIBLE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.webp'))
+OUTPUT_FORMATS = {'webp': ('WEBP', '.webp'), 'jpeg': ('JPEG', '.jpg')}
+
+
+def recompress_image(source_path, output_path, max_dimension, output_format, quality):
+    """
+    Skaluje grafikę do maksymalnego wymiaru i koduje ją ponownie (funkcja uruchamiana w osobnym procesie).
+
+    Returns:
+        tuple: (skrót SHA-256 wyniku, rozmiar wyniku w bajtach)
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension))
+        if output_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(output_path, format=output_format, quality=quality, optimize=True)
+
+    digest = hashlib.sha256()
+    with open(output_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest(), os.path.getsize(output_path)
+
+
+class ImageRecompressionHelper:
+    """
+    Opcjonalny etap optymalizacji grafik z magazynu: skalowanie do maksymalnego wymiaru i ponowne
+    kodowanie (WebP lub JPEG) w puli procesów. Wymaga pakietu Pillow.
+
+    Wyniki zapamiętywane są w 'recompressed_images.json' według skrótu źródła i ustawień, więc ta sama
+    grafika nie jest przetwarzana ponownie. Jeżeli wynik nie jest mniejszy od oryginału, używany jest oryginał.
+    """
+
+    CACHE_FILENAME = 'recompressed_images.json'
+
+    def __init__(self, config: ConfigHelper, image_store=None, executor=None):
+        self.config = config
+        self.console = Console()
+        self.image_store = image_store or ImageStore(config)
+        self.max_dimension = config.IMAGE_RECOMPRESSION_MAX_DIMENSION
+        self.output_format = config.IMAGE_RECOMPRESSION_FORMAT.lower()
+        self.quality = config.IMAGE_RECOMPRESSION_QUALITY
+        self.enabled = self._resolve_enabled(config.IMAGE_RECOMPRESSION_ENABLED)
+        self.executor = executor
+        self.owns_executor = executor is None
+        self.worker = recompress_image
+        self.cache_path = os.path.join(self.image_store.store_dir, self.CACHE_FILENAME)
+        self.cache = load_json(self.cache_path, default={}) or {}
+        self.dirty = False
+
+    def _resolve_enabled(self, requested):
+        if not requested:
+            return False
+        if self.output_format not in OUTPUT_FORMATS:
+            self.console.print(f"[bold yellow]Uwaga:[/bold yellow] Nieznany format optymalizacji grafik '{self.output_format}'. Grafiki nie będą optymalizowane.", style="bold yellow")
+            return False
+        if importlib.util.find_spec("PIL") is None:
+            self.console.print("[bold yellow]Uwaga:[/bold yellow] Pakiet 'Pillow' nie jest zainstalowany. Grafiki nie będą optymalizowane.", style="bold yellow")
+            return False
+        return True
+
+    @property
+    def settings_key(self):
+        return f"{self.output_format}-{self.max_dimension}-{self.quality}"
+
+    def _cached_path(self, digest):
+        entry = self.cache.get(f"{digest}:{self.settings_key}")
+        if entry and os.path.exists(self.image_store.full_path(entry['path'])):
+            return entry
+        return None
+
+    async def optimize_paths(self, relative_paths):
+        """
+        Optymalizuje grafiki z magazynu.
+
+        Args:
+            relative_paths (iterable): Ścieżki grafik w magazynie.
+
+        Returns:
+            dict: Ścieżka oryginału -> ścieżka grafiki do użycia w opisach (zoptymalizowanej lub oryginalnej).
+        """
+        relative_paths = list(dict.fromkeys(path for path in relative_paths if path))
+        if not self.enabled:
+            return {path: path for path in relative_paths}
+
+        results = {}
+        pending = []
+        for relative_path in relative_paths:
+            digest = self.image_store.paths.get(relative_path)
+            extension = os.path.splitext(relative_path)[1].lower()
+            if digest is None or extension not in RECOMPRESSIBLE_EXTENSIONS:
+                results[relative_path] = relative_path
+                continue
+            cached = self._cached_path(digest)
+            if cached is not None:
+                results[relative_path] = cached['path']
+            else:
+                pending.append((relative_path, digest))
+
+        if pending:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor()
+            outcomes = await asyncio.gather(*(self._recompress(relative_path, digest) for relative_path, digest in pending))
+            source_bytes = sum(outcome[1] for outcome in outcomes)
+            output_bytes = sum(outcome[2] for outcome in outcomes)
+            for (relative_path, digest), outcome in zip(pending, outcomes):
+                results[relative_path] = outcome[0]
+            self.image_store.save()
+            self.save()
+            self.console.print(
+                f"⭐ Zoptymalizowano {len(pending)} grafik: {source_bytes / 1024:.1f} KB → {output_bytes / 1024:.1f} KB "
+                f"(zaoszczędzono {(source_bytes - output_bytes) / 1024:.1f} KB)."
+            )
+        return results
+
+    async def _recompress(self, relative_path, digest):
+        """
+        Returns:
+            tuple: (ścieżka grafiki do użycia, rozmiar oryginału, rozmiar wyniku)
+        """
+        format_name, extension = OUTPUT_FORMATS[self.output_format]
+        source_path = self.image_store.full_path(relative_path)
+        source_size = os.path.getsize(source_path)
+        temp_path = self.image_store.create_temp_file()
+        loop = asyncio.get_running_loop()
+        try:
+            output_digest, output_size = await loop.run_in_executor(
+                self.executor, self.worker, source_path, temp_path, self.max_dimension, format_name, self.quality
+            )
+        except Exception as e:
+            os.remove(temp_path)
+            self.console.print(f"[bold red]Błąd optymalizacji grafiki {relative_path}: {e}[/bold red]")
+            return relative_path, source_size, source_size
+
+        if output_size >= source_size:
+            # Ponowne kodowanie nie zmniejszyło grafiki - zostajemy przy oryginale
+            os.remove(temp_path)
+            result_path, output_size = relative_path, source_size
+        else:
+            optimized_path = f"optimized/{os.path.splitext(relative_path)[0]}{extension}"
+            result_path = self.image_store.commit_temp_file(temp_path, output_digest, optimized_path)
+
+        self.cache[f"{digest}:{self.settings_key}"] = {"path": result_path, "source_size": source_size, "size": output_size}
+        self.dirty = True
+        return result_path, source_size, output_size
+
+    def save(self):
+        if self.dirty:
+            atomic_write_json(self.cache_path, self.cache)
+            self.dirty = False
+
+    async def close(self):
+        self.save()
+        if self.owns_executor and self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
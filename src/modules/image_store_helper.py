@@ -0,0 +1,158 @@
+import os
+import hashlib
+import tempfile
+
+import aiofiles
+
+from .config_helper import ConfigHelper
+from .json_storage_helper import load_json, atomic_write_json
+
+
+class ImageStore:
+    """
+    Wspólny magazyn grafik z opisów kategorii i produktów adresowany skrótem treści (SHA-256).
+
+    Indeks (skrót -> ścieżka pliku, ścieżka -> skrót) wczytywany jest raz na przebieg programu
+    i przechowywany w pamięci, a na dysk zapisywany zwarto jednym plikiem 'image_index.json'.
+    Grafika o treści, która jest już w magazynie, nie jest zapisywana ponownie - jej ścieżka staje się
+    aliasem istniejącego pliku, niezależnie od adresu URL, z którego ją pobrano.
+    """
+
+    INDEX_FILENAME = 'image_index.json'
+    TEMP_DIRNAME = '.tmp'
+
+    def __init__(self, config: ConfigHelper, store_dir=None):
+        self.config = config
+        self.store_dir = store_dir or config.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS
+        self.index_path = os.path.join(self.store_dir, self.INDEX_FILENAME)
+        index = load_json(self.index_path, default={}) or {}
+        # Skrót treści -> ścieżka pliku w magazynie (względna, z '/')
+        self.files = index.get('files', {})
+        # Ścieżka (także alias) -> skrót treści
+        self.paths = index.get('paths', {})
+        self.dirty = False
+
+    @staticmethod
+    def compute_digest(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def __contains__(self, digest):
+        return digest in self.files
+
+    def resolve(self, relative_path):
+        """
+        Zwraca ścieżkę pliku z treścią przypisaną do ścieżki (lub aliasu) albo None.
+        """
+        digest = self.paths.get(relative_path)
+        return self.files.get(digest) if digest else None
+
+    def _register(self, digest, relative_path):
+        """
+        Rejestruje treść w indeksie.
+
+        Returns:
+            tuple: (ścieżka pliku w magazynie, czy treść trzeba zapisać na dysku)
+        """
+        stored_path = self.files.get(digest)
+        if stored_path is not None:
+            # Ta sama treść jest już w magazynie - zapamiętujemy jedynie alias
+            if self.paths.get(relative_path) != digest:
+                self.paths.setdefault(relative_path, digest)
+                self.dirty = True
+            return stored_path, False
+
+        if relative_path in self.paths:
+            # Pod tą ścieżką jest już inna treść (np. podmieniona grafika) - nowa dostaje nazwę z fragmentem skrótu
+            root, extension = os.path.splitext(relative_path)
+            relative_path = f"{root}-{digest[:8]}{extension}"
+
+        self.files[digest] = relative_path
+        self.paths[relative_path] = digest
+        self.dirty = True
+        return relative_path, True
+
+    def _unregister(self, digest, relative_path):
+        del self.files[digest]
+        del self.paths[relative_path]
+
+    def full_path(self, relative_path):
+        return os.path.join(self.store_dir, *relative_path.split('/'))
+
+    def stored_path(self, digest):
+        """
+        Zwraca ścieżkę pliku z treścią o podanym skrócie, o ile plik nadal istnieje na dysku.
+        """
+        relative_path = self.files.get(digest) if digest else None
+        if relative_path and os.path.exists(self.full_path(relative_path)):
+            return relative_path
+        return None
+
+    async def put(self, data, relative_path, digest=None):
+        """
+        Dodaje grafikę do magazynu.
+
+        Args:
+            data (bytes): Treść grafiki.
+            relative_path (str): Proponowana ścieżka względna (np. odwzorowanie ścieżki z adresu URL).
+            digest (str, optional): Wyliczony wcześniej skrót SHA-256 treści.
+
+        Returns:
+            str: Ścieżka względna pliku, pod którą treść jest dostępna w magazynie.
+        """
+        digest = digest or self.compute_digest(data)
+        # Wpis rejestrujemy przed zapisem pliku, aby równoległe zapisy tej samej treści stały się aliasami
+        stored_path, is_new = self._register(digest, relative_path)
+        if not is_new:
+            return stored_path
+
+        full_path = self.full_path(stored_path)
+        try:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            async with aiofiles.open(full_path, 'wb') as file:
+                await file.write(data)
+        except BaseException:
+            self._unregister(digest, stored_path)
+            raise
+        return stored_path
+
+    def create_temp_file(self):
+        """
+        Tworzy plik tymczasowy w katalogu magazynu (ten sam system plików, więc przeniesienie jest atomowe).
+
+        Returns:
+            str: Ścieżka pliku tymczasowego.
+        """
+        temp_dir = os.path.join(self.store_dir, self.TEMP_DIRNAME)
+        os.makedirs(temp_dir, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=temp_dir, prefix='.part_')
+        os.close(file_descriptor)
+        return temp_path
+
+    def commit_temp_file(self, temp_path, digest, relative_path):
+        """
+        Przenosi pobrany plik tymczasowy do magazynu przez os.replace, a przy duplikacie treści usuwa go.
+
+        Returns:
+            str: Ścieżka względna pliku, pod którą treść jest dostępna w magazynie.
+        """
+        stored_path, is_new = self._register(digest, relative_path)
+        if not is_new:
+            os.remove(temp_path)
+            return stored_path
+
+        full_path = self.full_path(stored_path)
+        try:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            self._unregister(digest, stored_path)
+            raise
+        return stored_path
+
+    def save(self):
+        """
+        Zapisuje indeks atomowo, jeżeli zmienił się od ostatniego zapisu.
+        """
+        if self.dirty:
+            atomic_write_json(self.index_path, {"files": self.files, "paths": self.paths})
+            self.dirty = False
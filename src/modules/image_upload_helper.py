@@ -0,0 +1,289 @@
+import os
+import time
+import shutil
+import asyncio
+import ftplib
+import posixpath
+import tempfile
+
+from rich.console import Console
+
+from .config_helper import ConfigHelper
+from .image_store_helper import ImageStore
+from .image_recompression_helper import ImageRecompressionHelper
+from .asset_url_rewriter_helper import AssetUrlRewriter
+from .downloading_graphics_from_descriptions_helper import DESCRIPTION_IMAGES_PATH
+from .json_storage_helper import load_json, atomic_write_json
+
+
+class LocalDirectoryUploadTarget:
+    """
+    Cel wysyłki zapisujący pliki w katalogu lokalnym (np. zamontowanym udziale lub w testach).
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _copy(self, local_path, remote_path):
+        destination = os.path.join(self.root, *remote_path.split('/'))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination), prefix='.upload_')
+        os.close(file_descriptor)
+        try:
+            shutil.copyfile(local_path, temp_path)
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    async def upload(self, local_path, remote_path):
+        await asyncio.to_thread(self._copy, local_path, remote_path)
+
+    async def close(self):
+        pass
+
+
+class FtpUploadTarget:
+    """
+    Cel wysyłki na serwer FTP (domyślnie FTPS) sklepu, np. do katalogu /data/include/cms/description.
+
+    ftplib działa synchronicznie, więc każde połączenie obsługiwane jest w osobnym wątku,
+    a połączenia są utrzymywane w puli i używane ponownie przez kolejne pliki.
+    """
+
+    def __init__(self, host, user, password, root='/', port=21, use_tls=True, timeout=60):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.root = root
+        self.port = port
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._connections = []
+        self._created_dirs = set()
+
+    def _connect(self):
+        ftp = ftplib.FTP_TLS() if self.use_tls else ftplib.FTP()
+        ftp.connect(self.host, self.port, timeout=self.timeout)
+        ftp.login(self.user, self.password)
+        if self.use_tls:
+            ftp.prot_p()
+        return ftp
+
+    def _ensure_directory(self, ftp, directory):
+        parts = [part for part in directory.split('/') if part]
+        current = '/' if directory.startswith('/') else ''
+        for part in parts:
+            current = posixpath.join(current, part)
+            if current in self._created_dirs:
+                continue
+            try:
+                ftp.mkd(current)
+            except ftplib.error_perm:
+                # Błąd mkd oznacza zwykle, że katalog już istnieje, ale może to być też brak uprawnień -
+                # katalog zapamiętujemy dopiero po potwierdzeniu, że da się do niego przejść
+                if not self._directory_exists(ftp, current):
+                    raise
+            self._created_dirs.add(current)
+
+    @staticmethod
+    def _directory_exists(ftp, directory):
+        previous = ftp.pwd()
+        try:
+            ftp.cwd(directory)
+        except ftplib.error_perm:
+            return False
+        ftp.cwd(previous)
+        return True
+
+    def _store(self, ftp, local_path, remote_path):
+        full_remote_path = posixpath.join(self.root, remote_path)
+        self._ensure_directory(ftp, posixpath.dirname(full_remote_path))
+        with open(local_path, 'rb') as file:
+            ftp.storbinary(f'STOR {full_remote_path}', file)
+
+    async def upload(self, local_path, remote_path):
+        ftp = self._connections.pop() if self._connections else await asyncio.to_thread(self._connect)
+        try:
+            await asyncio.to_thread(self._store, ftp, local_path, remote_path)
+        except BaseException:
+            # Połączenie po błędzie może być w nieokreślonym stanie - zamykamy je zamiast zwracać do puli
+            ftp.close()
+            raise
+        self._connections.append(ftp)
+
+    async def close(self):
+        while self._connections:
+            ftp = self._connections.pop()
+            try:
+                await asyncio.to_thread(ftp.quit)
+            except ftplib.all_errors:
+                ftp.close()
+
+
+class ImageUploadHelper:
+    """
+    Wysyła grafiki z lokalnego magazynu do sklepu przez wymienny cel wysyłki (katalog lokalny, FTP).
+
+    Dla każdej ścieżki zapamiętywany jest skrót wysłanej treści w pliku 'uploaded_images.json',
+    więc kolejne uruchomienia (także po przerwaniu) wysyłają tylko pliki nowe lub zmienione.
+
+    Wysyłane są tylko grafiki, do których odwołują się przepisane opisy (referenced_paths). Bez tej listy
+    wysyłany jest cały magazyn z pominięciem oryginałów zastąpionych wersjami z katalogu 'optimized/'.
+    """
+
+    STATE_FILENAME = 'uploaded_images.json'
+    # Co ile wysłanych plików zapisywany jest stan wysyłki
+    STATE_SAVE_INTERVAL = 50
+
+    def __init__(self, config: ConfigHelper, target, image_store=None, concurrency=None, state_path=None, referenced_paths=None):
+        self.config = config
+        self.target = target
+        self.image_store = image_store or ImageStore(config)
+        self.referenced_paths = None if referenced_paths is None else list(dict.fromkeys(referenced_paths))
+        self.concurrency = concurrency or config.IMAGE_UPLOAD_CONCURRENCY
+        self.state_path = state_path or os.path.join(self.image_store.store_dir, self.STATE_FILENAME)
+        # Ścieżka w sklepie -> skrót wysłanej treści
+        self.uploaded = load_json(self.state_path, default={}) or {}
+        self.console = Console()
+
+    def upload_candidates(self):
+        """
+        Zwraca grafiki, które powinny znaleźć się w sklepie.
+
+        Returns:
+            list: Krotki (ścieżka względna w sklepie, skrót treści).
+        """
+        if self.referenced_paths is not None:
+            candidates = []
+            for relative_path in self.referenced_paths:
+                digest = self.image_store.paths.get(relative_path)
+                if digest in self.image_store.files:
+                    candidates.append((relative_path, digest))
+            return candidates
+
+        superseded = self.superseded_digests()
+        return [(relative_path, digest) for digest, relative_path in self.image_store.files.items() if digest not in superseded]
+
+    def superseded_digests(self):
+        """
+        Zwraca skróty oryginałów, dla których w magazynie istnieje mniejsza wersja zoptymalizowana.
+        """
+        cache = load_json(os.path.join(self.image_store.store_dir, ImageRecompressionHelper.CACHE_FILENAME), default={}) or {}
+        superseded = set()
+        for key, entry in cache.items():
+            digest = key.split(':', 1)[0]
+            if entry.get('path') != self.image_store.files.get(digest) and self.image_store.paths.get(entry.get('path')) in self.image_store.files:
+                superseded.add(digest)
+        return superseded
+
+    def pending_uploads(self):
+        """
+        Zwraca grafiki, które nie zostały jeszcze wysłane w aktualnej wersji.
+
+        Returns:
+            list: Krotki (ścieżka względna, skrót treści, rozmiar w bajtach).
+        """
+        pending = []
+        for relative_path, digest in self.upload_candidates():
+            if self.uploaded.get(relative_path) == digest:
+                continue
+            full_path = self.image_store.full_path(self.image_store.files[digest])
+            if os.path.exists(full_path):
+                pending.append((relative_path, digest, os.path.getsize(full_path)))
+        return pending
+
+    def save_state(self):
+        atomic_write_json(self.state_path, self.uploaded)
+
+    async def upload_all(self):
+        """
+        Wysyła równolegle wszystkie oczekujące pliki i raportuje przepustowość.
+
+        Returns:
+            dict: Podsumowanie: liczba wysłanych plików, bajtów, błędów, czas i przepustowość (bajty/s).
+        """
+        candidates_count = len(self.upload_candidates())
+        pending = self.pending_uploads()
+        queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+
+        uploaded_files = 0
+        uploaded_bytes = 0
+        failed = []
+        started = time.perf_counter()
+
+        def throughput():
+            elapsed = time.perf_counter() - started
+            return uploaded_bytes / elapsed if elapsed > 0 else 0.0
+
+        with self.console.status(f"[bold green]Wysyłanie {len(pending)} grafik...", spinner="dots") as status:
+            async def worker():
+                nonlocal uploaded_files, uploaded_bytes
+                while not queue.empty():
+                    relative_path, digest, size = queue.get_nowait()
+                    try:
+                        await self.target.upload(self.image_store.full_path(self.image_store.files[digest]), relative_path)
+                    except Exception as e:
+                        failed.append(relative_path)
+                        self.console.print(f"[bold red]Błąd wysyłania grafiki {relative_path}: {e}[/bold red]")
+                        continue
+                    self.uploaded[relative_path] = digest
+                    uploaded_files += 1
+                    uploaded_bytes += size
+                    if uploaded_files % self.STATE_SAVE_INTERVAL == 0:
+                        self.save_state()
+                    status.update(f"[bold green]Wysłano {uploaded_files}/{len(pending)} grafik ({throughput() / 1024:.1f} KB/s)")
+
+            try:
+                await asyncio.gather(*(worker() for _ in range(max(1, min(self.concurrency, len(pending))))))
+            finally:
+                self.save_state()
+                await self.target.close()
+
+        summary = {
+            "uploaded_files": uploaded_files,
+            "uploaded_bytes": uploaded_bytes,
+            "failed": failed,
+            "skipped_files": candidates_count - len(pending),
+            "elapsed": time.perf_counter() - started,
+            "bytes_per_second": throughput()
+        }
+        self.console.print(
+            f"⭐ Wysłano {uploaded_files} grafik ({uploaded_bytes / 1024:.1f} KB, {summary['bytes_per_second'] / 1024:.1f} KB/s), "
+            f"pominięto {summary['skipped_files']} już wysłanych, błędy: {len(failed)}."
+        )
+        return summary
+
+
+def referenced_image_paths(categories):
+    """
+    Zbiera ścieżki grafik z magazynu, do których odwołują się przepisane opisy i miniatury kategorii.
+
+    Returns:
+        list: Ścieżki względne (bez prefiksu '/data/include/cms/description/').
+    """
+    rewriter = AssetUrlRewriter()
+    paths = []
+    for category in categories:
+        urls = rewriter.find(category.get('description') or '')
+        urls.append(category.get('category_image') or '')
+        paths.extend(url[len(DESCRIPTION_IMAGES_PATH):] for url in urls if url.startswith(DESCRIPTION_IMAGES_PATH))
+    return list(dict.fromkeys(paths))
+
+
+def create_upload_target(config: ConfigHelper):
+    """
+    Tworzy cel wysyłki grafik na podstawie konfiguracji: serwer FTP sklepu lub katalog lokalny.
+    Zwraca None, jeżeli żaden cel nie został skonfigurowany.
+    """
+    if config.IDOSELL_FTP_HOST:
+        return FtpUploadTarget(
+            config.IDOSELL_FTP_HOST, config.IDOSELL_FTP_USER, config.IDOSELL_FTP_PASSWORD,
+            root=config.IDOSELL_FTP_IMAGES_ROOT, port=config.IDOSELL_FTP_PORT, use_tls=config.IDOSELL_FTP_TLS
+        )
+    if config.IMAGE_UPLOAD_LOCAL_DIR:
+        return LocalDirectoryUploadTarget(config.IMAGE_UPLOAD_LOCAL_DIR)
+    return None
@@ -0,0 +1,70 @@
+import os
+import time
+
+from .config_helper import ConfigHelper
+from .json_storage_helper import load_json, atomic_write_json
+
+
+class ImageUrlCache:
+    """
+    Trwała pamięć podręczna metadanych pobranych grafik, zapisywana między uruchomieniami.
+
+    Dla każdego adresu URL przechowuje ETag, Last-Modified, rozmiar, skrót treści i czas ostatniego
+    sprawdzenia. W okresie ważności (TTL) grafika nie jest pobierana ponownie, a po jego upływie
+    wysyłane jest zapytanie warunkowe - odpowiedź 304 oznacza ponowne użycie pliku z magazynu.
+    """
+
+    CACHE_FILENAME = 'image_url_cache.json'
+
+    def __init__(self, config: ConfigHelper, cache_dir=None, ttl=None):
+        self.config = config
+        self.cache_path = os.path.join(cache_dir or config.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS, self.CACHE_FILENAME)
+        self.ttl = config.IMAGE_CACHE_TTL_HOURS * 3600 if ttl is None else ttl
+        self.entries = load_json(self.cache_path, default={}) or {}
+        self.dirty = False
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def is_fresh(self, entry):
+        """
+        Sprawdza, czy od ostatniego sprawdzenia grafiki na serwerze nie upłynął okres ważności.
+        """
+        return bool(entry) and time.time() - entry.get('checked_at', 0) < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url, digest, size, etag=None, last_modified=None):
+        """
+        Zapisuje metadane grafiki pobranej w całości (odpowiedź 200).
+        """
+        self.entries[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": size,
+            "digest": digest,
+            "checked_at": int(time.time())
+        }
+        self.dirty = True
+
+    def touch(self, url):
+        """
+        Odnawia okres ważności po potwierdzeniu przez serwer, że grafika się nie zmieniła (odpowiedź 304).
+        """
+        self.entries[url]['checked_at'] = int(time.time())
+        self.dirty = True
+
+    def save(self):
+        """
+        Zapisuje pamięć podręczną atomowo, jeżeli zmieniła się od ostatniego zapisu.
+        """
+        if self.dirty:
+            atomic_write_json(self.cache_path, self.entries)
+            self.dirty = False
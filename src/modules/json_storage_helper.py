@@ -0,0 +1,60 @@
+import os
+import json
+import hashlib
+import tempfile
+
+
+def load_json(path, default=None):
+    """
+    Wczytuje plik JSON, zwracając wartość domyślną, gdy plik nie istnieje lub jest uszkodzony.
+
+    Args:
+        path (str): Ścieżka do pliku.
+        default: Wartość zwracana w przypadku braku pliku lub niepoprawnego formatu.
+
+    Returns:
+        Zawartość pliku lub wartość domyślna.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        print(f"Plik {path} zawiera niepoprawny format JSON. Używam wartości domyślnej.")
+        return default
+
+
+def atomic_write_json(path, data, indent=None):
+    """
+    Zapisuje dane do pliku JSON atomowo: najpierw do pliku tymczasowego w tym samym katalogu,
+    a następnie podmienia plik docelowy przez os.replace. Przerwanie zapisu nie zostawia
+    uszkodzonego pliku - na dysku jest albo poprzednia, albo nowa wersja.
+
+    Args:
+        path (str): Ścieżka do pliku docelowego.
+        data: Dane do zapisania.
+        indent (int, optional): Wcięcie JSON; domyślnie zapis zwarty.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=indent, separators=None if indent else (',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def payload_fingerprint(payload):
+    """
+    Wylicza odcisk (SHA-256) danych wysyłanych do API, niezależny od kolejności kluczy.
+    Ten sam odcisk oznacza, że ponowne wysłanie danych niczego by nie zmieniło.
+    """
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
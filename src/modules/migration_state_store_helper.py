@@ -0,0 +1,156 @@
+import os
+import json
+import sqlite3
+import time
+from collections.abc import MutableMapping
+
+from rich.console import Console
+
+from .config_helper import ConfigHelper
+from .json_storage_helper import load_json
+
+
+class StateMapping(MutableMapping):
+    """
+    Widok powiązań jednego rodzaju (np. 'category') działający jak słownik identyfikator WooCommerce -> wpis.
+
+    Wpisy wczytywane są z bazy raz, przy utworzeniu widoku. Zmiany trafiają od razu do pamięci,
+    a do bazy zapisywane są z opóźnieniem (write-behind) paczkami w jednej transakcji.
+    """
+
+    def __init__(self, store, entity, entries):
+        self.store = store
+        self.entity = entity
+        self._entries = entries
+
+    def __getitem__(self, source_id):
+        return self._entries[str(source_id)]
+
+    def __setitem__(self, source_id, entry):
+        source_id = str(source_id)
+        self._entries[source_id] = entry
+        self.store._queue_write(self.entity, source_id, entry)
+
+    def __delitem__(self, source_id):
+        source_id = str(source_id)
+        del self._entries[source_id]
+        self.store._queue_write(self.entity, source_id, None)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MigrationStateStore:
+    """
+    Trwały stan migracji w jednej bazie SQLite (tryb WAL): powiązania identyfikatorów WooCommerce z IdoSell
+    dla kategorii, pozycji menu i kolejnych rodzajów danych (grafiki, produkty).
+
+    Zastępuje pliki 'category_cache.json' i 'menu_cache.json', które były w całości odczytywane i zapisywane
+    przy każdym imporcie pojedynczej kategorii. Przy pierwszym otwarciu bazy ich zawartość jest przenoszona
+    do bazy (jednorazowo), a pliki dostają rozszerzenie '.migrated'.
+    """
+
+    # Co ile oczekujących zmian wykonywany jest zapis do bazy
+    FLUSH_INTERVAL = 500
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS id_mappings (
+            entity TEXT NOT NULL,
+            source_id TEXT NOT NULL,
+            target_id TEXT,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (entity, source_id)
+        );
+        -- Nieużywany indeks ścieżek z wcześniejszych wersji bazy
+        DROP INDEX IF EXISTS idx_id_mappings_xpath;
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, config: ConfigHelper, db_path=None):
+        self.config = config
+        self.console = Console()
+        self.db_path = db_path or config.STATE_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        self._pending = {}
+        self._mappings = {}
+        self.migrate_legacy_caches({
+            'category': os.path.join(config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, 'category_cache.json'),
+            'menu': os.path.join(config.OUTPUT_DATA_FOLDER_FOR_MENU, 'menu_cache.json'),
+        })
+
+    def mapping(self, entity):
+        """
+        Zwraca (współdzielony w obrębie magazynu) widok powiązań danego rodzaju.
+        """
+        if entity not in self._mappings:
+            rows = self.connection.execute("SELECT source_id, data FROM id_mappings WHERE entity = ?", (entity,))
+            self._mappings[entity] = StateMapping(self, entity, {source_id: json.loads(data) for source_id, data in rows})
+        return self._mappings[entity]
+
+    def _queue_write(self, entity, source_id, entry):
+        self._pending[(entity, source_id)] = entry
+        if len(self._pending) >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """
+        Zapisuje oczekujące zmiany w jednej transakcji.
+        """
+        if not self._pending:
+            return
+        now = time.time()
+        upserts = []
+        deletes = []
+        for (entity, source_id), entry in self._pending.items():
+            if entry is None:
+                deletes.append((entity, source_id))
+                continue
+            target_id = entry.get('id') if isinstance(entry, dict) else None
+            upserts.append((entity, source_id, None if target_id is None else str(target_id), json.dumps(entry, ensure_ascii=False), now))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO id_mappings (entity, source_id, target_id, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (entity, source_id) DO UPDATE SET target_id = excluded.target_id, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                upserts
+            )
+            self.connection.executemany("DELETE FROM id_mappings WHERE entity = ? AND source_id = ?", deletes)
+        self._pending.clear()
+
+    def migrate_legacy_caches(self, legacy_files):
+        """
+        Jednorazowo przenosi wpisy z dawnych plików JSON do bazy.
+
+        Args:
+            legacy_files (dict): Rodzaj powiązań -> ścieżka pliku JSON.
+        """
+        for entity, path in legacy_files.items():
+            meta_key = f"migrated:{entity}"
+            if self.connection.execute("SELECT 1 FROM store_meta WHERE key = ?", (meta_key,)).fetchone():
+                continue
+            legacy_entries = load_json(path, default={}) if os.path.exists(path) else {}
+            # Pomijamy wpisy, które nie są powiązaniami (np. zapisane w tym pliku drzewo menu pobrane z API)
+            entries = {str(source_id): entry for source_id, entry in (legacy_entries or {}).items() if isinstance(entry, dict) and 'id' in entry}
+            for source_id, entry in entries.items():
+                self._pending[(entity, source_id)] = entry
+            self.flush()
+            with self.connection:
+                self.connection.execute("INSERT INTO store_meta (key, value) VALUES (?, ?)", (meta_key, path))
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+                self.console.print(f"⭐ Przeniesiono {len(entries)} wpisów z pliku {os.path.basename(path)} do bazy stanu migracji.")
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+from .config_helper import ConfigHelper
+from .json_storage_helper import load_json, atomic_write_json
+
+
+class CategoriesCheckpointHelper:
+    """
+    Punkt kontrolny pobierania kategorii.
+
+    Każda pobrana strona jest zapisywana atomowo do osobnego pliku, a manifest przechowuje endpoint,
+    liczbę stron i listę stron ukończonych. Po przerwaniu pobierania można je wznowić,
+    pobierając wyłącznie brakujące strony i odtwarzając pozostałe z dysku.
+    """
+
+    MANIFEST_FILENAME = 'manifest.json'
+
+    def __init__(self, config: ConfigHelper, checkpoint_dir=None):
+        self.config = config
+        self.checkpoint_dir = checkpoint_dir or os.path.join(config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, 'checkpoint')
+        self.manifest_path = os.path.join(self.checkpoint_dir, self.MANIFEST_FILENAME)
+        self.manifest = load_json(self.manifest_path, default=None)
+
+    def has_resumable(self, endpoint):
+        """
+        Sprawdza, czy istnieje przerwane pobieranie dla tego samego endpointa.
+        """
+        return bool(self.manifest) and self.manifest.get('endpoint') == endpoint and bool(self.manifest.get('completed_pages'))
+
+    def progress(self):
+        """
+        Zwraca (liczba ukończonych stron, liczba wszystkich stron) z manifestu.
+        """
+        if not self.manifest:
+            return 0, 0
+        return len(self.manifest.get('completed_pages', [])), self.manifest.get('total_pages', 0)
+
+    def start(self, endpoint, total_categories, total_pages, resume=False):
+        """
+        Rozpoczyna nowy punkt kontrolny lub kontynuuje istniejący.
+
+        Istniejący punkt kontrolny jest kontynuowany tylko przy wznowieniu tego samego endpointa
+        z niezmienioną liczbą kategorii i stron; w przeciwnym razie jest czyszczony.
+
+        Returns:
+            bool: True, jeżeli pobieranie jest wznawiane.
+        """
+        resumed = (
+            resume
+            and self.has_resumable(endpoint)
+            and self.manifest.get('total_pages') == total_pages
+            and self.manifest.get('total_categories') == total_categories
+        )
+        if not resumed:
+            self.clear()
+            self.manifest = {
+                "endpoint": endpoint,
+                "total_categories": total_categories,
+                "total_pages": total_pages,
+                "completed_pages": []
+            }
+            atomic_write_json(self.manifest_path, self.manifest)
+        return resumed
+
+    def _page_path(self, page):
+        return os.path.join(self.checkpoint_dir, f'page_{int(page):05d}.json')
+
+    def save_page(self, page, categories, meta=None):
+        """
+        Zapisuje stronę atomowo, a następnie dopisuje ją do manifestu (też atomowo).
+        Strona jest uznana za ukończoną dopiero po zapisaniu manifestu.
+        """
+        atomic_write_json(self._page_path(page), {"categories": categories, "meta": meta})
+        completed_pages = set(self.manifest['completed_pages'])
+        if page not in completed_pages:
+            completed_pages.add(page)
+            self.manifest['completed_pages'] = sorted(completed_pages)
+            atomic_write_json(self.manifest_path, self.manifest)
+
+    def load_pages(self):
+        """
+        Odtwarza ukończone strony z dysku.
+
+        Returns:
+            dict: Numer strony -> {"categories": [...], "meta": {...}}. Strony z brakującymi lub uszkodzonymi plikami są pomijane.
+        """
+        pages = {}
+        for page in self.manifest.get('completed_pages', []) if self.manifest else []:
+            page_data = load_json(self._page_path(page), default=None)
+            if page_data is not None:
+                pages[page] = page_data
+        return pages
+
+    def clear(self):
+        """
+        Usuwa punkt kontrolny (po zakończonym pobieraniu lub przy rozpoczęciu nowego).
+        """
+        self.manifest = None
+        if os.path.isdir(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
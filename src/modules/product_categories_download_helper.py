@@ -3,40 +3,50 @@ import httpx
 import sys
 import os
 import json
+import time
 import traceback
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
 from rich.box import ASCII2
 from rich.text import Text
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+from tenacity import retry, stop_after_attempt
 
 from .config_helper import ConfigHelper
 from .oauth_helper import OAuthHelper
-from .downloading_graphics_from_descriptions_helper import ImageProcessor
+from .adaptive_concurrency_helper import AdaptiveConcurrencyLimiter, parse_retry_after, run_sliding_window
+from .retry_helper import HttpResponseError, raise_for_retryable_status, retry_if_retryable_error, wait_decorrelated_jitter
+from .product_categories_processing_helper import CATEGORY_SOURCE_FIELDS
+from .product_categories_snapshot_helper import CategoriesSnapshotHelper
+from .product_categories_checkpoint_helper import CategoriesCheckpointHelper
 
 class CategoriesDownloadHelper:
     def __init__(self, session: httpx.AsyncClient, config: ConfigHelper):
+        # Klient HTTP z pulą połączeń do API WooCommerce, wstrzykiwany ze wspólnej warstwy transportowej
         self.session = session
         self.config = config
         self.config.create_directories()
         self.oauth_helper = OAuthHelper()
         self.max_per_page = 100
-        self.batch_size = 50
-        
-        # Inicjalizacja ImageProcessor z odpowiednimi argumentami
-        base_api_url = config.WOOCOMMERCE_API_DOMAIN if config.WOOCOMMERCE_API_DOMAIN.startswith('http') else f"https://{config.WOOCOMMERCE_API_DOMAIN}"
-        dir_path = config.DIR_PATH  # główny katalog projektu
-        self.image_processor = ImageProcessor(config)  
-        
-        # Dodaj właściwość ścieżki do pliku
-        self.excluded_attributes_path = os.path.join(dir_path, 'data', 'output', 'json', 'categories', 'exclude_category_attributes.json')
-        
-        # DEBUG
-        print(f"Konstruktor: Przed załadowaniem wykluczonych atrybutów")
-        self.excluded_attributes = self.load_excluded_attributes()  
-        # DEBUG
-        print(f"Załadowane wykluczone atrybuty: {self.excluded_attributes}")
+        # Liczba stron pobieranych równolegle dostosowuje się do opóźnień i błędów serwera (AIMD)
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=config.WOOCOMMERCE_INITIAL_CONCURRENCY,
+            max_limit=config.WOOCOMMERCE_MAX_CONCURRENCY
+        )
+
+        # Migawka poprzedniej synchronizacji używana w trybie przyrostowym (tylko zmiany)
+        self.snapshot_helper = CategoriesSnapshotHelper(config)
+        self.snapshot_enabled = False
+        self.delta_mode = False
+        self.categories_delta = None
+        self.pages_meta = {}
+        # Nowa migawka czekająca na udany import (zapisywana dopiero przez commit_snapshot)
+        self.pending_snapshot = None
+
+        # Punkt kontrolny pozwala wznowić przerwane pobieranie od brakujących stron
+        self.checkpoint_helper = CategoriesCheckpointHelper(config)
+        self.resume_download = False
 
     def wybor_trybu_pobierania_kategorii(self):
         console = Console()
@@ -45,7 +55,7 @@ class CategoriesDownloadHelper:
             prompt_text = "[black on yellow] Podaj numer trybu [/black on yellow] "
             while True:
                 opcja = Prompt.ask(prompt_text)
-                if opcja.isdigit() and 0 <= int(opcja) <= 4:
+                if opcja.isdigit() and 0 <= int(opcja) <= 5:
                     return int(opcja)
                 else:
                     console.print("▣ Nieprawidłowy wybór, spróbuj ponownie:exclamation:\n", style="bold red")
@@ -55,6 +65,7 @@ class CategoriesDownloadHelper:
             2: "Wszystkie kategorie, z pominięciem tych o podanych identyfikatorach",
             3: "Wybrane kategorie, na podstawie podanych identyfikatorów",
             4: "Wybraną kategorię, do której przypisany jest towar o podanym identyfikatorze",
+            5: "Tylko zmiany od ostatniej synchronizacji wszystkich kategorii (tryb przyrostowy)",
             0: "Wyjdź"
         }
 
@@ -83,6 +94,8 @@ class CategoriesDownloadHelper:
             
         elif tryb_pobierania_kategorii == 1:
             endpoint = f"{self.config.WOOCOMMERCE_API_CATEGORIES_GATE_URL}?orderby=id&order=asc&per_page={self.max_per_page}"
+            # Pełne pobranie zapisuje migawkę, od której liczone są zmiany w trybie przyrostowym
+            self.snapshot_enabled = True
             
         elif tryb_pobierania_kategorii == 2:
             console.print("[bold cyan]Podaj identyfikatory kategorii do pominięcia, oddzielone przecinkami:[/bold cyan]", end=" ")
@@ -117,72 +130,84 @@ class CategoriesDownloadHelper:
             self.product_id = int(product_id_str.strip()) if product_id_str.strip().isdigit() else None
             
             endpoint = f"{self.config.WOOCOMMERCE_API_CATEGORIES_GATE_URL}?product={self.product_id}&per_page={self.max_per_page}"
+        elif tryb_pobierania_kategorii == 5:
+            endpoint = f"{self.config.WOOCOMMERCE_API_CATEGORIES_GATE_URL}?orderby=id&order=asc&per_page={self.max_per_page}"
+            self.snapshot_enabled = True
+            self.delta_mode = True
         else:
             console.print("▣ Nieprawidłowy wybór, spróbuj ponownie:exclamation:\n", style="bold red")
             return     
+
+        if self.checkpoint_helper.has_resumable(self.dodanie_projekcji_pol(endpoint)):
+            completed, total = self.checkpoint_helper.progress()
+            console.print(f"[black on yellow] Znaleziono przerwane pobieranie tych kategorii (ukończono {completed} z {total} {self.odmien_rzeczownik(total, 'strona2')}). Czy chcesz je wznowić? [/black on yellow]", end=" ")
+            odpowiedz_wznowienie = input("(Tak/Nie): ").lower()
+            self.resume_download = odpowiedz_wznowienie in ['t', 'tak', 'y', '1', 'yes']
+            console.print(f"[black on green] Wybrano [/black on green] : {'Tak' if self.resume_download else 'Nie'}\n")
             
         return endpoint
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(5),
-        retry=retry_if_exception_type((httpx.ReadTimeout, httpx.ConnectError))
-    )
     async def obliczanie_liczby_kategorii_i_stron_odpowiedzi_api(self, endpoint):
+        """
+        Pobiera pierwszą stronę kategorii (GET) i na podstawie nagłówków 'X-WP-Total' oraz 'X-WP-TotalPages'
+        planuje pobieranie pozostałych stron. Zastępuje osobne zapytanie HEAD, oszczędzając jedno połączenie.
+
+        Args:
+            endpoint (str): Endpoint API kategorii (z projekcją pól).
+
+        Returns:
+            tuple: (liczba kategorii, liczba stron, kategorie z pierwszej strony) lub (None, None, None) w przypadku błędu.
+        """
         console = Console()
         
         status_message = "Obliczanie liczby kategorii do pobrania"
         
         with console.status(f"[bold cyan]{status_message}[/bold cyan]", spinner="dots6", spinner_style="bold cyan", speed=1.0) as status:
-            oauth_path = self.oauth_helper.generate_oauth_url("HEAD", endpoint, self.config.WOOCOMMERCE_API_CONSUMER_KEY, self.config.WOOCOMMERCE_API_CONSUMER_SECRET_KEY)
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.head(oauth_path)
-
-                    if response.status_code == 200:
-                        x_wp_total = response.headers.get('X-WP-Total')
-                        x_wp_totalpages = response.headers.get('X-WP-TotalPages')
-
-                        if x_wp_total is not None and x_wp_totalpages is not None:
-                            total_categories = int(x_wp_total)
-                            total_categories_pages = int(x_wp_totalpages)
-                            
-                            strony_text = self.odmien_rzeczownik(total_categories_pages, "strona")
-                            kategorie_text = self.odmien_rzeczownik(total_categories, "kategoria")
-                            
-                            console.print(
-                                f"⭐",
-                                f"Do pobrania jest łącznie [bold bright_blue]{total_categories}[/bold bright_blue] {kategorie_text},", 
-                                f"które zostały podzielone na [bold bright_blue]{total_categories_pages}[/bold bright_blue] {strony_text} odpowiedzi.",
-                                style="bold green"
-                            )                                                     
-                            
-                            return total_categories, total_categories_pages
-                        else:
-                            status.stop()
-                            console.print("[bold red]▣[/bold red] Nie znaleziono oczekiwanych nagłówków 'X-WP-Total' i 'X-WP-TotalPages' w odpowiedzi", style="bold red")
-                            return None, None
-                    else:
-                        status.stop()
-                        console.print(f"[bold red]▣[/bold red] Status [red]{response.status_code}[/red] : Nie udało się poprawnie połączyć i pobierać nagłówków z [bold cyan]{endpoint}[/bold cyan]", style="bold red")
-                        self._display_error_message(error_message)
-                        return None, None 
-            
-            except httpx.ReadTimeout:
+                first_page_categories, headers = await self.pobieranie_strony_z_kategoriami(1, endpoint, track_page=True)
+
+                x_wp_total = headers.get('X-WP-Total')
+                x_wp_totalpages = headers.get('X-WP-TotalPages')
+
+                if x_wp_total is not None and x_wp_totalpages is not None:
+                    total_categories = int(x_wp_total)
+                    total_categories_pages = int(x_wp_totalpages)
+                    
+                    strony_text = self.odmien_rzeczownik(total_categories_pages, "strona")
+                    kategorie_text = self.odmien_rzeczownik(total_categories, "kategoria")
+                    
+                    console.print(
+                        f"⭐",
+                        f"Do pobrania jest łącznie [bold bright_blue]{total_categories}[/bold bright_blue] {kategorie_text},", 
+                        f"które zostały podzielone na [bold bright_blue]{total_categories_pages}[/bold bright_blue] {strony_text} odpowiedzi.",
+                        style="bold green"
+                    )                                                     
+                    
+                    return total_categories, total_categories_pages, first_page_categories
+                else:
+                    status.stop()
+                    console.print("[bold red]▣[/bold red] Nie znaleziono oczekiwanych nagłówków 'X-WP-Total' i 'X-WP-TotalPages' w odpowiedzi", style="bold red")
+                    return None, None, None
+
+            except HttpResponseError as e:
+                status.stop()
+                console.print(f"[bold red]▣[/bold red] Status [red]{e.status_code}[/red] : Nie udało się poprawnie połączyć i pobrać pierwszej strony kategorii z [bold cyan]{endpoint}[/bold cyan]", style="bold red")
+                return None, None, None
+            except httpx.TimeoutException:
                 status.stop()
                 error_message = "▣ Upłynął limit czasu oczekiwania na odpowiedź serwera. Sprawdź swoje połączenie internetowe i spróbuj ponownie później."
                 self._display_error_message(error_message)
-                return None, None
+                return None, None, None
             except httpx.ConnectError:
                 status.stop()
                 error_message = "▣ Nie można nawiązać połączenia z serwerem. Sprawdź swoje połączenie internetowe i upewnij się, że serwer jest dostępny."
                 self._display_error_message(error_message)
-                return None, None
+                return None, None, None
             except Exception as e:
                 status.stop()
                 error_message = f"▣ Wystąpił nieoczekiwany błąd: {str(e)}"
                 self._display_error_message(error_message)
-                return None, None
+                return None, None, None
       
     
     def _display_error_message(self, message):
@@ -201,48 +226,89 @@ class CategoriesDownloadHelper:
         )
         console.print(error_panel)    
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(5),
-        retry=retry_if_exception_type((httpx.ReadTimeout, httpx.ConnectError))
-    )
     async def pobieranie_wszystkich_kategorii(self, endpoint):
         console = Console()
         try: 
-            total_categories, total_categories_pages = await self.obliczanie_liczby_kategorii_i_stron_odpowiedzi_api(endpoint)      
+            endpoint = self.dodanie_projekcji_pol(endpoint)
+            self.pages_meta = {}
+            self.categories_delta = None
+            self.pending_snapshot = None
+            total_categories, total_categories_pages, first_page_categories = await self.obliczanie_liczby_kategorii_i_stron_odpowiedzi_api(endpoint)      
             if total_categories_pages is None:
                 console.print("Nie udało się pobrać informacji o liczbie kategorii.", style="bold red")
                 return []        
             
-            all_categories = []
-            
-            page = 1
-            while page <= total_categories_pages:
-                current_batch_pages = min(self.batch_size, total_categories_pages - page + 1)
-                current_batch_pages_start = page
-                current_batch_pages_end = page + current_batch_pages - 1
-                strony_text2 = self.odmien_rzeczownik(total_categories_pages, "strona2")
-                current_page_message = f"[bold cyan]Trwa pobieranie szczegółowych danych dotyczących kategorii z zakresu stron od [bold yellow]{current_batch_pages_start}[/bold yellow] do [bold yellow]{current_batch_pages_end}[/bold yellow] z całkowitej liczby [bold yellow]{total_categories_pages}[/bold yellow] {strony_text2}.[/bold cyan]"  
-                
-                with console.status(current_page_message, spinner="dots6", spinner_style="bold yellow", speed=1.0):
-                    start_time = asyncio.get_event_loop().time()
-                    
-                    tasks = [self.pobieranie_paczki_z_kategoriami(page + i, endpoint) for i in range(current_batch_pages)]
-                    categories_batches = await asyncio.gather(*tasks)
-                    
-                    batch_categories_count = sum(len(batch) for batch in categories_batches)
-                    all_categories.extend([cat for batch in categories_batches for cat in batch])
-                    
-                    elapsed_time = asyncio.get_event_loop().time() - start_time
-                    
-                    console.print(
-                        f"⭐",
-                        f"Przetworzono kategorie ze stron od [bold bright_blue]{current_batch_pages_start}[/bold bright_blue] do [bold bright_blue]{current_batch_pages_end}[/bold bright_blue] z łącznej liczby [bold bright_blue]{total_categories_pages}[/bold bright_blue] {strony_text2}.",
-                        f"Uzyskano dane dotyczące [bold bright_blue]{batch_categories_count}[/bold bright_blue] kategorii z łącznej liczby [bold bright_blue]{len(all_categories)}[/bold bright_blue] kategorii (czas wykonania operacji wyniósł [bold bright_blue]{elapsed_time:.2f}[/bold bright_blue] sekundy).",
-                        style="bold green"
-                    )                   
-                    
-                    page += current_batch_pages
+            strony_text2 = self.odmien_rzeczownik(total_categories_pages, "strona2")
+
+            # Pierwsza strona została już pobrana przy planowaniu pobierania; przy wznowieniu
+            # strony ukończone wcześniej odtwarzamy z punktu kontrolnego zamiast pobierać je ponownie
+            categories_by_page = {}
+            if self.checkpoint_helper.start(endpoint, total_categories, total_categories_pages, resume=self.resume_download):
+                for page, page_data in self.checkpoint_helper.load_pages().items():
+                    categories_by_page[page] = page_data['categories']
+                    if page_data.get('meta'):
+                        self.pages_meta[page] = page_data['meta']
+                console.print(f"⭐ Wznowiono pobieranie: odtworzono [bold bright_blue]{len(categories_by_page)}[/bold bright_blue] {self.odmien_rzeczownik(len(categories_by_page), 'strona2')} z punktu kontrolnego.", style="bold green")
+            categories_by_page[1] = first_page_categories
+            self.checkpoint_helper.save_page(1, first_page_categories, self.pages_meta.get(1))
+
+            pages_to_download = [page for page in range(2, total_categories_pages + 1) if page not in categories_by_page]
+            completed_pages = len(categories_by_page)
+
+            def progress_message():
+                return f"[bold cyan]Trwa pobieranie szczegółowych danych dotyczących kategorii: ukończono [bold yellow]{completed_pages}[/bold yellow] z całkowitej liczby [bold yellow]{total_categories_pages}[/bold yellow] {strony_text2} (równolegle: [bold yellow]{self.concurrency_limiter.limit}[/bold yellow]).[/bold cyan]"
+
+            with console.status(progress_message(), spinner="dots6", spinner_style="bold yellow", speed=1.0) as status:
+                start_time = asyncio.get_event_loop().time()
+
+                def on_page_done(page, result):
+                    nonlocal completed_pages
+                    completed_pages += 1
+                    if not isinstance(result, BaseException):
+                        self.checkpoint_helper.save_page(page, result, self.pages_meta.get(page))
+                    status.update(progress_message())
+
+                # Okno przesuwne: kolejna strona startuje, gdy tylko dowolna z trwających się zakończy
+                categories_by_page.update(await run_sliding_window(
+                    pages_to_download,
+                    lambda page: self.pobieranie_paczki_z_kategoriami(page, endpoint, track_page=True),
+                    self.concurrency_limiter,
+                    on_result=on_page_done
+                ))
+
+                # Strony, które nie powiodły się mimo ponowień, trafiają do kolejki opróżnianej na końcu;
+                # strony pobrane poprawnie nie są pobierane ponownie
+                failed_pages = [page for page, result in categories_by_page.items() if isinstance(result, BaseException)]
+                if failed_pages:
+                    status.update(f"[bold cyan]Ponawianie pobierania [bold yellow]{len(failed_pages)}[/bold yellow] nieudanych {self.odmien_rzeczownik(len(failed_pages), 'strona2')}.[/bold cyan]")
+                    retried_pages = await self.ponawianie_nieudanych_stron(failed_pages, endpoint)
+                    for page, result in retried_pages.items():
+                        if not isinstance(result, BaseException):
+                            self.checkpoint_helper.save_page(page, result, self.pages_meta.get(page))
+                    categories_by_page.update(retried_pages)
+
+                missing_pages = sorted(page for page, result in categories_by_page.items() if isinstance(result, BaseException))
+                for page in missing_pages:
+                    console.print(f"[bold red]▣[/bold red] Nie udało się pobrać strony [bold red]{page}[/bold red]: {categories_by_page.pop(page)}", style="bold red")
+
+                if missing_pages:
+                    console.print("[bold yellow]Uwaga:[/bold yellow] Pobrane strony zostały zapisane w punkcie kontrolnym. Przy kolejnym uruchomieniu można wznowić pobieranie brakujących stron.", style="bold yellow")
+                else:
+                    self.checkpoint_helper.clear()
+
+                all_categories = [cat for page in sorted(categories_by_page) for cat in categories_by_page[page]]
+
+                elapsed_time = asyncio.get_event_loop().time() - start_time
+
+                console.print(
+                    f"⭐",
+                    f"Przetworzono kategorie z [bold bright_blue]{total_categories_pages}[/bold bright_blue] {strony_text2}.",
+                    f"Uzyskano dane dotyczące [bold bright_blue]{len(all_categories)}[/bold bright_blue] kategorii (czas wykonania operacji wyniósł [bold bright_blue]{elapsed_time:.2f}[/bold bright_blue] sekundy, końcowa liczba równoległych zapytań: [bold bright_blue]{self.concurrency_limiter.limit}[/bold bright_blue]).",
+                    style="bold green"
+                )
+
+            if self.snapshot_enabled:
+                all_categories = await self.aktualizacja_migawki_kategorii(endpoint, all_categories, complete=not missing_pages)
             
             # Liczenie unikalnych kategorii
             unique_categories = set(cat['id'] for cat in all_categories)
@@ -274,13 +340,153 @@ class CategoriesDownloadHelper:
             console.print(f"Wystąpił nieoczekiwany błąd podczas pobierania kategorii: {str(e)}", style="bold red")
             return []        
 
+    async def ponawianie_nieudanych_stron(self, failed_pages, endpoint):
+        """
+        Opróżnia kolejkę stron, których nie udało się pobrać w głównym przebiegu.
+
+        Strony są pobierane ponownie pojedynczo (z pełną serią ponowień dla każdej z nich),
+        aby nie dokładać obciążenia serwerowi, który już wcześniej zgłaszał błędy.
+
+        Args:
+            failed_pages (list): Numery stron do ponownego pobrania.
+            endpoint (str): Endpoint API kategorii.
+
+        Returns:
+            dict: Wyniki przypisane do numerów stron (lista kategorii lub wyjątek).
+        """
+        retry_queue_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        return await run_sliding_window(
+            failed_pages,
+            # Walidatory ponowionych stron też trafiają do migawki, inaczej kolejna synchronizacja pobrałaby je w całości
+            lambda page: self.pobieranie_paczki_z_kategoriami(page, endpoint, track_page=True),
+            retry_queue_limiter
+        )
+
+    async def aktualizacja_migawki_kategorii(self, endpoint, all_categories, complete):
+        """
+        W trybie przyrostowym wyznacza zmiany względem migawki poprzedniej synchronizacji,
+        a następnie przygotowuje nową migawkę (tylko po kompletnym pobraniu). Migawka jest zapisywana
+        dopiero przez commit_snapshot() po udanym imporcie - do tego czasu nowe i zmienione kategorie
+        pozostają do zaimportowania przy kolejnej synchronizacji.
+
+        Usunięte kategorie są wykrywane na podstawie lekkiej listy identyfikatorów ('_fields=id'),
+        dzięki czemu strony, których nie udało się pobrać, nie są mylone z usuniętymi kategoriami.
+
+        Args:
+            endpoint (str): Endpoint API kategorii (z projekcją pól).
+            all_categories (list): Pobrane kategorie.
+            complete (bool): Czy pobrano wszystkie strony.
+
+        Returns:
+            list: Kompletna lista kategorii (uzupełniona z migawki o kategorie z nieudanych stron).
+        """
+        console = Console()
+
+        if self.delta_mode and self.snapshot_helper.is_available_for(endpoint):
+            listed_ids = await self.pobieranie_identyfikatorow_kategorii(endpoint)
+            if listed_ids is None and not complete:
+                # Bez listy identyfikatorów i przy brakujących stronach nie da się wiarygodnie wykryć usunięć
+                listed_ids = {category['id'] for category in all_categories} | {int(category_id) for category_id in self.snapshot_helper.categories}
+            all_categories, self.categories_delta = self.snapshot_helper.diff(all_categories, listed_ids)
+
+            delta = self.categories_delta
+            console.print(
+                f"⭐",
+                f"Zmiany od ostatniej synchronizacji: nowe [bold bright_blue]{len(delta.added)}[/bold bright_blue],",
+                f"zmienione [bold bright_blue]{len(delta.changed)}[/bold bright_blue],",
+                f"bez zmian [bold bright_blue]{len(delta.unchanged)}[/bold bright_blue],",
+                f"usunięte [bold bright_blue]{len(delta.deleted)}[/bold bright_blue].",
+                style="bold green"
+            )
+        elif self.delta_mode:
+            console.print("[bold yellow]Uwaga:[/bold yellow] Brak migawki z poprzedniej synchronizacji. Pobrano i zostaną przetworzone wszystkie kategorie.", style="bold yellow")
+
+        if complete:
+            self.pending_snapshot = (endpoint, list(all_categories), dict(self.pages_meta))
+        return all_categories
+
+    def commit_snapshot(self):
+        """
+        Zapisuje migawkę przygotowaną przy ostatnim pobieraniu. Wywoływana po udanym imporcie kategorii,
+        aby kategorie, których nie zaimportowano, nie zostały przy kolejnej synchronizacji uznane za niezmienione.
+
+        Returns:
+            bool: Czy zapisano migawkę.
+        """
+        if self.pending_snapshot is None:
+            return False
+        endpoint, all_categories, pages_meta = self.pending_snapshot
+        self.snapshot_helper.save(endpoint, all_categories, pages_meta)
+        self.pending_snapshot = None
+        return True
+
+    async def pobieranie_identyfikatorow_kategorii(self, endpoint):
+        """
+        Pobiera samą listę identyfikatorów kategorii ('_fields=id'), służącą do wykrywania usuniętych kategorii.
+
+        Returns:
+            set or None: Identyfikatory kategorii lub None, jeśli listy nie udało się pobrać w całości.
+        """
+        ids_endpoint = self.dodanie_projekcji_pol(endpoint, fields=('id',))
+        try:
+            first_page, headers = await self.pobieranie_strony_z_kategoriami(1, ids_endpoint)
+        except Exception as e:
+            Console().print(f"[bold yellow]Uwaga:[/bold yellow] Nie udało się pobrać listy identyfikatorów kategorii: {str(e)}", style="bold yellow")
+            return None
+
+        total_pages = int(headers.get('X-WP-TotalPages') or 1)
+        ids_by_page = await run_sliding_window(
+            range(2, total_pages + 1),
+            lambda page: self.pobieranie_paczki_z_kategoriami(page, ids_endpoint),
+            self.concurrency_limiter
+        )
+        if any(isinstance(result, BaseException) for result in ids_by_page.values()):
+            Console().print("[bold yellow]Uwaga:[/bold yellow] Nie udało się pobrać pełnej listy identyfikatorów kategorii.", style="bold yellow")
+            return None
+
+        ids_by_page[1] = first_page
+        return {category['id'] for page_categories in ids_by_page.values() for category in page_categories}
+
+    def dodanie_projekcji_pol(self, endpoint, fields=CATEGORY_SOURCE_FIELDS):
+        """
+        Ustawia w endpoincie parametr '_fields', aby serwer zwracał tylko pola wykorzystywane
+        przy przetwarzaniu, transformacji i imporcie (bez m.in. obszernego 'yoast_head' i '_links').
+
+        Args:
+            endpoint (str): Endpoint API kategorii.
+            fields (tuple): Pola do pobrania; domyślnie pola wykorzystywane przez przetwarzanie i import.
+
+        Returns:
+            str: Endpoint z projekcją pól.
+        """
+        parsed_endpoint = urlparse(endpoint)
+        query = [(key, value) for key, value in parse_qsl(parsed_endpoint.query) if key != '_fields']
+        query.append(('_fields', ','.join(fields)))
+        return urlunparse(parsed_endpoint._replace(query=urlencode(query, safe=',')))
+
+    async def pobieranie_paczki_z_kategoriami(self, page, endpoint, track_page=False):
+        categories_batch, _ = await self.pobieranie_strony_z_kategoriami(page, endpoint, track_page)
+        return categories_batch
+
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(5),
-        retry=retry_if_exception_type((httpx.ReadTimeout, httpx.ConnectError))
+        stop=stop_after_attempt(5),
+        wait=wait_decorrelated_jitter(base=1, cap=30),
+        retry=retry_if_retryable_error,
+        reraise=True
     )
-    async def pobieranie_paczki_z_kategoriami(self, page, endpoint):
-        console = Console()
+    async def pobieranie_strony_z_kategoriami(self, page, endpoint, track_page=False):
+        """
+        Pobiera jedną stronę kategorii.
+
+        Args:
+            page (int): Numer strony.
+            endpoint (str): Endpoint API kategorii.
+            track_page (bool): Czy zapamiętać walidatory strony (ETag, Last-Modified) i identyfikatory kategorii
+                do migawki; w trybie przyrostowym strona jest wtedy pobierana zapytaniem warunkowym.
+
+        Returns:
+            tuple: (lista kategorii, nagłówki odpowiedzi)
+        """
         # Dodajemy parametr page do endpointa
         if '?' in endpoint:
             paginated_endpoint = f"{endpoint}&page={page}"
@@ -291,21 +497,41 @@ class CategoriesDownloadHelper:
         # console.log(f"Wywoływany endpoint URL: {paginated_endpoint}")
         oauth_path = OAuthHelper.generate_oauth_url("GET", paginated_endpoint, self.config.WOOCOMMERCE_API_CONSUMER_KEY, self.config.WOOCOMMERCE_API_CONSUMER_SECRET_KEY)
     
-        async with httpx.AsyncClient() as client:
-            response = await client.get(oauth_path)
-            if response.status_code == 200:
-                categories_batch = response.json()
-            
-                # DEBUG
-                # console.print(f"Pobrano {len(categories_batch)} kategorii ze strony {page}")
-            
-                if not categories_batch:
-                    return []
-                
-                return categories_batch
-            else:
-                console.print(f"Błąd przy pobieraniu kategorii: Status {response.status_code}, Odpowiedź: {response.text}", style="bold red")
-                return []
+        # Pierwsza strona jest zawsze pobierana w całości, bo jej nagłówki planują pobieranie pozostałych
+        request_headers = {}
+        if track_page and page > 1 and self.delta_mode and self.snapshot_helper.is_available_for(endpoint):
+            request_headers = self.snapshot_helper.conditional_headers(page)
+
+        start_time = time.monotonic()
+        try:
+            response = await self.session.get(oauth_path, headers=request_headers)
+        except httpx.TransportError:
+            self.concurrency_limiter.record_failure()
+            raise
+        retry_after = response.headers.get('Retry-After')
+        self.concurrency_limiter.record_response(response.status_code, time.monotonic() - start_time, retry_after)
+
+        if response.status_code == 304:
+            # Strona nie zmieniła się od ostatniej synchronizacji - kategorie odtwarzamy z migawki
+            self.pages_meta[page] = self.snapshot_helper.pages[str(page)]
+            return self.snapshot_helper.page_categories(page), response.headers
+
+        # 429/5xx są ponawiane dla tej jednej strony; pozostałe błędy trafiają do kolejki nieudanych stron
+        raise_for_retryable_status(response, parse_retry_after(retry_after))
+
+        categories_batch = response.json() or []
+    
+        # DEBUG
+        # console.print(f"Pobrano {len(categories_batch)} kategorii ze strony {page}")
+
+        if track_page:
+            self.pages_meta[page] = {
+                "etag": response.headers.get('ETag'),
+                "last_modified": response.headers.get('Last-Modified'),
+                "ids": [category['id'] for category in categories_batch]
+            }
+        
+        return categories_batch, response.headers
 
     def odmien_rzeczownik(self, liczba, typ):
         """
@@ -369,87 +595,3 @@ class CategoriesDownloadHelper:
         else:
             # Rzucenie wyjątku w przypadku nieznanego typu rzeczownika
             raise ValueError("Nieznany typ rzeczownika")
-   
-    def load_excluded_attributes(self):
-        """
-        Ładuje atrybuty wykluczone z pliku JSON.
-        """
-        print(f"Bieżący katalog roboczy: {os.getcwd()}")  # Dodaj ten wiersz, aby sprawdzić bieżący katalog roboczy
-        print(f"Ścieżka do pliku: {self.excluded_attributes_path}")  # Dodaj ten wiersz, aby sprawdzić pełną ścieżkę do pliku
-        
-        try:
-            with open(self.excluded_attributes_path, 'r') as file:
-                excluded_attributes = json.load(file)
-            return excluded_attributes
-        except FileNotFoundError:
-            print(f"Plik {self.excluded_attributes_path} nie został znaleziony. Używam pustego słownika.")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Plik {self.excluded_attributes_path} zawiera niepoprawny format JSON. Używam pustego słownika.")
-            return {}
-              
-    def exclude_category_attributes(self, category_data):
-        """
-        Usuwa określone atrybuty z danych kategorii na podstawie zdefiniowanych reguł.
-
-        Ta funkcja przetwarza dane kategorii, usuwając niechciane atrybuty zgodnie z regułami 
-        zdefiniowanymi w EXCLUDED_CATEGORIES_ATTRIBUTES. Obsługuje zarówno płaskie jak i zagnieżdżone struktury danych.
-
-        Args:
-            category_data (dict): Dane kategorii do przetworzenia.
-
-        Returns:
-            dict: Oczyszczone dane kategorii.
-        """          
-        if not hasattr(self, 'excluded_attributes') or not self.excluded_attributes:
-            print("Ostrzeżenie: excluded_attributes nie jest zdefiniowane lub jest puste.")
-            return category_data
-
-        def exclude_attributes(data, excluded_info):
-            """
-            Pomocnicza funkcja do usuwania atrybutów z listy lub słownika.
-            Args:
-                data (list or dict): Dane do przetworzenia.
-                excluded_info (dict or list): Informacje o atrybutach do usunięcia.
-            Returns:
-                list or dict: Oczyszczone dane.
-            """            
-        
-            if isinstance(data, list):
-                # Usuwanie elementów listy na podstawie indeksów
-                if 'delete_item_index' in excluded_info:
-                    indices_to_delete = excluded_info['delete_item_index']
-                    if isinstance(indices_to_delete, int):
-                        indices_to_delete = [indices_to_delete]
-                    remaining_items = [item for i, item in enumerate(data) if i not in indices_to_delete]
-                    # Usuwanie atrybutów z pozostałych elementów listy
-                    if 'exclude_attributes' in excluded_info:
-                        for item in remaining_items:
-                            for excluded_key in excluded_info['exclude_attributes']:
-                                item.pop(excluded_key, None)
-                    return remaining_items
-            elif isinstance(data, dict):
-                # Usuwanie atrybutów z obiektów słownikowych
-                if isinstance(excluded_info, list):  # Sprawdzenie, czy excluded_info to lista
-                    for excluded_key in excluded_info:
-                        data.pop(excluded_key, None)
-            return data
-
-        # Usuwanie ogólnych atrybutów
-        cleaned_category_data = {key: value for key, value in category_data.items() if key not in self.excluded_attributes.get('general', [])}
-        
-        # Usuwanie zagnieżdżonych atrybutów
-        for key, excluded_info in self.excluded_attributes.items():
-            if key != 'general':
-                key_parts = key.split('.')
-                sub_data = category_data
-                try:
-                    # Iteracja przez zagnieżdżone klucze, z wyjątkiem ostatniego
-                    for part in key_parts[:-1]:
-                        sub_data = sub_data[part]
-                    last_key = key_parts[-1]
-                    sub_data[last_key] = exclude_attributes(sub_data[last_key], excluded_info)
-                except (KeyError, IndexError):
-                    pass
-        
-        return cleaned_category_data
@@ -1,37 +1,56 @@
 import json
 import csv
 import os
+from collections import ChainMap
 from datetime import datetime
 from typing import List, Dict, Any
 
+from .attribute_exclusion_helper import load_exclusion_plan
+
 class ProductCategoriesExportHelper:
     def __init__(self, config):
         self.config = config
         self.current_date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.exclusion_plan = load_exclusion_plan(config)
 
     def export_categories(self, all_categories: List[Dict[str, Any]], all_categories_process: List[Dict[str, Any]], all_categories_transformed: List[Dict[str, Any]]):
         self._export_to_json_and_csv(all_categories, "woocommerce_all_categories")
-        self._export_to_json_and_csv(all_categories_process, "woocommerce_all_categories_processed")
+        # Kategorie przetworzone to nakładki na dane źródłowe; atrybuty wykluczone usuwamy dopiero przy zapisie każdego rekordu
+        self._export_to_json_and_csv(all_categories_process, "woocommerce_all_categories_processed", record_view=self.exclusion_plan.apply)
         self._export_to_json_and_csv(all_categories_transformed, "woocommerce_all_categories_transformed")
 
-    def _export_to_json_and_csv(self, data: List[Dict[str, Any]], base_filename: str):
+    @staticmethod
+    def _materialize(record, record_view=None):
+        """
+        Zwraca rekord gotowy do serializacji. Nakładki (ChainMap) spłaszczane są płytko, pojedynczo w trakcie zapisu.
+        """
+        if record_view is not None:
+            record = record_view(record)
+        return dict(record) if isinstance(record, ChainMap) else record
+
+    def _export_to_json_and_csv(self, data: List[Dict[str, Any]], base_filename: str, record_view=None):
         json_filename = f"{base_filename}_{self.current_date}.json"
         csv_filename = f"{base_filename}_{self.current_date}.csv"
 
-        # Export to JSON
+        # Export to JSON - rekord po rekordzie, w tym samym formacie co json.dump(data, indent=4)
         json_path = os.path.join(self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, json_filename)
         with open(json_path, 'w', encoding='utf-8') as json_file:
-            json.dump(data, json_file, ensure_ascii=False, indent=4)
+            json_file.write('[')
+            for index, record in enumerate(data):
+                json_file.write(',\n    ' if index else '\n    ')
+                serialized = json.dumps(self._materialize(record, record_view), ensure_ascii=False, indent=4)
+                json_file.write(serialized.replace('\n', '\n    '))
+            json_file.write('\n]' if data else ']')
 
         # Export to CSV
         csv_path = os.path.join(self.config.OUTPUT_CSV_FOLDER_FOR_CATEGORIES, csv_filename)
         if data:
-            keys = data[0].keys()
+            keys = self._materialize(data[0], record_view).keys()
             with open(csv_path, 'w', newline='', encoding='utf-8') as csv_file:
                 writer = csv.DictWriter(csv_file, fieldnames=keys)
                 writer.writeheader()
                 for row in data:
-                    writer.writerow(row)
+                    writer.writerow(self._materialize(row, record_view))
 
     def _ensure_directory_exists(self, directory):
         if not os.path.exists(directory):
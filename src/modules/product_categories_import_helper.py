@@ -5,182 +5,374 @@ import time
 import asyncio
 import httpx
 import glob
+from itertools import islice
 from datetime import datetime
 from rich.console import Console
 from rich.progress import Progress
 
 from .config_helper import ConfigHelper
+from .adaptive_concurrency_helper import AdaptiveBatchSizer
+from .hierarchical_scheduler_helper import run_hierarchical_ready_queue
+from .migration_state_store_helper import MigrationStateStore
+from .idosell_category_index_helper import IdoSellCategoryIndex
+from .json_storage_helper import payload_fingerprint
 from .language_conversion import convert_lang_codes
 
 class ProductCategoriesImportHelper:
-    def __init__(self, config, idosell_api_key):
+    def __init__(self, config, idosell_api_key, http_client=None, state_store=None):
         self.config = config
         self.idosell_api_key = idosell_api_key
+        # Klient HTTP z pulą połączeń do API IdoSell, wstrzykiwany ze wspólnej warstwy transportowej
+        self.owns_http_client = http_client is None
+        self.http_client = http_client if http_client is not None else httpx.AsyncClient(timeout=httpx.Timeout(config.HTTP_TIMEOUT))
         self.idosell_api_category_url = f"https://{config.IDOSELL_API_DOMAIN}/api/admin/v3/products/categories"
         self.json_output_folder_for_categories = config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES
         self.logs_output_folder_for_categories = config.OUTPUT_LOGS_FOLDER_FOR_CATEGORIES
         self.supported_languages = getattr(config, 'SUPPORTED_LANGUAGES', ['pl', 'en'])  # domyślnie polski i angielski
         self.console = Console()
+        # Powiązania identyfikatorów kategorii WooCommerce z IdoSell (baza stanu migracji)
+        self.owns_state_store = state_store is None
+        self.state_store = state_store if state_store is not None else MigrationStateStore(config)
+        # Drzewo kategorii istniejących w IdoSell, pobierane na początku importu
+        self.category_index = None
+        self.batch_sizer = AdaptiveBatchSizer(
+            initial_size=config.IDOSELL_CATEGORIES_BATCH_SIZE,
+            max_size=config.IDOSELL_CATEGORIES_MAX_BATCH_SIZE,
+            target_latency=config.IDOSELL_BATCH_TARGET_LATENCY,
+            max_payload_bytes=config.IDOSELL_BATCH_MAX_PAYLOAD_KB * 1024
+        )
 
-    async def import_categories_into_idosell_as_product_categories_in_the_panel(self, all_categories_transformed):
+    async def import_categories_into_idosell_as_product_categories_in_the_panel(self, all_categories_transformed, incremental=False):
         if not all_categories_transformed:
             # Szukamy najnowszego pliku z transformowanymi kategoriami
             pattern = os.path.join(self.output_data_folder_for_categories, 'woocommerce_all_categories_transformed_*.json')
             files = glob.glob(pattern)
             if not files:
                 self.console.print("[bold red]Nie znaleziono pliku z transformowanymi kategoriami.[/bold red]")
-                return
+                return False
             
         sorted_categories = self.sort_categories_by_hierarchy(all_categories_transformed)
         
         category_mapping = {"0": 0}
-        added_count = existed_count = failed_count = error_count = processed_count = 0
-        total_elapsed_time = 0
+        category_cache = self.state_store.mapping('category')
+        if incremental:
+            # Import przyrostowy obejmuje tylko zmienione kategorie, więc identyfikatory rodziców bierzemy z cache poprzednich importów
+            category_mapping.update({category_id: entry['id'] for category_id, entry in category_cache.items() if isinstance(entry, dict) and 'id' in entry})
+        added_count = existed_count = unchanged_count = failed_count = error_count = processed_count = 0
+        start_time = time.time()
 
-        for category in sorted_categories:
-            category_xpath = category.get('category_xpath', 'Unknown')
-            
-            start_time = time.time()
+        await self.load_category_index(sorted_categories[0].get('lang', 'pl') if sorted_categories else 'pl')
 
-            status_message = f"[bold cyan]Importowanie kategorii [bold blue]\"{category_xpath}\"[/bold blue][/bold cyan]"
-            with self.console.status(status_message, spinner="dots6", spinner_style="bold cyan", speed=1.0):
-                response_text, added, existed, failed, processed = await self.add_batch_of_categories([category], category_mapping, 'hierarchy')
+        def take_batch(ready):
+            candidates = list(islice(ready, self.batch_sizer.size))
+            return self.batch_sizer.take([self.payload_size(self.prepare_category_entry(category, category_mapping)) for category in candidates])
 
-                end_time = time.time()
-                elapsed_time = end_time - start_time
-                total_elapsed_time += elapsed_time
+        with self.console.status("[bold cyan]Importowanie kategorii...[/bold cyan]", spinner="dots6", spinner_style="bold cyan", speed=1.0) as status:
+            async def import_batch(batch):
+                nonlocal added_count, existed_count, unchanged_count, failed_count, error_count, processed_count
+                batch_label = batch[0].get('category_xpath', 'Unknown') if len(batch) == 1 else f"{len(batch)} kategorii (od {batch[0].get('category_xpath', 'Unknown')})"
+                batch_start_time = time.time()
+                # Identyfikator kategorii paczki w mapowaniu oznacza udany import - dawne powiązania (import przyrostowy)
+                # usuwamy, aby kategoria, której nie udało się zaimportować, nie przepuściła swoich dzieci
+                for category in batch:
+                    category_mapping.pop(str(category['category_id']), None)
+                response_text, added, existed, failed, processed, unchanged = await self.add_batch_of_categories(batch, category_mapping, 'hierarchy', category_cache)
+                elapsed_time = time.time() - batch_start_time
+
+                if response_text and len(batch) > 1:
+                    # Odrzucona paczka: wraca do kolejki i zostanie ponowiona w mniejszych częściach
+                    # (rozmiar został już zmniejszony), aby błędna kategoria nie blokowała pozostałych
+                    self.console.print(f"[bold yellow]▣[/bold yellow] Paczka {len(batch)} kategorii została odrzucona, ponawiam w mniejszych paczkach.", style="yellow")
+                    return batch, []
 
                 added_count += added
                 existed_count += existed
+                unchanged_count += unchanged
                 failed_count += failed
                 processed_count += processed
-                                   
+                status.update(f"[bold cyan]Importowanie kategorii: [bold blue]{processed_count}/{len(sorted_categories)}[/bold blue][/bold cyan]")
+
                 if response_text:
                     error_count += 1
-                    self.console.print(f"[bold red]▣[/bold red] Status [bold red]niepowodzenie[/bold red] : Import kategorii o ścieżce [bold red]{category_xpath}[/bold red] nie powiódł się (czas próby: [bold yellow]{elapsed_time:.2f}[/bold yellow] sekund).", style="white")
+                    self.console.print(f"[bold red]▣[/bold red] Status [bold red]niepowodzenie[/bold red] : Import kategorii o ścieżce [bold red]{batch_label}[/bold red] nie powiódł się (czas próby: [bold yellow]{elapsed_time:.2f}[/bold yellow] sekund).", style="white")
                 else:
-                    self.console.print(f"▣ Zaimportowano kategorię o ścieżce [bold blue]\"{category_xpath}\"[/bold blue] (czas: [bold green]{elapsed_time:.2f}[/bold green] sekund).", style="bold cyan")
-                    
-        self.print_import_summary(processed_count, added_count, existed_count, failed_count, total_elapsed_time)
-    
-    async def add_batch_of_categories(self, categories, category_mapping, batch_type):
-        added_count = existed_count = failed_count = processed_count = 0
+                    self.console.print(f"▣ Zaimportowano [bold blue]\"{batch_label}\"[/bold blue] (czas: [bold green]{elapsed_time:.2f}[/bold green] sekund).", style="bold cyan")
+                return [], [category for category in batch if str(category['category_id']) not in category_mapping]
+
+            def skip_subtree(category, descendants):
+                nonlocal failed_count
+                failed_count += len(descendants)
+                self.console.print(f"[bold red]▣[/bold red] Pominięto {len(descendants)} podkategorii kategorii o ścieżce [bold red]{category.get('category_xpath', 'Unknown')}[/bold red], której nie udało się zaimportować.", style="white")
+
+            # Paczka trafia do API, gdy tylko wszyscy rodzice jej kategorii mają już identyfikatory w IdoSell
+            await run_hierarchical_ready_queue(
+                sorted_categories,
+                node_key=lambda category: str(category['category_id']),
+                parent_key=lambda category: str(category.get('parent_id', 0)),
+                worker=import_batch,
+                concurrency=self.config.IDOSELL_IMPORT_CONCURRENCY,
+                take_batch=take_batch,
+                on_skipped=skip_subtree
+            )
+
+        total_elapsed_time = time.time() - start_time
+        self.state_store.flush()
+        self.print_import_summary(processed_count, added_count, existed_count, failed_count, total_elapsed_time, unchanged_count)
+        # Import uznajemy za udany, gdy żadna kategoria nie została odrzucona
+        return failed_count == 0 and error_count == 0
+
+    async def load_category_index(self, lang_code):
+        """
+        Pobiera drzewo kategorii istniejących w IdoSell. Jeżeli się to nie uda, import działa bez planowania:
+        każda kategoria wysyłana jest jako nowa, a istniejące (faultCode 20) są aktualizowane po odpowiedzi API.
+        """
+        category_index = IdoSellCategoryIndex(self.config, self.idosell_api_key, self.http_client, lang_id=convert_lang_codes(lang_code))
+        try:
+            with self.console.status("[bold cyan]Pobieranie drzewa kategorii z IdoSell...[/bold cyan]", spinner="dots6", spinner_style="bold cyan", speed=1.0):
+                await category_index.load()
+        except Exception as e:
+            self.console.print(f"[bold yellow]Uwaga:[/bold yellow] Nie udało się pobrać drzewa kategorii z IdoSell ({e}). Wszystkie kategorie zostaną wysłane jako nowe.", style="bold yellow")
+            self.category_index = None
+            return
+        self.category_index = category_index
+        self.console.print(f"⭐ Pobrano drzewo [bold bright_blue]{len(category_index.categories)}[/bold bright_blue] kategorii istniejących w IdoSell.")
+
+    def plan_category(self, category, category_mapping, category_cache=None):
+        """
+        Ustala, co trzeba zrobić z kategorią. Kategoria z zapamiętanym powiązaniem jest pomijana, jeżeli odcisk
+        jej danych zgadza się z ostatnim udanym importem, a w przeciwnym razie aktualizowana pod zapamiętanym
+        identyfikatorem. Tylko kategorie bez powiązania są wyszukiwane w drzewie kategorii IdoSell.
+
+        Returns:
+            tuple: ('add' lub 'edit', wpis do wysłania) albo ('noop', istniejąca kategoria z IdoSell).
+        """
+        entry = self.prepare_category_entry(category, category_mapping)
+        cached = category_cache.get(str(category['category_id'])) if category_cache is not None else None
+        if cached and self.is_known_in_idosell(cached['id']):
+            if cached.get('fingerprint') == payload_fingerprint(entry):
+                return 'noop', cached
+            # Zmieniona nazwa lub rodzic - aktualizujemy tę samą kategorię, więc jej dzieci zachowują rodzica
+            return 'edit', {"operation": "edit", "id": cached['id'], "parent_id": entry['parent_id'], "lang_data": entry['lang_data']}
+
+        existing = self.category_index.find(category.get('category_xpath')) if self.category_index is not None else None
+        if existing is None:
+            return 'add', entry
+
+        same_parent = str(existing['parent_id']) == str(entry['parent_id'])
+        same_names = all(existing['names'].get(lang['lang_id']) == lang['singular_name'] for lang in entry['lang_data'])
+        if same_parent and same_names:
+            return 'noop', existing
+        return 'edit', {"operation": "edit", "id": existing['id'], "parent_id": entry['parent_id'], "lang_data": entry['lang_data']}
+
+    def is_known_in_idosell(self, idosell_id):
+        # Bez pełnego drzewa kategorii IdoSell ufamy zapamiętanemu powiązaniu
+        if self.category_index is None or not self.category_index.complete:
+            return True
+        return idosell_id in self.category_index.categories
+
+    @staticmethod
+    def payload_size(entry):
+        return len(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+    async def add_batch_of_categories(self, categories, category_mapping, batch_type, category_cache=None):
+        added_count = existed_count = failed_count = processed_count = unchanged_count = 0
         error_text = None
-        cache_file = os.path.join(self.json_output_folder_for_categories, 'category_cache.json')
-        category_cache = self.load_category_cache(cache_file)
-
-        async with httpx.AsyncClient() as client:
-            for category in categories:
-                payload = self.prepare_category_payload(category, category_mapping)
-                headers = {
-                    "accept": "application/json",
-                    "content-type": "application/json",
-                    "X-API-KEY": self.idosell_api_key
-                }
-
-                response = await client.put(self.idosell_api_category_url, json=payload, headers=headers)
-
-                if response.status_code == 200:
-                    response_data = response.json()
-                    added, existed, failed = await self.process_api_response(response_data, category, category_mapping, category_cache, client)
-                    added_count += added
-                    existed_count += existed
-                    failed_count += failed
-                    processed_count += 1
-                else:
-                    error_text = response.text
-                    self.console.print(f"Błąd przy dodawaniu kategorii: {error_text}", style="bold red")
+        if category_cache is None:
+            category_cache = self.state_store.mapping('category')
 
-                self.log_api_interaction(category, payload, headers, response)
+        # Kategorie niezmienione od ostatniego importu lub zgodne z drzewem IdoSell nie są wysyłane - zapamiętujemy jedynie ich identyfikatory
+        planned = []
+        for category in categories:
+            operation, entry = self.plan_category(category, category_mapping, category_cache)
+            if operation == 'noop':
+                self.remember_category(category, entry['id'], entry['parent_id'], category_mapping, category_cache)
+                unchanged_count += 1
+                processed_count += 1
+            else:
+                planned.append((category, operation, entry))
+        if not planned:
+            return error_text, added_count, existed_count, failed_count, processed_count, unchanged_count
 
-        self.save_category_cache(cache_file, category_cache)
-        return error_text, added_count, existed_count, failed_count, processed_count
+        categories = [category for category, _, _ in planned]
+        operations = [operation for _, operation, _ in planned]
+        client = self.http_client
+        payload = {"params": {"categories": [entry for _, _, entry in planned]}}
+        headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "X-API-KEY": self.idosell_api_key
+        }
 
-    def prepare_category_payload(self, category, category_mapping):
+        start_time = time.monotonic()
+        try:
+            response = await client.put(self.idosell_api_category_url, json=payload, headers=headers)
+            response_data = response.json() if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError) as e:
+            # Błąd połączenia (po wyczerpaniu ponowień) lub odpowiedź, która nie jest JSON-em - paczka jest odrzucana,
+            # więc zostanie ponowiona w mniejszych częściach, a pojedyncza kategoria uznana za nieudaną
+            self.batch_sizer.record_failure(len(categories))
+            error_text = str(e) or type(e).__name__
+            self.console.print(f"Błąd przy dodawaniu kategorii: {error_text}", style="bold red")
+            return error_text, added_count, existed_count, failed_count, processed_count, unchanged_count
+        latency = time.monotonic() - start_time
+
+        if response.status_code == 200:
+            self.batch_sizer.record_success(latency, len(categories))
+            added, existed, failed = await self.process_api_response(response_data, categories, category_mapping, category_cache, client, operations)
+            added_count += added
+            existed_count += existed
+            failed_count += failed
+            processed_count += len(categories)
+        else:
+            self.batch_sizer.record_failure(len(categories))
+            error_text = response.text
+            self.console.print(f"Błąd przy dodawaniu kategorii: {error_text}", style="bold red")
+
+        self.log_api_interaction(categories, payload, headers, response)
+
+        return error_text, added_count, existed_count, failed_count, processed_count, unchanged_count
+
+    def remember_category(self, category, idosell_id, idosell_parent_id, category_mapping, category_cache):
+        category_id = str(category['category_id'])
+        category_mapping[category_id] = idosell_id
+        category_cache[category_id] = {
+            "category_name": category['category_name'],
+            "category_xpath": category.get('category_xpath', ''),
+            "id": idosell_id,
+            "parent_id": idosell_parent_id,
+            # Odcisk wysłanych danych - przy kolejnym imporcie kategoria bez zmian zostanie pominięta
+            "fingerprint": payload_fingerprint(self.prepare_category_entry(category, category_mapping))
+        }
+
+    def prepare_category_lang_data(self, category):
+        return [
+            {
+                "lang_id": convert_lang_codes(lang_code),
+                "singular_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name']),
+                "plural_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name'])
+            } for lang_code in self.supported_languages if 'translations' in category and lang_code in category.get('translations', {}) or lang_code == category.get('lang', 'pl')
+        ]
+
+    def prepare_category_entry(self, category, category_mapping):
         return {
-            "params": {
-                "categories": [
-                    {
-                        "lang_data": [
-                            {
-                                "lang_id": convert_lang_codes(lang_code),
-                                "singular_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name']),
-                                "plural_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name'])
-                            } for lang_code in self.supported_languages if 'translations' in category and lang_code in category.get('translations', {}) or lang_code == category.get('lang', 'pl')
-                        ],
-                        "operation": "add",
-                        "parent_id": category_mapping.get(str(category['parent_id']), 0),
-                    }
-                ]
-            }
+            "lang_data": self.prepare_category_lang_data(category),
+            "operation": "add",
+            "parent_id": category_mapping.get(str(category['parent_id']), 0),
         }
 
-    async def process_api_response(self, response_data, category, category_mapping, category_cache, client):
+    def prepare_category_payload(self, category, category_mapping):
+        return {"params": {"categories": [self.prepare_category_entry(category, category_mapping)]}}
+
+    async def process_api_response(self, response_data, categories, category_mapping, category_cache, client, operations=None):
+        """
+        Przypisuje wyniki z odpowiedzi API do kategorii paczki (w kolejności, w jakiej zostały wysłane).
+        Kategorie, które już istnieją w IdoSell (faultCode 20), są następnie aktualizowane jednym zapytaniem.
+
+        Args:
+            operations (list, optional): Operacje ('add' lub 'edit') wysłanych kategorii; domyślnie wszystkie 'add'.
+
+        Returns:
+            tuple: (dodane, zaktualizowane, nieudane)
+        """
         added = existed = failed = 0
-        for api_category in response_data['result']['categories']:
+        api_categories = response_data.get('result', {}).get('categories', [])
+        if len(api_categories) != len(categories):
+            self.console.print(f"[bold yellow]Uwaga:[/bold yellow] API zwróciło {len(api_categories)} wyników dla {len(categories)} wysłanych kategorii.", style="bold yellow")
+            failed += max(0, len(categories) - len(api_categories))
+
+        existing_categories = []
+        for category, api_category, operation in zip(categories, api_categories, operations or ['add'] * len(categories)):
             category_id = str(category['category_id'])
-            if 'faultCode' in api_category and api_category['faultCode'] == 20:
-                existing_category_id = api_category['id']
-                updated = await self.update_existing_category(category, existing_category_id, category_cache, client, category_mapping)
-                if updated:
+            category_xpath = category.get('category_xpath', '')
+            if api_category.get('faultCode') == 20:
+                existing_categories.append((category, api_category))
+            elif api_category.get('faultCode', 0) != 0 or 'id' not in api_category:
+                failed += 1
+                self.console.print(f"Błąd przy dodawaniu kategorii {category_id}: {api_category.get('faultString', api_category)}", style="bold red")
+                continue
+            else:
+                if operation == 'edit':
                     existed += 1
                 else:
-                    failed += 1
-            else:
-                category_mapping[category_id] = api_category['id']
-                added += 1
+                    added += 1
+                parent_id = api_category.get('parent_id', category_mapping.get(str(category['parent_id']), 0))
+                self.remember_category(category, api_category['id'], parent_id, category_mapping, category_cache)
 
-            category_xpath = category.get('category_xpath', '')
             self.console.print(
                 f"[yellow]★[/yellow] "
                 f"Przetwarzanie category_id: {category_id}, category_xpath: {category_xpath}", 
                 style="yellow"
             )
 
+        if existing_categories:
+            updated = await self.update_existing_categories(existing_categories, category_cache, client, category_mapping)
+            existed += updated
+            failed += len(existing_categories) - updated
+        return added, existed, failed
+
+    async def update_existing_categories(self, existing_categories, category_cache, client, category_mapping):
+        """
+        Aktualizuje jednym zapytaniem kategorie, które już istnieją w IdoSell - pod identyfikatorem zwróconym
+        przez API i z rodzicem z bieżącego mapowania. Po udanej edycji zapamiętywany jest odcisk danych.
+
+        Args:
+            existing_categories (list): Krotki (kategoria, wynik z odpowiedzi API z identyfikatorem istniejącej kategorii).
+
+        Returns:
+            int: Liczba zaktualizowanych kategorii.
+        """
+        to_update = []
+        for category, api_category in existing_categories:
+            category_id = str(category['category_id'])
+            parent_id = category_mapping.get(str(category['parent_id']), 0)
+            # Kategoria istnieje w IdoSell, więc jej dzieci mogą się do niej odwołać niezależnie od wyniku edycji;
+            # wpis bez odcisku sprawi, że nieudana edycja zostanie ponowiona przy kolejnym imporcie
+            category_mapping[category_id] = api_category['id']
             category_cache[category_id] = {
                 "category_name": category['category_name'],
-                "category_xpath": category_xpath,
+                "category_xpath": category.get('category_xpath', ''),
                 "id": api_category['id'],
-                "parent_id": api_category['parent_id']
+                "parent_id": parent_id
             }
-        return added, existed, failed
+            to_update.append((category, api_category['id'], parent_id))
+        if not to_update:
+            return 0
 
-    async def update_existing_category(self, category, existing_category_id, category_cache, client, category_mapping):
-        cache_entry = category_cache.get(str(category['category_id']))
-        if cache_entry:
-            payload = {
-                "params": {
-                    "categories": [
-                        {
-                            "operation": "edit",
-                            "priority": "priority",
-                            "id": cache_entry['id'],
-                            "parent_id": cache_entry['parent_id'],
-                            "lang_data": [
-                                {
-                                    "lang_id": convert_lang_codes(lang_code),
-                                    "singular_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name']),
-                                    "plural_name": category.get('translations', {}).get(lang_code, {}).get('category_name', category['category_name'])
-                                } for lang_code in self.supported_languages if 'translations' in category and lang_code in category.get('translations', {}) or lang_code == category.get('lang', 'pl')
-                            ]
-                        }
-                    ]
-                }
-            }
-            headers = {
-                "accept": "application/json",
-                "content-type": "application/json",
-                "X-API-KEY": self.idosell_api_key
+        payload = {
+            "params": {
+                "categories": [
+                    {
+                        "operation": "edit",
+                        "priority": "priority",
+                        "id": idosell_id,
+                        "parent_id": parent_id,
+                        "lang_data": self.prepare_category_lang_data(category)
+                    } for category, idosell_id, parent_id in to_update
+                ]
             }
+        }
+        headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "X-API-KEY": self.idosell_api_key
+        }
+        try:
             response = await client.put(self.idosell_api_category_url, json=payload, headers=headers)
-            if response.status_code == 200:
-                category_mapping[str(category['category_id'])] = existing_category_id
-                return True
-            else:
+            if response.status_code != 200:
                 self.console.print(f"Błąd przy aktualizacji kategorii: {response.text}", style="bold red")
-                return False
+                return 0
+            results = response.json().get('result', {}).get('categories', [])
+        except (httpx.HTTPError, ValueError) as e:
+            self.console.print(f"Błąd przy aktualizacji kategorii: {e}", style="bold red")
+            return 0
+        updated = 0
+        for (category, idosell_id, parent_id), result in zip(to_update, results):
+            if result.get('faultCode', 0) == 0:
+                self.remember_category(category, idosell_id, parent_id, category_mapping, category_cache)
+                updated += 1
+        return updated
 
-    def log_api_interaction(self, category, payload, headers, response):
+    def log_api_interaction(self, categories, payload, headers, response):
         api_log = {
             "request": {
                 "url": self.idosell_api_category_url,
@@ -194,16 +386,20 @@ class ProductCategoriesImportHelper:
         }
 
         os.makedirs(self.logs_output_folder_for_categories, exist_ok=True)
-        log_filename = f'api_category_{self.normalize_filename(category["category_name"])}_{category["category_id"]}.json'
+        if len(categories) == 1:
+            log_filename = f'api_category_{self.normalize_filename(categories[0]["category_name"])}_{categories[0]["category_id"]}.json'
+        else:
+            log_filename = f'api_category_batch_{categories[0]["category_id"]}_{len(categories)}.json'
         log_filepath = os.path.join(self.logs_output_folder_for_categories, log_filename)
         with open(log_filepath, 'w', encoding='utf-8') as file:
             json.dump(api_log, file, indent=4, ensure_ascii=False)
 
-    def print_import_summary(self, processed_count, added_count, existed_count, failed_count, total_elapsed_time):
+    def print_import_summary(self, processed_count, added_count, existed_count, failed_count, total_elapsed_time, unchanged_count=0):
         self.console.print("\nPodsumowanie importu:", style="cyan")
         self.console.print(f"▪️ Liczba węzłów przetworzonych jako [cyan]\"Kategorii towarów w panelu IdoSell\"[/cyan]: [bold cyan]{processed_count}[/bold cyan]")
         self.console.print(f"▪️ Dodano [bold green]{added_count}[/bold green] nowych węzłów menu")
         self.console.print(f"▪️ Zaktualizowano [bold cyan]{existed_count}[/bold cyan] istniejących węzłów")
+        self.console.print(f"▪️ Pominięto [bold cyan]{unchanged_count}[/bold cyan] węzłów bez zmian")
         self.console.print(f"▪️ Import nie powiódł się dla [bold red]{failed_count}[/bold red] węzłów")
         self.console.print(f"Całkowity czas wykonania operacji wyniósł [bold green]{total_elapsed_time:.2f}[/bold green] sekundy", style="cyan")
         self.console.print()
@@ -211,16 +407,16 @@ class ProductCategoriesImportHelper:
     def sort_categories_by_hierarchy(self, categories):
         return sorted(categories, key=lambda x: x['category_xpath'])
 
-    def load_category_cache(self, cache_file):
-        if (os.path.exists(cache_file)):
-            with open(cache_file, 'r') as file:
-                return json.load(file)
-        return {}
-
-    def save_category_cache(self, cache_file, category_cache):
-        #self.console.print(f"Zapisuję cache do: {cache_file}", style="green")
-        with open(cache_file, 'w') as file:
-            json.dump(category_cache, file, indent=4)  # Dodano indent=4 dla lepszej czytelności
-
     def normalize_filename(self, filename):
         return re.sub(r'[^\w\-_.]', '_', filename)
+
+    async def close(self):
+        try:
+            if self.owns_http_client:
+                await self.http_client.aclose()
+        finally:
+            # Powiązania zapisujemy nawet wtedy, gdy zamknięcie klienta HTTP się nie powiodło
+            if self.owns_state_store:
+                self.state_store.close()
+            else:
+                self.state_store.flush()
@@ -1,176 +1,210 @@
 # product_categories_processor.py
 
-import os
-import copy
-import json
-import httpx
+import asyncio
+from collections import ChainMap
 from typing import List, Dict, Any
+from rich.console import Console
 from .downloading_graphics_from_descriptions_helper import ImageProcessor
 
+# Pola kategorii WooCommerce faktycznie wykorzystywane przy przetwarzaniu, transformacji i imporcie.
+# Służą do budowy projekcji '_fields' w zapytaniach do API, dzięki czemu serwer nie wysyła m.in. 'yoast_head'.
+CATEGORY_SOURCE_FIELDS = (
+    "id", "name", "slug", "parent", "description", "display", "image", "menu_order", "count", "lang", "base",
+    "yoast_head_json.title", "yoast_head_json.description", "yoast_head_json.og_description", "yoast_head_json.robots"
+)
+
+def category_sort_key(category):
+    return int(category['id'])
+
+def category_overlay(category):
+    """
+    Tworzy lekki rekord przetwarzania: pola wyliczone zapisywane są w pierwszej warstwie (maps[0]),
+    a odczyt pozostałych pól trafia do współdzielonych, niemodyfikowanych danych źródłowych.
+    """
+    return ChainMap({}, category)
+
 class ProductCategoriesProcessingHelper:
-    def __init__(self, all_categories, woocommerce_api_domain, woocommerce_alias_product_category, config):
+    def __init__(self, all_categories, woocommerce_api_domain, woocommerce_alias_product_category, config, transport=None, changed_category_ids=None):
         self.all_categories = all_categories
         self.woocommerce_api_domain = woocommerce_api_domain
         self.woocommerce_alias_product_category = woocommerce_alias_product_category
         self.config = config
         self.all_categories_process = []
-        self.image_processor = ImageProcessor(config)
-        self.excluded_attributes = self.load_excluded_attributes()
+        self.orphan_category_ids = []
+        # W trybie przyrostowym grafiki i transformacja dotyczą tylko nowych i zmienionych kategorii;
+        # pozostałe są potrzebne wyłącznie do zbudowania ścieżek w drzewie
+        self.changed_category_ids = changed_category_ids
+        self.image_processor = ImageProcessor(config, transport)
+        self.console = Console()
 
     async def process_categories(self):
-        self.all_categories_process = copy.deepcopy(self.all_categories)
+        # Zamiast głębokiej kopii każda kategoria dostaje nakładkę na dane źródłowe - kopiowane są tylko pola wyliczone.
+        # Wykluczanie atrybutów odbywa się dopiero przy eksporcie (ProductCategoriesExportHelper)
+        self.all_categories_process = [category_overlay(category) for category in self.all_categories]
         self.all_categories_process = self.sort_and_group_by_hierarchy(self.all_categories_process)
+        self.include_descendants_of_changed(self.all_categories_process)
         await self.process_images_in_categories()
-        self.build_category_xpath(self.all_categories_process)
-        self.build_parent_names(self.all_categories_process)
-        self.build_parent_slugs(self.all_categories_process)
-        self.build_parent_xpath(self.all_categories_process)        
-        self.build_url_links(self.all_categories_process)
+        self.build_category_tree(self.all_categories_process)
         self.build_item_type(self.all_categories_process)
-        self.all_categories_process = [self.exclude_category_attributes(category) for category in self.all_categories_process]
         return self.all_categories_process
 
     async def process_images_in_categories(self):
-        async with httpx.AsyncClient() as client:
-            for category in self.all_categories_process:
-                if 'description' in category:
-                    category['description_with_img'] = await self.image_processor.process_images_in_description(
-                        category['description'], 
-                        client, 
-                        is_product=False
-                    )
-                    
-    def sort_and_group_by_hierarchy(self, categories):
-        categories_by_parent = {0: []}
-        for category in categories:
-            parent_id = category.get('parent', 0)
-            if parent_id not in categories_by_parent:
-                categories_by_parent[parent_id] = []
-            categories_by_parent[parent_id].append(category)
+        # Grafiki ze wszystkich opisów pobierane są razem, więc grafika wspólna dla wielu kategorii pobierana jest raz.
+        # Miniatury kategorii trafiają przez tę samą pulę zadań do tego samego magazynu grafik
+        changed_categories = [category for category in self.all_categories_process if self.is_changed(category)]
+        categories = [category for category in changed_categories if 'description' in category]
+        thumbnail_urls = [self.category_thumbnail_url(category) for category in changed_categories]
+
+        descriptions, thumbnail_paths = await asyncio.gather(
+            self.image_processor.process_images_in_descriptions(
+                [category['description'] for category in categories],
+                is_product=False
+            ),
+            self.image_processor.process_image_urls(thumbnail_urls, is_product=False)
+        )
+        for category, description_with_img in zip(categories, descriptions):
+            category['description_with_img'] = description_with_img
+        for category, thumbnail_url in zip(changed_categories, thumbnail_urls):
+            if thumbnail_paths.get(thumbnail_url):
+                category['category_image'] = thumbnail_paths[thumbnail_url]
+
+    @staticmethod
+    def category_thumbnail_url(category):
+        image = category.get('image') or {}
+        return image.get('src') or ''
 
-        def sort_categories_by_hierarchy(categories_by_parent):
-            sorted_list = []
-            parent_categories = sorted(categories_by_parent.get(0, []), key=lambda x: -int(x['id']))
-
-            def sort_children(parent_id, sorted_list):
-                if parent_id in categories_by_parent:
-                    children_sorted = sorted(categories_by_parent[parent_id], key=lambda x: int(x['id']))
-                    for child in children_sorted:
-                        sorted_list.append(child)
-                        sort_children(child['id'], sorted_list)
-
-            for parent in parent_categories:
-                sorted_list.append(parent)
-                sort_children(parent['id'], sorted_list)
-            return sorted_list
-
-        return sort_categories_by_hierarchy(categories_by_parent)
-
-    def build_category_xpath(self, all_categories):
+    def sort_and_group_by_hierarchy(self, categories):
         """
-        Buduje ścieżki XPath dla kategorii.
+        Układa kategorie w kolejności drzewa: każda kategoria główna (malejąco po id), a za nią
+        jej potomkowie w głąb (rodzeństwo rosnąco po id).
 
-        :param all_categories: Lista wszystkich kategorii.
-        """
-        items_by_id = {item['id']: item for item in all_categories}
+        Drzewo jest przechodzone iteracyjnie na stosie, a każda grupa rodzeństwa sortowana jest raz.
+        Kategorie, których rodzica nie ma na liście (np. wykluczonego w trybach 2 i 3), nie są gubione:
+        są zgłaszane i dołączane na końcu jako kategorie główne, razem ze swoimi potomkami.
 
-        for item in all_categories:
-            path_parts = []
-            current_item = item
-            while current_item:
-                path_parts.append(current_item['name'])
-                parent_id = current_item.get('parent')
-                current_item = items_by_id.get(parent_id) if parent_id else None
-
-            # Odwraca ścieżkę, aby zaczynała się od korzenia do liścia
-            item['category_xpath'] = '\\'.join(reversed(path_parts))        
-        
-    def build_parent_names(self, all_categories):
+        :param categories: Lista kategorii.
+        :return: Lista kategorii w kolejności hierarchii.
         """
-        Przypisuje nazwy rodziców do kategorii.
-
-        :param all_categories: Lista wszystkich kategorii.
+        category_ids = {category['id'] for category in categories}
+        categories_by_parent = {}
+        roots = []
+        orphans = []
+        for category in categories:
+            parent_id = category.get('parent', 0)
+            if not parent_id:
+                roots.append(category)
+            elif parent_id in category_ids:
+                categories_by_parent.setdefault(parent_id, []).append(category)
+            else:
+                orphans.append(category)
+
+        for children in categories_by_parent.values():
+            children.sort(key=category_sort_key)
+        roots.sort(key=category_sort_key, reverse=True)
+        orphans.sort(key=category_sort_key, reverse=True)
+
+        sorted_list = []
+        visited = set()
+
+        def append_subtree(root):
+            stack = [root]
+            while stack:
+                category = stack.pop()
+                if category['id'] in visited:
+                    continue
+                visited.add(category['id'])
+                sorted_list.append(category)
+                # Dzieci odkładane są od końca, aby zdejmować je ze stosu rosnąco po id
+                stack.extend(reversed(categories_by_parent.get(category['id'], ())))
+
+        for root in roots:
+            append_subtree(root)
+        for orphan in orphans:
+            append_subtree(orphan)
+
+        # Kategorie nieosiągalne z żadnego korzenia tworzą cykl w relacji rodzic-dziecko
+        unreachable = [category for category in categories if category['id'] not in visited]
+        for category in sorted(unreachable, key=category_sort_key, reverse=True):
+            if category['id'] not in visited:
+                orphans.append(category)
+                append_subtree(category)
+
+        self.orphan_category_ids = [category['id'] for category in orphans]
+        if orphans:
+            self.console.print(f"[bold yellow]Uwaga:[/bold yellow] {len(orphans)} kategorii nie ma rodzica na liście pobranych kategorii "
+                               f"i zostały dołączone jako kategorie główne: {', '.join(str(category_id) for category_id in self.orphan_category_ids)}", style="bold yellow")
+        return sorted_list
+
+    def build_category_tree(self, all_categories):
         """
-        # Tworzenie słownika z identyfikatorami kategorii jako kluczami i kategoriami jako wartościami
-        items_by_id = {item['id']: item for item in all_categories}
+        Buduje ścieżki kategorii w jednym przejściu drzewa od korzeni do liści.
 
-        for item in all_categories:
-            # Dodanie nazwy rodzica do głównej kategorii
-            parent_id = item.get('parent')
-            item['parent_name'] = items_by_id[parent_id]['name'] if parent_id in items_by_id else ''   
-        
-    def build_parent_slugs(self, all_categories):
-        """
-        Przypisuje pełne ścieżki slugów rodziców do kategorii.
+        Każda kategoria otrzymuje 'category_xpath', 'parent_name', 'parent_slug', 'parent_xpath' i 'link',
+        wyliczone z gotowych wartości rodzica. Drzewo jest przechodzone iteracyjnie (bez rekurencji),
+        więc koszt jest liniowy, a głębokość drzewa nie jest ograniczona limitem rekurencji.
+        Kategorie, których rodzica nie ma na liście, traktowane są jak kategorie główne.
 
         :param all_categories: Lista wszystkich kategorii.
         """
         items_by_id = {item['id']: item for item in all_categories}
-
-        def get_full_parent_slug(category):
-            """
-            Rekurencyjnie buduje pełną ścieżkę slugów od korzenia do rodzica danej kategorii.
-
-            :param category: Kategoria, dla której budowana jest ścieżka rodziców.
-            :return: Pełna ścieżka slugów rodziców.
-            """
-            parent_id = category.get('parent')
-            if not parent_id:
-                return ''
-            parent_category = items_by_id.get(parent_id)
-            parent_slug = get_full_parent_slug(parent_category)
-            return f"{parent_slug}/{parent_category['slug']}" if parent_slug else parent_category['slug']
-
+        children_by_parent = {}
+        roots = []
         for item in all_categories:
-            # Budowanie pełnej ścieżki slugów dla rodziców każdej kategorii
-            item['parent_slug'] = get_full_parent_slug(item)
-
-    def build_parent_xpath(self, all_categories):
+            parent_id = item.get('parent')
+            if parent_id and parent_id in items_by_id:
+                children_by_parent.setdefault(parent_id, []).append(item)
+            else:
+                roots.append(item)
+
+        visited = set()
+        stack = [(root, None) for root in roots]
+        pending = iter(all_categories)
+        while True:
+            if not stack:
+                # Kategorie nieosiągalne z korzeni (cykl w relacji rodzic-dziecko) - przerywamy cykl na pierwszej z nich
+                item = next((item for item in pending if item['id'] not in visited), None)
+                if item is None:
+                    break
+                stack.append((item, None))
+
+            item, parent = stack.pop()
+            if item['id'] in visited:
+                continue
+            visited.add(item['id'])
+
+            if parent is None:
+                item['category_xpath'] = item['name']
+                item['parent_name'] = ''
+                item['parent_slug'] = ''
+                item['parent_xpath'] = ''
+            else:
+                item['category_xpath'] = f"{parent['category_xpath']}\\{item['name']}"
+                item['parent_name'] = parent['name']
+                item['parent_slug'] = f"{parent['parent_slug']}/{parent['slug']}" if parent['parent_slug'] else parent['slug']
+                item['parent_xpath'] = parent['category_xpath']
+            item['link'] = self.build_url_link(item)
+
+            stack.extend((child, item) for child in children_by_parent.get(item['id'], ()))
+
+    def build_url_link(self, item):
         """
-        Buduje ścieżki XPath dla rodziców każdej kategorii.
+        Buduje pełny link URL kategorii.
 
-        :param all_categories: Lista wszystkich kategorii.
+        :param item: Kategoria z wyliczonym 'parent_slug'.
+        :return: Link URL kategorii.
         """
-        items_by_id = {item['id']: item for item in all_categories}
+        segments = [self.woocommerce_api_domain, self.woocommerce_alias_product_category]
+        parent_slug = item.get('parent_slug')
+        slug = item.get('slug')
 
-        def get_parent_xpath(category):
-            """
-            Rekurencyjnie buduje ścieżkę XPath od najwyższego poziomu rodzica do bezpośredniego rodzica danej kategorii.
+        # Dodawanie parent_slug i slug do URL, jeśli nie są puste
+        if parent_slug:
+            segments.append(parent_slug)
+        if slug:
+            segments.append(slug)
 
-            :param category: Kategoria, dla której budowana jest ścieżka rodziców.
-            :return: Ścieżka XPath rodziców.
-            """
-            parent_id = category.get('parent')
-            if not parent_id:
-                return ''
-            parent_category = items_by_id.get(parent_id)
-            parent_xpath = get_parent_xpath(parent_category)
-            return f"{parent_xpath}\\{parent_category['name']}" if parent_xpath else parent_category['name']
+        return f"https://{'/'.join(filter(None, segments))}"
 
-        for item in all_categories:
-            # Budowanie pełnej ścieżki XPath dla rodziców każdej kategorii
-            item['parent_xpath'] = get_parent_xpath(item)
-               
-    def build_url_links(self, all_categories):
-        """
-        Buduje pełne linki URL dla każdej kategorii.
-
-        :param all_categories: Lista wszystkich kategorii.
-        """
-        for item in all_categories:
-            segments = [self.woocommerce_api_domain, self.woocommerce_alias_product_category]
-            parent_slug = item.get('parent_slug')
-            slug = item.get('slug')
-
-            # Dodawanie parent_slug i slug do URL, jeśli nie są puste
-            if parent_slug:
-                segments.append(parent_slug)
-            if slug:
-                segments.append(slug)
-
-            # Budowanie pełnego URL na podstawie wcześniej zdefiniowanych elementów
-            item['link'] = f"https://{'/'.join(filter(None, segments))}"   
-            
     def build_item_type(self, all_categories):
         """
         Modyfikuje pole 'display' dla każdej kategorii na podstawie jej opisu.
@@ -187,89 +221,26 @@ class ProductCategoriesProcessingHelper:
             elif display in ['subcategories', 'both']:
                 category['display'] = 'navigation_with_rich_text' if description else 'navigation'            
           
-    def load_excluded_attributes(self):
-        """
-        Ładuje atrybuty wykluczone z pliku JSON.
+    def include_descendants_of_changed(self, sorted_categories):
         """
-        dir_path = os.getcwd()
-        excluded_attributes_path = os.path.join(dir_path, 'data', 'output', 'json', 'categories', 'exclude_category_attributes.json')
-       
-        try:
-            with open(excluded_attributes_path, 'r') as file:
-                excluded_attributes = json.load(file)
-            return excluded_attributes
-        except FileNotFoundError:
-            print(f"Plik {excluded_attributes_path} nie został znaleziony. Używam pustego słownika.")
-            return {}
-        except json.JSONDecodeError:
-            print(f"Plik {excluded_attributes_path} zawiera niepoprawny format JSON. Używam pustego słownika.")
-            return {}
-
-    def exclude_category_attributes(self, category_data):
+        Dołącza do zmienionych kategorii wszystkich potomków kategorii zmienionych: zmiana nazwy, sluga
+        lub położenia rodzica zmienia ich 'category_xpath', 'parent_slug' i 'link', choć same się nie zmieniły.
+
+        :param sorted_categories: Kategorie w kolejności hierarchii (rodzic przed dziećmi).
         """
-        Usuwa określone atrybuty z danych kategorii na podstawie zdefiniowanych reguł.
-        Ta funkcja przetwarza dane kategorii, usuwając niechciane atrybuty zgodnie z regułami
-        zdefiniowanymi w EXCLUDED_CATEGORIES_ATTRIBUTES. Obsługuje zarówno płaskie jak i zagnieżdżone struktury danych.
-        Args:
-            category_data (dict): Dane kategorii do przetworzenia.
-        Returns:
-            dict: Oczyszczone dane kategorii.
-        """          
-        if not hasattr(self, 'excluded_attributes') or not self.excluded_attributes:
-            print("Ostrzeżenie: excluded_attributes nie jest zdefiniowane lub jest puste.")
-            return category_data
-
-        def exclude_attributes(data, excluded_info):
-            """
-            Pomocnicza funkcja do usuwania atrybutów z listy lub słownika.
-            Args:
-                data (list or dict): Dane do przetworzenia.
-                excluded_info (dict or list): Informacje o atrybutach do usunięcia.
-            Returns:
-                list or dict: Oczyszczone dane.
-            """            
-       
-            if isinstance(data, list):
-                # Usuwanie elementów listy na podstawie indeksów
-                if 'delete_item_index' in excluded_info:
-                    indices_to_delete = excluded_info['delete_item_index']
-                    if isinstance(indices_to_delete, int):
-                        indices_to_delete = [indices_to_delete]
-                    remaining_items = [item for i, item in enumerate(data) if i not in indices_to_delete]
-                    # Usuwanie atrybutów z pozostałych elementów listy
-                    if 'exclude_attributes' in excluded_info:
-                        for item in remaining_items:
-                            for excluded_key in excluded_info['exclude_attributes']:
-                                item.pop(excluded_key, None)
-                    return remaining_items
-            elif isinstance(data, dict):
-                # Usuwanie atrybutów z obiektów słownikowych
-                if isinstance(excluded_info, list):  # Sprawdzenie, czy excluded_info to lista
-                    for excluded_key in excluded_info:
-                        data.pop(excluded_key, None)
-            return data
-
-        # Usuwanie ogólnych atrybutów
-        cleaned_category_data = {key: value for key, value in category_data.items() if key not in self.excluded_attributes.get('general', [])}
-       
-        # Usuwanie zagnieżdżonych atrybutów
-        for key, excluded_info in self.excluded_attributes.items():
-            if key != 'general':
-                key_parts = key.split('.')
-                sub_data = category_data
-                try:
-                    # Iteracja przez zagnieżdżone klucze, z wyjątkiem ostatniego
-                    for part in key_parts[:-1]:
-                        sub_data = sub_data[part]
-                    last_key = key_parts[-1]
-                    sub_data[last_key] = exclude_attributes(sub_data[last_key], excluded_info)
-                except (KeyError, IndexError):
-                    pass
-       
-        return cleaned_category_data
+        if self.changed_category_ids is None:
+            return
+        changed_ids = set(self.changed_category_ids)
+        for category in sorted_categories:
+            if category.get('parent') in changed_ids:
+                changed_ids.add(category['id'])
+        self.changed_category_ids = changed_ids
+
+    def is_changed(self, category):
+        return self.changed_category_ids is None or category.get('id') in self.changed_category_ids
 
     def transform_categories(self):
-        return [self.transform_category(category) for category in self.all_categories_process]
+        return [self.transform_category(category) for category in self.all_categories_process if self.is_changed(category)]
 
     def transform_category(self, category):
         """
@@ -279,8 +250,8 @@ class ProductCategoriesProcessingHelper:
         :param category: Słownik z danymi kategorii do przetworzenia.
         :return: Przekształcony słownik z nowymi nazwami atrybutów.
         """        
-        image = category.get("image") or {}
-        category_image = image.get("src") if image else ""
+        # Miniatura skopiowana do magazynu grafik ma pierwszeństwo przed adresem w WooCommerce
+        category_image = category.get("category_image") or self.category_thumbnail_url(category)
 
         category_seo_title = category.get("yoast_head_json", {}).get('title') or ''
         category_seo_description = category.get("yoast_head_json", {}).get('description') or category.get("yoast_head_json", {}).get('og_description', '') or ''
@@ -292,7 +263,8 @@ class ProductCategoriesProcessingHelper:
             "category_name": category.get("name"),
             "category_slug": category.get("slug"),
             "category_xpath": category.get("category_xpath"),            
-            "parent_id": category.get("parent"),
+            # Kategoria dołączona jako kategoria główna nie wskazuje na brakującego rodzica
+            "parent_id": 0 if category.get("id") in self.orphan_category_ids else category.get("parent"),
             "parent_name": category.get("parent_name"),
             "parent_slug": category.get("parent_slug"),
             "parent_xpath": category.get("parent_xpath"),            
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+
+from .config_helper import ConfigHelper
+from .json_storage_helper import load_json, atomic_write_json
+
+
+class CategoriesDelta:
+    """
+    Wynik porównania pobranych kategorii z migawką z poprzedniej synchronizacji.
+    """
+
+    def __init__(self, added=None, changed=None, unchanged=None, deleted=None):
+        self.added = added or []
+        self.changed = changed or []
+        self.unchanged = unchanged or []
+        self.deleted = deleted or []
+
+    @property
+    def changed_ids(self):
+        """
+        Identyfikatory kategorii, które trzeba przetworzyć i zaimportować (nowe oraz zmienione).
+        """
+        return set(self.added) | set(self.changed)
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.changed or self.deleted)
+
+
+class CategoriesSnapshotHelper:
+    """
+    Lokalna migawka kategorii WooCommerce z poprzedniej synchronizacji.
+
+    Przechowuje dane i skrót treści każdej kategorii oraz walidatory HTTP (ETag, Last-Modified)
+    i identyfikatory kategorii dla każdej strony odpowiedzi API. Pozwala to wysyłać zapytania
+    warunkowe i ustalić, które kategorie zostały dodane, zmienione lub usunięte.
+    """
+
+    SNAPSHOT_FILENAME = 'category_snapshot.json'
+
+    def __init__(self, config: ConfigHelper):
+        self.config = config
+        self.snapshot_path = os.path.join(config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, self.SNAPSHOT_FILENAME)
+        snapshot = load_json(self.snapshot_path, default={}) or {}
+        self.endpoint = snapshot.get('endpoint')
+        self.categories = snapshot.get('categories', {})
+        self.pages = snapshot.get('pages', {})
+
+    def is_available_for(self, endpoint):
+        """
+        Sprawdza, czy istnieje migawka wykonana dla tego samego endpointa (z tymi samymi filtrami).
+        """
+        return bool(self.categories) and self.endpoint == endpoint
+
+    @staticmethod
+    def compute_category_hash(category):
+        serialized = json.dumps(category, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    def conditional_headers(self, page):
+        """
+        Zwraca nagłówki zapytania warunkowego dla strony, jeśli serwer przesłał wcześniej walidatory.
+        """
+        page_meta = self.pages.get(str(page), {})
+        headers = {}
+        if page_meta.get('etag'):
+            headers['If-None-Match'] = page_meta['etag']
+        if page_meta.get('last_modified'):
+            headers['If-Modified-Since'] = page_meta['last_modified']
+        return headers
+
+    def page_categories(self, page):
+        """
+        Zwraca kategorie zapisane w migawce dla strony, która nie zmieniła się od ostatniej synchronizacji (304).
+        """
+        page_ids = self.pages.get(str(page), {}).get('ids', [])
+        return [self.categories[str(category_id)]['data'] for category_id in page_ids if str(category_id) in self.categories]
+
+    def diff(self, categories, listed_ids=None):
+        """
+        Porównuje pobrane kategorie z migawką.
+
+        Args:
+            categories (list): Aktualnie pobrane kategorie.
+            listed_ids (iterable, optional): Identyfikatory z lekkiej listy '_fields=id'. Kategorie z tej listy,
+                których treści nie udało się pobrać, są uzupełniane z migawki; kategorie spoza niej uznawane są za usunięte.
+
+        Returns:
+            tuple: (kompletna lista kategorii, CategoriesDelta)
+        """
+        delta = CategoriesDelta()
+        current = {str(category['id']): category for category in categories}
+        listed = {str(category_id) for category_id in listed_ids} if listed_ids is not None else set(current)
+
+        completed_categories = list(categories)
+        for category_id in sorted(listed - set(current), key=int):
+            if category_id in self.categories:
+                completed_categories.append(self.categories[category_id]['data'])
+                delta.unchanged.append(int(category_id))
+
+        for category_id, category in current.items():
+            previous = self.categories.get(category_id)
+            if previous is None:
+                delta.added.append(category['id'])
+            elif previous['hash'] != self.compute_category_hash(category):
+                delta.changed.append(category['id'])
+            else:
+                delta.unchanged.append(category['id'])
+
+        delta.deleted = sorted(int(category_id) for category_id in set(self.categories) - listed)
+        return completed_categories, delta
+
+    def save(self, endpoint, categories, pages):
+        """
+        Zapisuje migawkę atomowo.
+
+        Args:
+            endpoint (str): Endpoint, dla którego wykonano pobieranie.
+            categories (list): Kompletna lista kategorii.
+            pages (dict): Walidatory i identyfikatory kategorii dla kolejnych stron.
+        """
+        self.endpoint = endpoint
+        self.categories = {
+            str(category['id']): {"hash": self.compute_category_hash(category), "data": category}
+            for category in categories
+        }
+        self.pages = {str(page): meta for page, meta in pages.items()}
+        atomic_write_json(self.snapshot_path, {
+            "endpoint": self.endpoint,
+            "categories": self.categories,
+            "pages": self.pages
+        })
@@ -12,11 +12,17 @@ from rich.console import Console
 from rich.progress import Progress
 
 from .config_helper import ConfigHelper
+from .hierarchical_scheduler_helper import run_hierarchical_ready_queue
+from .migration_state_store_helper import MigrationStateStore
+from .json_storage_helper import payload_fingerprint
 from .language_conversion import convert_lang_codes
 
 class ProductNavigationsImport:
-    def __init__(self, config: ConfigHelper):
+    def __init__(self, config: ConfigHelper, http_client: httpx.AsyncClient = None, state_store: MigrationStateStore = None):
         self.config = config
+        # Klient HTTP z pulą połączeń do API IdoSell, wstrzykiwany ze wspólnej warstwy transportowej
+        self.owns_http_client = http_client is None
+        self.http_client = http_client if http_client is not None else httpx.AsyncClient(timeout=httpx.Timeout(config.HTTP_TIMEOUT))
         self.idosell_api_key = config.IDOSELL_API_KEY
         self.idosell_api_menu_gate_url = config.IDOSELL_API_MENU_GATE_URL
         self.output_data_folder_for_categories = config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES
@@ -24,15 +30,22 @@ class ProductNavigationsImport:
         self.output_logs_folder_for_menu = config.OUTPUT_LOGS_FOLDER_FOR_MENU
         self.supported_languages = config.SUPPORTED_LANGUAGES
         self.console = Console()
-
-    async def import_categories_into_idosell_as_navigation_menu_in_shop(self, all_categories_transformed):
+        # Powiązania ścieżek kategorii z identyfikatorami pozycji menu w IdoSell (baza stanu migracji)
+        self.owns_state_store = state_store is None
+        self.state_store = state_store if state_store is not None else MigrationStateStore(config)
+        # Drzewo menu pobrane z IdoSell (wczytywane przy pierwszym konflikcie) i blokady tworzenia brakujących rodziców
+        self.menu_cache = None
+        self.menu_tree_lock = asyncio.Lock()
+        self.parent_locks = {}
+
+    async def import_categories_into_idosell_as_navigation_menu_in_shop(self, all_categories_transformed, incremental=False):
         if not all_categories_transformed:
             # Szukamy najnowszego pliku z transformowanymi kategoriami
             pattern = os.path.join(self.output_data_folder_for_categories, 'woocommerce_all_categories_transformed_*.json')
             files = glob.glob(pattern)
             if not files:
                 self.console.print("[bold red]Nie znaleziono pliku z transformowanymi kategoriami.[/bold red]")
-                return
+                return False
 
         sorted_categories = self.sort_categories_by_hierarchy(all_categories_transformed)
 
@@ -45,9 +58,14 @@ class ProductNavigationsImport:
         self.console.print()
 
         category_mapping = {"0": 0}
-        added_count = existed_count = failed_count = error_count = processed_count = 0
-        total_elapsed_time = 0
-
+        menu_cache = self.state_store.mapping('menu')
+        if incremental:
+            # Import przyrostowy obejmuje tylko zmienione kategorie, więc identyfikatory rodziców bierzemy z cache poprzednich importów
+            category_mapping.update({item_textid: entry['id'] for item_textid, entry in menu_cache.items() if isinstance(entry, dict) and 'id' in entry})
+        added_count = existed_count = unchanged_count = failed_count = error_count = processed_count = 0
+        start_time = time.time()
+
+        importable_categories = []
         for category in sorted_categories:
             category_xpath = category.get('category_xpath', 'Unknown')
             path_levels = category_xpath.split('\\')
@@ -56,22 +74,30 @@ class ProductNavigationsImport:
                 self.console.print(f"[bold red]▣[/bold red] Kategoria o ścieżce [cyan]\"{category_xpath}\"[/cyan] przekracza dozwoloną liczbę 8 poziomów. Kategoria nie zostanie zaimportowana.", style="bold red")
                 failed_count += 1
                 continue
-
-            start_time = time.time()
-            
-            status_message = f"[bold cyan]Importowanie menu [bold blue]\"{category_xpath}\"[/bold blue][/bold cyan]"
-            with self.console.status(status_message, spinner="dots6", spinner_style="bold cyan", speed=1.0):
-                response_text, added, existed, failed, processed = await self.add_batch_of_menu([category], category_mapping, shop_id, menu_id, lang_id, 'hierarchy')
-                
-                end_time = time.time()
-                elapsed_time = end_time - start_time
-                total_elapsed_time += elapsed_time
+            importable_categories.append(category)
+
+        with self.console.status("[bold cyan]Importowanie menu...[/bold cyan]", spinner="dots6", spinner_style="bold cyan", speed=1.0) as status:
+            async def import_menu_item(batch):
+                nonlocal added_count, existed_count, unchanged_count, failed_count, error_count, processed_count
+                category_xpath = batch[0].get('category_xpath', 'Unknown')
+                item_start_time = time.time()
+                # Identyfikator pozycji w mapowaniu oznacza udany import - dawne powiązanie (import przyrostowy)
+                # usuwamy, aby pozycja, której nie udało się zaimportować, nie przepuściła swoich dzieci
+                for category in batch:
+                    category_mapping.pop(category['category_xpath'], None)
+                response_text, added, existed, failed, processed, unchanged = await self.add_batch_of_menu(batch, category_mapping, shop_id, menu_id, lang_id, 'hierarchy', menu_cache)
+                elapsed_time = time.time() - item_start_time
 
                 added_count += added
                 existed_count += existed
+                unchanged_count += unchanged
                 failed_count += failed
                 processed_count += processed
+                status.update(f"[bold cyan]Importowanie menu: [bold blue]{processed_count}/{len(importable_categories)}[/bold blue][/bold cyan]")
 
+                failed_items = [category for category in batch if category['category_xpath'] not in category_mapping]
+                if unchanged:
+                    return [], failed_items
                 if response_text:
                     error_count += 1
                     self.console.print(
@@ -85,64 +111,103 @@ class ProductNavigationsImport:
                         f"Zaimportowano menu o ścieżce: [bold blue]\"{category_xpath}\"[/bold blue] (czas: [bold blue]{elapsed_time:.2f}[/bold blue] sekund).",
                         style="green"
                     )
-
-        self.print_import_summary(processed_count, added_count, existed_count, failed_count, total_elapsed_time)
-    
-    async def add_batch_of_menu(self, categories, category_mapping, shop_id, menu_id, custom_lang_id, batch_type):
-        added_count = existed_count = failed_count = processed_count = 0
+                return [], failed_items
+
+            def skip_subtree(category, descendants):
+                nonlocal failed_count
+                failed_count += len(descendants)
+                self.console.print(f"[bold red]✦[/bold red] Pominięto {len(descendants)} pozycji menu pod ścieżką [bold red]\"{category['category_xpath']}\"[/bold red], której nie udało się zaimportować.", style="white")
+
+            # Węzeł menu trafia do API, gdy tylko jego rodzic ma już identyfikator w IdoSell
+            await run_hierarchical_ready_queue(
+                importable_categories,
+                node_key=lambda category: category['category_xpath'],
+                parent_key=lambda category: '\\'.join(category['category_xpath'].split('\\')[:-1]),
+                worker=import_menu_item,
+                concurrency=self.config.IDOSELL_IMPORT_CONCURRENCY,
+                on_skipped=skip_subtree
+            )
+
+        total_elapsed_time = time.time() - start_time
+        self.state_store.flush()
+        self.print_import_summary(processed_count, added_count, existed_count, failed_count, total_elapsed_time, unchanged_count)
+        # Import uznajemy za udany, gdy żadna pozycja menu nie została odrzucona
+        return failed_count == 0 and error_count == 0
+
+    async def add_batch_of_menu(self, categories, category_mapping, shop_id, menu_id, custom_lang_id, batch_type, menu_cache=None):
+        added_count = existed_count = failed_count = processed_count = unchanged_count = 0
         error_text = None
-        cache_file = os.path.join(self.output_data_folder_for_menu, 'menu_cache.json')
-        menu_cache = self.load_menu_cache(cache_file)
+        if menu_cache is None:
+            menu_cache = self.state_store.mapping('menu')
 
-        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
-            for category in categories:
-                path_levels = category['category_xpath'].split('\\')
-                if len(path_levels) > 8:
-                    self.console.print(
-                        f"[bold red]▣[/bold red] Kategoria o ścieżce [cyan]{category['category_xpath']}[/cyan] przekracza dozwoloną liczbę 8 poziomów. Kategoria nie zostanie zaimportowana.",
-                        style="bold red"
-                    )
+        client = self.http_client
+        for category in categories:
+            path_levels = category['category_xpath'].split('\\')
+            if len(path_levels) > 8:
+                self.console.print(
+                    f"[bold red]▣[/bold red] Kategoria o ścieżce [cyan]{category['category_xpath']}[/cyan] przekracza dozwoloną liczbę 8 poziomów. Kategoria nie zostanie zaimportowana.",
+                    style="bold red"
+                )
+                failed_count += 1
+                continue
+
+            parent_xpath = '\\'.join(category['category_xpath'].split('\\')[:-1])
+            if category_mapping.get(parent_xpath, "0") == "0" and parent_xpath:
+                # Równolegle importowane rodzeństwo mogłoby utworzyć brakującego rodzica kilka razy
+                async with self.parent_locks.setdefault(parent_xpath, asyncio.Lock()):
+                    if category_mapping.get(parent_xpath, "0") == "0":
+                        success, new_parent_id = await self.add_single_category({"category_xpath": parent_xpath}, shop_id, menu_id, custom_lang_id, category_mapping)
+                        if success:
+                            category_mapping[parent_xpath] = new_parent_id
+                if category_mapping.get(parent_xpath, "0") == "0":
                     failed_count += 1
                     continue
 
-                parent_xpath = '\\'.join(category['category_xpath'].split('\\')[:-1])
-                if category_mapping.get(parent_xpath, "0") == "0" and parent_xpath:
-                    success, new_parent_id = await self.add_single_category({"category_xpath": parent_xpath}, shop_id, menu_id, custom_lang_id, category_mapping)
-                    if success:
-                        category_mapping[parent_xpath] = new_parent_id
-                    else:
-                        failed_count += 1
-                        continue
-
-                payload = self.prepare_menu_payload(category, category_mapping, shop_id, menu_id, custom_lang_id)
-                headers = {
-                    "accept": "application/json",
-                    "content-type": "application/json",
-                    "X-API-KEY": self.idosell_api_key
-                }
+            payload = self.prepare_menu_payload(category, category_mapping, shop_id, menu_id, custom_lang_id)
+            fingerprint = payload_fingerprint(payload)
+            cache_entry = menu_cache.get(category['category_xpath'])
+            if cache_entry and cache_entry.get('fingerprint') == fingerprint and cache_entry.get('id'):
+                # Dane pozycji menu nie zmieniły się od ostatniego udanego importu - nie wysyłamy ich ponownie
+                category_mapping[category['category_xpath']] = cache_entry['id']
+                unchanged_count += 1
+                processed_count += 1
+                continue
+
+            headers = {
+                "accept": "application/json",
+                "content-type": "application/json",
+                "X-API-KEY": self.idosell_api_key
+            }
 
+            try:
                 response = await client.post(self.idosell_api_menu_gate_url, json=payload, headers=headers)
-                if response.status_code == 200:
-                    response_data = response.json()
-                    added, existed, failed = await self.process_api_response(response_data, category, category_mapping, menu_cache, client, shop_id, menu_id, custom_lang_id, headers)
-                    added_count += added
-                    existed_count += existed
-                    failed_count += failed
-                    processed_count += 1
-                else:
-                    error_text = response.text
-                    # self.console.print(
-                    #     f"✦ "
-                    #     #f"Błąd przy dodawaniu kategorii menu: {error_text}",
-                    #     f"Import menu o ścieżce [bold red]{category['category_xpath']}[/bold red] nie powiódł się.",
-                    #     style="bold red"
-                    # )
-                    failed_count += 1
+                response_data = response.json() if response.status_code == 200 else None
+            except (httpx.HTTPError, ValueError) as e:
+                # Błąd połączenia lub odpowiedź, która nie jest JSON-em - pozycja jest nieudana, a jej poddrzewo pominięte
+                error_text = str(e) or type(e).__name__
+                self.console.print(f"Błąd przy dodawaniu menu {category['category_xpath']}: {error_text}", style="bold red")
+                failed_count += 1
+                continue
 
-                self.log_api_interaction(category, payload, headers, response)
+            if response.status_code == 200:
+                added, existed, failed = await self.process_api_response(response_data, category, category_mapping, menu_cache, client, shop_id, menu_id, custom_lang_id, headers, fingerprint)
+                added_count += added
+                existed_count += existed
+                failed_count += failed
+                processed_count += 1
+            else:
+                error_text = response.text
+                # self.console.print(
+                #     f"✦ "
+                #     #f"Błąd przy dodawaniu kategorii menu: {error_text}",
+                #     f"Import menu o ścieżce [bold red]{category['category_xpath']}[/bold red] nie powiódł się.",
+                #     style="bold red"
+                # )
+                failed_count += 1
 
-        self.save_menu_cache(cache_file, menu_cache)
-        return error_text, added_count, existed_count, failed_count, processed_count
+            self.log_api_interaction(category, payload, headers, response)
+
+        return error_text, added_count, existed_count, failed_count, processed_count, unchanged_count
 
     def prepare_menu_payload(self, category, category_mapping, shop_id, menu_id, custom_lang_id):
         category_xpath = category['category_xpath']
@@ -178,7 +243,7 @@ class ProductNavigationsImport:
             }]
         }
 
-    async def process_api_response(self, response_data, category, category_mapping, menu_cache, client, shop_id, menu_id, custom_lang_id, headers):
+    async def process_api_response(self, response_data, category, category_mapping, menu_cache, client, shop_id, menu_id, custom_lang_id, headers, fingerprint=None):
         added = existed = failed = 0
         for api_category in response_data.get('result', []):
             item_textid = api_category.get('item_textid')
@@ -191,7 +256,8 @@ class ProductNavigationsImport:
                     "category_name": category['category_name'],
                     "category_xpath": category['category_xpath'],
                     "id": api_category.get('item_id'),
-                    "parent_id": api_category.get('parent_id')
+                    "parent_id": api_category.get('parent_id'),
+                    "fingerprint": fingerprint
                 }
                 
                 category_xpath = category.get('category_xpath', '')
@@ -211,7 +277,15 @@ class ProductNavigationsImport:
                 existing_menu_id = await self.extract_menu_id_from_error(item_textid, shop_id, menu_id, custom_lang_id)
                 if existing_menu_id is not None:
                     category_mapping[item_textid] = existing_menu_id
-                    await self.update_existing_menu(category, shop_id, menu_id, custom_lang_id, existing_menu_id, client, headers)
+                    updated = await self.update_existing_menu(category, shop_id, menu_id, custom_lang_id, existing_menu_id, client, headers)
+                    if updated:
+                        menu_cache[item_textid] = {
+                            "category_name": category['category_name'],
+                            "category_xpath": category['category_xpath'],
+                            "id": existing_menu_id,
+                            "parent_id": api_category.get('parent_id'),
+                            "fingerprint": fingerprint
+                        }
             else:
                 self.console.print(f"Błąd przy dodawaniu menu {item_textid}: Nieznany kod błędu {fault_code}", style="bold red")
                 failed += 1
@@ -219,15 +293,21 @@ class ProductNavigationsImport:
 
     async def update_existing_menu(self, category, shop_id, menu_id, custom_lang_id, existing_menu_id, client, headers):
         update_payload = self.prepare_menu_payload(category, {category['category_xpath']: existing_menu_id}, shop_id, menu_id, custom_lang_id)
-        update_response = await client.put(self.idosell_api_menu_gate_url, json=update_payload, headers=headers)
-        
+        try:
+            update_response = await client.put(self.idosell_api_menu_gate_url, json=update_payload, headers=headers)
+        except httpx.HTTPError as e:
+            self.console.print(f"Błąd przy aktualizacji kategorii: {e}", style="bold red")
+            return False
+
         timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
         self.log_api_interaction(category, update_payload, headers, update_response, timestamp, is_update=True)
 
         if update_response.status_code != 200:
             self.console.print(f"Błąd przy aktualizacji kategorii: {update_response.text}", style="bold red")
+            return False
+        return True
 
-    def log_api_interaction(self, category, payload, headers, response):
+    def log_api_interaction(self, category, payload, headers, response, timestamp=None, is_update=False):
         log_data = {
             "request": {
                 "url": self.idosell_api_menu_gate_url,
@@ -240,19 +320,21 @@ class ProductNavigationsImport:
             }
         }
         
-        timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-        log_filename = f'menu_api_log_{self.normalize_filename(category["category_name"])}_{category["category_id"]}.json'
+        timestamp = timestamp or datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+        log_prefix = 'menu_api_update_log' if is_update else 'menu_api_log'
+        log_filename = f'{log_prefix}_{self.normalize_filename(category["category_name"])}_{category["category_id"]}.json'
         log_filepath = os.path.join(self.output_logs_folder_for_menu, log_filename)
         os.makedirs(os.path.dirname(log_filepath), exist_ok=True)
         
         with open(log_filepath, 'w', encoding='utf-8') as file:
             json.dump(log_data, file, indent=4, ensure_ascii=False)
         
-    def print_import_summary(self, processed_count, total_added, total_existed, failure_count, total_elapsed_time):
+    def print_import_summary(self, processed_count, total_added, total_existed, failure_count, total_elapsed_time, unchanged_count=0):
         self.console.print("\nPodsumowanie importu:", style="cyan")
         self.console.print(f"▪️ Liczba wszystkich przetworzonych węzłów: [bold cyan]{processed_count}[/bold cyan]")
         self.console.print(f"▪️ Dodano [bold green]{total_added}[/bold green] nowych węzłów menu")
         self.console.print(f"▪️ Zaktualizowano [bold cyan]{total_existed}[/bold cyan] istniejących węzłów")
+        self.console.print(f"▪️ Pominięto [bold cyan]{unchanged_count}[/bold cyan] węzłów bez zmian")
         self.console.print(f"▪️ Import nie powiódł się dla [bold red]{failure_count}[/bold red] węzłów")
         self.console.print(f"Całkowity czas wykonania operacji wyniósł [bold green]{total_elapsed_time:.2f}[/bold green] sekundy", style="cyan")
 
@@ -274,19 +356,20 @@ class ProductNavigationsImport:
                     yield from flatten_tree(subtree)
         return list(flatten_tree(tree))
       
-    def load_menu_cache(self, cache_file):
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as file:
-                return json.load(file)
-        return {}
-
-    def save_menu_cache(self, cache_file, menu_cache):
-        with open(cache_file, 'w') as file:
-            json.dump(menu_cache, file, indent=4)
-            
     def normalize_filename(self, filename):
         return re.sub(r'[^\w\-_.]', '_', filename)
 
+    async def close(self):
+        try:
+            if self.owns_http_client:
+                await self.http_client.aclose()
+        finally:
+            # Powiązania zapisujemy nawet wtedy, gdy zamknięcie klienta HTTP się nie powiodło
+            if self.owns_state_store:
+                self.state_store.close()
+            else:
+                self.state_store.flush()
+
     async def add_single_category(self, category_data, shop_id, menu_id, custom_lang_id, category_mapping):
         category_path_elements = category_data['category_xpath'].split('\\')
         parent_xpath = '\\'.join(category_path_elements[:-1])
@@ -337,58 +420,64 @@ class ProductNavigationsImport:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.idosell_api_menu_gate_url, json=payload, headers=headers)
-                if response.status_code == 200:
-                    response_data = response.json()
-                    if response_data['result'][0].get('faultCode') == 0:
-                        new_category_id = response_data['result'][0].get('item_id')
-                        return True, new_category_id
-                    elif response_data['result'][0].get('faultCode') == 6:
-                        existing_category_id = await self.extract_menu_id_from_error(category_data['category_xpath'], shop_id, menu_id, custom_lang_id)
-                        if existing_category_id:
-                            category_mapping[category_data['category_xpath']] = existing_category_id
-                            return True, existing_category_id
-                        else:
-                            return False, None
+            client = self.http_client
+            response = await client.post(self.idosell_api_menu_gate_url, json=payload, headers=headers)
+            if response.status_code == 200:
+                response_data = response.json()
+                if response_data['result'][0].get('faultCode') == 0:
+                    new_category_id = response_data['result'][0].get('item_id')
+                    return True, new_category_id
+                elif response_data['result'][0].get('faultCode') == 6:
+                    existing_category_id = await self.extract_menu_id_from_error(category_data['category_xpath'], shop_id, menu_id, custom_lang_id)
+                    if existing_category_id:
+                        category_mapping[category_data['category_xpath']] = existing_category_id
+                        return True, existing_category_id
                     else:
-                        #self.console.print(f"Błąd podczas dodawania kategorii: {response_data.get('error_message', 'Brak szczegółów błędu')}", style="bold red")
                         return False, None
                 else:
-                    #self.console.print(f"Błąd podczas dodawania kategorii: {response.text}", style="bold red")
+                    #self.console.print(f"Błąd podczas dodawania kategorii: {response_data.get('error_message', 'Brak szczegółów błędu')}", style="bold red")
                     return False, None
+            else:
+                #self.console.print(f"Błąd podczas dodawania kategorii: {response.text}", style="bold red")
+                return False, None
         except Exception as e:
             self.console.print(f"Wystąpił wyjątek: {e}", style="bold red")
             return False, None
 
     async def extract_menu_id_from_error(self, item_textid, shop_id, menu_id, custom_lang_id):
             # Sprawdzenie, czy drzewo menu jest już w cache'u
-            if self.menu_cache is None:
-                params = {
-                    "shop_id": shop_id,
-                    "menu_id": menu_id,
-                    "lang_id": custom_lang_id
-                }
-                headers = {
-                    "accept": "application/json",
-                    "content-type": "application/json",
-                    "X-API-KEY": self.idosell_api_key
-                }
-
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(self.idosell_api_menu_gate_url, params=params, headers=headers)
+            # Równolegle importowane węzły menu pobierają drzewo tylko raz
+            async with self.menu_tree_lock:
+                if self.menu_cache is None:
+                    params = {
+                        "shop_id": shop_id,
+                        "menu_id": menu_id,
+                        "lang_id": custom_lang_id
+                    }
+                    headers = {
+                        "accept": "application/json",
+                        "content-type": "application/json",
+                        "X-API-KEY": self.idosell_api_key
+                    }
+
+                    client = self.http_client
+                    try:
+                        response = await client.get(self.idosell_api_menu_gate_url, params=params, headers=headers)
+                    except httpx.HTTPError as e:
+                        self.console.print(f"Błąd przy pobieraniu drzewa menu: {e}", style="bold red")
+                        return None
 
                     if response.status_code == 200:
                         try:
                             data = response.json()
                             self.menu_cache = data  # Zapisanie danych do cache'a
-                            
+                        
                             # Zapisz cache do pliku JSON
                             dir_path = os.getcwd()
-                            file_path = os.path.join(self.output_data_folder_for_menu, 'menu_cache.json')
+                            file_path = os.path.join(self.output_data_folder_for_menu, 'menu_tree.json')
                             with open(file_path, 'w', encoding='utf-8') as file:
                                 json.dump(self.menu_cache, file, ensure_ascii=False, indent=4)                        
-                            
+                        
                         except ValueError:
                             print("Odpowiedź nie jest prawidłowym JSONem. Oto surowa odpowiedź:")
                             print(response.text)
@@ -397,7 +486,7 @@ class ProductNavigationsImport:
                         print(response.text)
 
             # Użycie danych z cache'a do wyszukania ID
-            for item in self.menu_cache.get('result', []):
+            for item in (self.menu_cache or {}).get('result', []):
                 for lang_item in item.get('lang_data', []):
                     if lang_item.get('item_textid') == item_textid:
                         return item.get('item_id')
@@ -0,0 +1,81 @@
+import random
+
+import httpx
+from tenacity import retry_if_exception
+from tenacity.wait import wait_base
+
+# Najdłuższe honorowane 'Retry-After' (w sekundach). Przy dłuższym wstrzymaniu nie czekamy,
+# tylko od razu zgłaszamy błąd 429/503 - inaczej jedna odpowiedź mogłaby wstrzymać migrację na wiele godzin
+MAX_RETRY_AFTER = 120.0
+
+
+class HttpResponseError(Exception):
+    """
+    Odpowiedź API z kodem statusu innym niż oczekiwany.
+    """
+
+    def __init__(self, status_code, message="", retry_after=None):
+        super().__init__(f"Status {status_code}: {message}" if message else f"Status {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class RetryableHttpError(HttpResponseError):
+    """
+    Odpowiedź 429 lub 5xx, po której warto ponowić zapytanie (z uwzględnieniem 'Retry-After').
+    """
+
+
+def raise_for_retryable_status(response, retry_after=None):
+    """
+    Zgłasza RetryableHttpError dla odpowiedzi 429/5xx oraz HttpResponseError dla pozostałych kodów spoza 2xx.
+
+    Args:
+        response (httpx.Response): Odpowiedź serwera.
+        retry_after (float, optional): Odczytana wartość nagłówka 'Retry-After' w sekundach.
+    """
+    status_code = response.status_code
+    if 200 <= status_code < 300:
+        return
+    if status_code == 429 or status_code >= 500:
+        raise RetryableHttpError(status_code, response.text, retry_after=retry_after)
+    raise HttpResponseError(status_code, response.text)
+
+
+# Błędy, po których ponawiamy pojedyncze zapytanie: przekroczenia czasu, zerwane połączenia oraz 429/5xx
+RETRYABLE_EXCEPTIONS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError, RetryableHttpError)
+
+
+def is_retryable_error(exception):
+    if not isinstance(exception, RETRYABLE_EXCEPTIONS):
+        return False
+    retry_after = getattr(exception, "retry_after", None)
+    return not retry_after or retry_after <= MAX_RETRY_AFTER
+
+
+retry_if_retryable_error = retry_if_exception(is_retryable_error)
+
+
+class wait_decorrelated_jitter(wait_base):
+    """
+    Strategia oczekiwania tenacity: wykładnicze opóźnienie z "decorrelated jitter".
+
+    Kolejne opóźnienie losowane jest z przedziału [base, poprzednie * 3] i ograniczane do cap,
+    co rozprasza ponowienia wielu równoległych zapytań w czasie. Jeżeli serwer przesłał
+    'Retry-After', czekamy co najmniej tyle, ile wskazał (najwyżej max_retry_after).
+    """
+
+    def __init__(self, base=1.0, cap=30.0, max_retry_after=MAX_RETRY_AFTER):
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+
+    def __call__(self, retry_state):
+        previous_sleep = retry_state.upcoming_sleep or self.base
+        sleep = min(self.cap, random.uniform(self.base, previous_sleep * 3))
+
+        exception = retry_state.outcome.exception() if retry_state.outcome is not None else None
+        retry_after = getattr(exception, "retry_after", None)
+        if retry_after:
+            sleep = max(sleep, min(retry_after, self.max_retry_after))
+        return sleep
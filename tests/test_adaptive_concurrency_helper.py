@@ -0,0 +1,117 @@
+# tests/test_adaptive_concurrency_helper.py
+import unittest
+import os
+import sys
+import asyncio
+from unittest.mock import MagicMock
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.adaptive_concurrency_helper import AdaptiveConcurrencyLimiter, AdaptiveBatchSizer, parse_retry_after, run_sliding_window
+from src.modules.retry_helper import MAX_RETRY_AFTER, RetryableHttpError, is_retryable_error, wait_decorrelated_jitter
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    def test_additive_increase(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+        for _ in range(2):
+            limiter.record_success(0.1)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_multiplicative_decrease_on_throttle(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=10)
+        limiter.record_response(429, 0.1, retry_after="2")
+        self.assertEqual(limiter.limit, 4)
+        self.assertGreater(limiter.pause_remaining(), 1.0)
+
+    def test_decrease_on_rising_latency(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=10)
+        limiter.record_success(0.1)
+        for _ in range(5):
+            limiter.record_success(1.0)
+        self.assertLess(limiter.limit, 8)
+
+    def test_tylko_2xx_3xx_zwiekszaja_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+        for _ in range(4):
+            limiter.record_response(404, 0.1)
+        self.assertEqual(limiter.limit, 2)
+        for _ in range(2):
+            limiter.record_response(304, 0.1)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_opoznienie_bazowe_z_ostatniego_okna(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=50, window_size=5)
+        # Jedna wyjątkowo szybka odpowiedź nie zaniża opóźnienia bazowego na stałe
+        limiter.record_success(0.001)
+        for _ in range(5):
+            limiter.record_success(0.5)
+        self.assertEqual(limiter._baseline_latency, 0.5)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_wstrzymanie_ograniczone_do_max_pause(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=10, max_pause=5)
+        limiter.record_response(503, 0.1, retry_after="86400")
+        self.assertLessEqual(limiter.pause_remaining(), 5)
+
+    def test_retry_after_ograniczony_i_zbyt_dlugi_bez_ponowien(self):
+        class RetryState:
+            upcoming_sleep = 0
+            def __init__(self, exception):
+                self.outcome = MagicMock(exception=lambda: exception)
+
+        wait = wait_decorrelated_jitter(base=1, cap=30, max_retry_after=60)
+        self.assertEqual(wait(RetryState(RetryableHttpError(429, retry_after=50))), 50)
+        self.assertEqual(wait(RetryState(RetryableHttpError(429, retry_after=3600))), 60)
+        # Powyżej limitu nie czekamy, tylko od razu zgłaszamy błąd 429/503
+        self.assertTrue(is_retryable_error(RetryableHttpError(503, retry_after=MAX_RETRY_AFTER)))
+        self.assertFalse(is_retryable_error(RetryableHttpError(503, retry_after=MAX_RETRY_AFTER + 1)))
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+    def test_limit_rozmiaru_tresci(self):
+        sizer = AdaptiveBatchSizer(initial_size=10, max_payload_bytes=100)
+        self.assertEqual(sizer.take([30] * 10), 3)
+        # Pojedynczy element większy od limitu i tak jest wysyłany
+        self.assertEqual(sizer.take([500, 10]), 1)
+        self.assertEqual(sizer.take([]), 0)
+
+    def test_dostosowanie_do_czasu_odpowiedzi(self):
+        sizer = AdaptiveBatchSizer(initial_size=20, max_size=40, target_latency=1.0, increase_step=10)
+        sizer.record_success(0.2, 20)
+        self.assertEqual(sizer.size, 30)
+        # Niepełna paczka nie zwiększa rozmiaru
+        sizer.record_success(0.2, 5)
+        self.assertEqual(sizer.size, 30)
+        sizer.record_success(2.0, 30)
+        self.assertEqual(sizer.size, 15)
+        sizer.record_failure(4)
+        self.assertEqual(sizer.size, 2)
+
+class TestRunSlidingWindow(unittest.TestCase):
+    def test_keeps_limit_in_flight(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def worker(item):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001 * (item % 3))
+            in_flight -= 1
+            if item == 4:
+                raise ValueError("błąd strony")
+            return item * 10
+
+        results = asyncio.run(run_sliding_window(range(10), worker, limiter))
+        self.assertEqual(max_in_flight, 3)
+        self.assertEqual(results[9], 90)
+        self.assertIsInstance(results[4], ValueError)
+
+if __name__ == '__main__':
+    unittest.main()
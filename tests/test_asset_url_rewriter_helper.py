@@ -0,0 +1,42 @@
+# tests/test_asset_url_rewriter_helper.py
+import unittest
+import os
+import sys
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.asset_url_rewriter_helper import AssetUrlRewriter
+
+HTML = (
+    '<div style="background-image: url(\'/bg.jpg\')">'
+    '<img src="a.jpg" data-src=\'b.jpg\' srcset="a-300x200.jpg 300w, a.jpg 1024w" alt="src=a.jpg">'
+    '<picture><source srcset="c.webp"></picture>'
+    '<script src="app.js"></script>'
+    '<img src="data:image/gif;base64,R0lGOD">'
+    '</div>'
+)
+
+class TestAssetUrlRewriter(unittest.TestCase):
+    def setUp(self):
+        self.rewriter = AssetUrlRewriter()
+
+    def test_find(self):
+        self.assertEqual(
+            self.rewriter.find(HTML),
+            ['/bg.jpg', 'a.jpg', 'b.jpg', 'a-300x200.jpg', 'a.jpg', 'c.webp']
+        )
+
+    def test_rewrite(self):
+        replacements = {'/bg.jpg': '/n/bg.jpg', 'a.jpg': '/n/a.jpg', 'a-300x200.jpg': '/n/a-300x200.jpg', 'c.webp': '/n/c.webp'}
+        rewritten = self.rewriter.rewrite(HTML, replacements)
+
+        self.assertIn('style="background-image: url(\'/n/bg.jpg\')"', rewritten)
+        self.assertIn('<img src="/n/a.jpg" data-src=\'b.jpg\' srcset="/n/a-300x200.jpg 300w, /n/a.jpg 1024w" alt="src=a.jpg">', rewritten)
+        self.assertIn('<source srcset="/n/c.webp">', rewritten)
+        # Adresy spoza grafik i spoza mapy zamian pozostają bez zmian
+        self.assertIn('<script src="app.js">', rewritten)
+        self.assertIn('src="data:image/gif;base64,R0lGOD"', rewritten)
+
+if __name__ == '__main__':
+    unittest.main()
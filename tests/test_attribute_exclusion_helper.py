@@ -0,0 +1,91 @@
+# tests/test_attribute_exclusion_helper.py
+import unittest
+import os
+import sys
+import json
+import copy
+import tempfile
+from unittest.mock import MagicMock
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.attribute_exclusion_helper import AttributeExclusionPlan, load_exclusion_plan
+
+RULES = {
+    "general": ["yoast_head", "_links"],
+    "yoast_head_json": ["og_type", "og_title"],
+    "yoast_head_json.robots": ["max-snippet"],
+    "yoast_head_json.schema.@graph": {
+        "delete_item_index": [0, 2],
+        "exclude_attributes": ["@type", "@id"]
+    }
+}
+
+class TestAttributeExclusionPlan(unittest.TestCase):
+    def setUp(self):
+        self.category = {
+            "id": 1,
+            "name": "Kategoria",
+            "yoast_head": "<meta>",
+            "_links": {"self": []},
+            "image": {"src": "https://example.com/a.jpg"},
+            "yoast_head_json": {
+                "title": "Tytuł",
+                "og_type": "article",
+                "og_title": "Tytuł OG",
+                "robots": {"index": "index", "max-snippet": "-1"},
+                "schema": {"@graph": [
+                    {"@type": "WebPage", "@id": "#a"},
+                    {"@type": "BreadcrumbList", "@id": "#b", "name": "okruszki"},
+                    {"@type": "WebSite", "@id": "#c"}
+                ]}
+            }
+        }
+
+    def test_apply_usuwa_atrybuty(self):
+        plan = AttributeExclusionPlan.compile(RULES)
+        result = plan.apply(self.category)
+
+        self.assertNotIn("yoast_head", result)
+        self.assertNotIn("_links", result)
+        self.assertEqual(result["yoast_head_json"]["title"], "Tytuł")
+        self.assertNotIn("og_type", result["yoast_head_json"])
+        self.assertEqual(result["yoast_head_json"]["robots"], {"index": "index"})
+        self.assertEqual(result["yoast_head_json"]["schema"]["@graph"], [{"name": "okruszki"}])
+
+    def test_apply_nie_modyfikuje_wejscia(self):
+        original = copy.deepcopy(self.category)
+        plan = AttributeExclusionPlan.compile(RULES)
+        result = plan.apply(self.category)
+
+        self.assertEqual(self.category, original)
+        # Gałęzie bez zmian są współdzielone z oryginałem
+        self.assertIs(result["image"], self.category["image"])
+
+    def test_brakujace_sciezki(self):
+        plan = AttributeExclusionPlan.compile(RULES)
+
+        self.assertEqual(plan.apply({"id": 2, "name": "Bez SEO"}), {"id": 2, "name": "Bez SEO"})
+
+    def test_walidacja_regul(self):
+        with self.assertRaises(ValueError):
+            AttributeExclusionPlan.compile({"general": "yoast_head"})
+        with self.assertRaises(ValueError):
+            AttributeExclusionPlan.compile({"a.b": {"delete_item_index": "0"}})
+        with self.assertRaises(ValueError):
+            AttributeExclusionPlan.compile({"a..b": ["x"]})
+
+    def test_load_exclusion_plan_z_katalogu_konfiguracji(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'exclude_category_attributes.json'), 'w', encoding='utf-8') as file:
+                json.dump(RULES, file)
+            config = MagicMock()
+            config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES = temp_dir
+
+            plan = load_exclusion_plan(config)
+            self.assertIs(load_exclusion_plan(config), plan)
+            self.assertEqual(plan.general_keys, frozenset(RULES["general"]))
+
+if __name__ == '__main__':
+    unittest.main()
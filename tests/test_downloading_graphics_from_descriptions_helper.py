@@ -0,0 +1,173 @@
+# tests/test_downloading_graphics_from_descriptions_helper.py
+import unittest
+import os
+import sys
+import asyncio
+import base64
+import tempfile
+
+import httpx
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.downloading_graphics_from_descriptions_helper import ImageProcessor
+from src.modules.image_store_helper import ImageStore
+from src.modules.image_url_cache_helper import ImageUrlCache
+from src.modules.config_helper import ConfigHelper
+
+class TestImageProcessor(unittest.TestCase):
+    def setUp(self):
+        self.config_file_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'config', 'config.json')
+        self.config_helper = ConfigHelper(self.config_file_path)
+        self.processor = ImageProcessor(self.config_helper, transport=MagicMock(), max_concurrency=4, max_concurrency_per_host=2)
+        # Magazyn grafik w katalogu tymczasowym, aby testy nie zostawiały plików w katalogu danych
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.store_dir.cleanup)
+        self.processor.image_store = ImageStore(self.config_helper, store_dir=self.store_dir.name)
+        self.processor.url_cache = ImageUrlCache(self.config_helper, cache_dir=self.store_dir.name)
+        self.domain = self.config_helper.WOOCOMMERCE_API_DOMAIN
+
+    def run_with_handler(self, descriptions, handler):
+        async def run_test():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await self.processor.process_images_in_descriptions(descriptions, client=client)
+        return asyncio.run(run_test())
+
+    def test_wspolna_grafika_pobierana_raz(self):
+        descriptions = [
+            f'<p><img src="https://{self.domain}/wp-content/a.jpg"></p>',
+            f"<img data-src='/wp-content/a.jpg'><img src=\"https://{self.domain}/wp-content/b.jpg#x\">",
+            '<p>Bez grafik</p>',
+        ]
+        requested_urls = []
+        active = 0
+        max_active = 0
+
+        async def handler(request):
+            nonlocal active, max_active
+            requested_urls.append(str(request.url))
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=str(request.url).encode())
+
+        updated = self.run_with_handler(descriptions, handler)
+
+        self.assertEqual(sorted(requested_urls), [f'https://{self.domain}/wp-content/a.jpg', f'https://{self.domain}/wp-content/b.jpg'])
+        self.assertLessEqual(max_active, 2)
+        self.assertEqual(updated[0], '<p><img src="/data/include/cms/description/wp-content/a.jpg"></p>')
+        self.assertEqual(updated[1], "<img data-src='/data/include/cms/description/wp-content/a.jpg'><img src=\"/data/include/cms/description/wp-content/b.jpg\">")
+        self.assertEqual(updated[2], '<p>Bez grafik</p>')
+        self.assertTrue(os.path.exists(os.path.join(self.store_dir.name, 'wp-content', 'a.jpg')))
+
+    def test_limit_rozmiaru_i_typ_tresci(self):
+        self.processor.max_image_size = 1024
+        descriptions = [f'<img src="https://{self.domain}/film.jpg"><img src="https://{self.domain}/strona.jpg"><img src="https://{self.domain}/duzy.jpg">']
+
+        async def chunks():
+            yield b'0' * 800
+            yield b'0' * 800
+
+        def handler(request):
+            if request.url.path == '/film.jpg':
+                return httpx.Response(200, headers={'Content-Type': 'video/mp4'}, content=b'0' * 10)
+            if request.url.path == '/strona.jpg':
+                return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=b'<html>')
+            # Odpowiedź bez Content-Length - limit sprawdzany jest w trakcie pobierania
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=chunks())
+
+        updated = self.run_with_handler(descriptions, handler)
+
+        self.assertEqual(updated, descriptions)
+        self.assertEqual(self.processor.image_store.files, {})
+        self.assertEqual(os.listdir(os.path.join(self.store_dir.name, ImageStore.TEMP_DIRNAME)), [])
+
+    def test_blad_jednej_grafiki_nie_przerywa_przetwarzania(self):
+        descriptions = [
+            f'<img src="https://{self.domain}/wp-content/a.jpg">',
+            f'<img src="https://{self.domain}/wp-content/zepsuta.jpg">',
+        ]
+
+        def handler(request):
+            if request.url.path == '/wp-content/zepsuta.jpg':
+                raise httpx.InvalidURL("Niepoprawny adres grafiki")
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=b'jpg')
+
+        updated = self.run_with_handler(descriptions, handler)
+
+        # Grafika z błędem zachowuje oryginalny adres, a pozostałe są podmieniane
+        self.assertEqual(updated[0], '<img src="/data/include/cms/description/wp-content/a.jpg">')
+        self.assertEqual(updated[1], descriptions[1])
+
+    def test_pamiec_podreczna_miedzy_uruchomieniami(self):
+        descriptions = [f'<img src="https://{self.domain}/wp-content/a.jpg">']
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.headers.get('If-None-Match') == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg', 'ETag': '"v1"'}, content=b'obraz')
+
+        first = self.run_with_handler(descriptions, handler)
+
+        # Kolejne uruchomienie w okresie ważności nie wysyła żadnego zapytania
+        self.processor = ImageProcessor(self.config_helper, transport=MagicMock())
+        self.processor.image_store = ImageStore(self.config_helper, store_dir=self.store_dir.name)
+        self.processor.url_cache = ImageUrlCache(self.config_helper, cache_dir=self.store_dir.name)
+        self.assertEqual(self.run_with_handler(descriptions, handler), first)
+        self.assertEqual(len(requests), 1)
+
+        # Po upływie okresu ważności wysyłane jest zapytanie warunkowe, a odpowiedź 304 używa pliku z magazynu
+        self.processor = ImageProcessor(self.config_helper, transport=MagicMock())
+        self.processor.image_store = ImageStore(self.config_helper, store_dir=self.store_dir.name)
+        self.processor.url_cache = ImageUrlCache(self.config_helper, cache_dir=self.store_dir.name, ttl=0)
+        self.assertEqual(self.run_with_handler(descriptions, handler), first)
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[1].headers.get('If-None-Match'), '"v1"')
+
+    def test_zwijanie_wariantow_rozmiaru(self):
+        self.processor.collapse_size_variants = True
+        base = f'https://{self.domain}/wp-content/uploads'
+        descriptions = [
+            f'<img src="{base}/a-150x150.jpg"><img src="{base}/a-1024x768.jpg">',
+            f'<img src="{base}/b-300x300.png" srcset="{base}/b-150x150.png 150w, {base}/b-300x300.png 300w">',
+        ]
+        requested_paths = []
+
+        def handler(request):
+            requested_paths.append(request.url.path)
+            # Oryginał 'b.png' nie istnieje na serwerze
+            if request.url.path == '/wp-content/uploads/b.png':
+                return httpx.Response(404)
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=request.url.path.encode())
+
+        updated = self.run_with_handler(descriptions, handler)
+
+        self.assertEqual(sorted(requested_paths), ['/wp-content/uploads/a.jpg', '/wp-content/uploads/b-300x300.png', '/wp-content/uploads/b.png'])
+        self.assertEqual(updated[0], '<img src="/data/include/cms/description/wp-content/uploads/a.jpg">' * 2)
+        new_b = '/data/include/cms/description/wp-content/uploads/b-300x300.png'
+        self.assertEqual(updated[1], f'<img src="{new_b}" srcset="{new_b} 150w, {new_b} 300w">')
+
+    def test_grafiki_osadzone_base64(self):
+        image_data = b'\x89PNG\r\n\x1a\nobraz'
+        data_uri = f"data:image/png;base64,{base64.b64encode(image_data).decode()}"
+        descriptions = [f'<p><img src="{data_uri}"></p>', f"<div style=\"background: url('{data_uri}')\"></div>"]
+
+        def handler(request):
+            raise AssertionError(f"Nieoczekiwane zapytanie: {request.url}")
+
+        updated = self.run_with_handler(descriptions, handler)
+
+        digest = ImageStore.compute_digest(image_data)
+        new_path = f'/data/include/cms/description/inline/{digest[:16]}.png'
+        self.assertEqual(updated[0], f'<p><img src="{new_path}"></p>')
+        self.assertEqual(updated[1], f"<div style=\"background: url('{new_path}')\"></div>")
+        with open(os.path.join(self.store_dir.name, 'inline', f'{digest[:16]}.png'), 'rb') as file:
+            self.assertEqual(file.read(), image_data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# tests/test_hierarchical_scheduler_helper.py
+import unittest
+import os
+import sys
+import asyncio
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.hierarchical_scheduler_helper import run_hierarchical_ready_queue
+
+class TestRunHierarchicalReadyQueue(unittest.TestCase):
+    def run_queue(self, nodes, worker, **kwargs):
+        return asyncio.run(run_hierarchical_ready_queue(
+            nodes, node_key=lambda node: node['id'], parent_key=lambda node: node['parent'], worker=worker, **kwargs
+        ))
+
+    def test_rodzic_przed_dziecmi_i_rownoleglosc(self):
+        # Dwie gałęzie po trzy poziomy, podane w odwrotnej kolejności
+        nodes = [{"id": f"{branch}{level}", "parent": f"{branch}{level - 1}" if level else None} for branch in "ab" for level in range(3)][::-1]
+        finished = []
+        in_flight = 0
+        max_in_flight = 0
+
+        async def worker(batch):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            for node in batch:
+                self.assertTrue(node['parent'] is None or node['parent'] in finished)
+            await asyncio.sleep(0.001)
+            finished.extend(node['id'] for node in batch)
+            in_flight -= 1
+
+        batches = self.run_queue(nodes, worker, concurrency=2)
+        self.assertEqual(batches, 6)
+        self.assertEqual(sorted(finished), ["a0", "a1", "a2", "b0", "b1", "b2"])
+        # Niezależne gałęzie są przetwarzane równolegle
+        self.assertEqual(max_in_flight, 2)
+
+    def test_paczki_i_ponowienie(self):
+        nodes = [{"id": index, "parent": None} for index in range(5)] + [{"id": 10, "parent": 0}]
+        batches_seen = []
+
+        async def worker(batch):
+            batches_seen.append([node['id'] for node in batch])
+            if len(batch) > 2:
+                # Serwer odrzucił paczkę - wraca do kolejki
+                return batch, []
+
+        sizes = iter([5, 2, 2, 2, 2])
+        self.run_queue(nodes, worker, concurrency=1, take_batch=lambda ready: next(sizes))
+        self.assertEqual(batches_seen, [[0, 1, 2, 3, 4], [0, 1], [2, 3], [4, 10]])
+
+    def test_poddrzewo_nieudanego_wezla_jest_pomijane(self):
+        # a -> b -> c oraz a -> d; b się nie udaje, więc c jest pomijane, a d przetwarzane
+        nodes = [{"id": "a", "parent": None}, {"id": "b", "parent": "a"}, {"id": "c", "parent": "b"}, {"id": "d", "parent": "a"}]
+        processed = []
+        skipped = {}
+
+        async def worker(batch):
+            processed.extend(node['id'] for node in batch)
+            return [], [node for node in batch if node['id'] == 'b']
+
+        def on_skipped(node, descendants):
+            skipped[node['id']] = [descendant['id'] for descendant in descendants]
+
+        self.run_queue(nodes, worker, on_skipped=on_skipped)
+        self.assertEqual(sorted(processed), ["a", "b", "d"])
+        self.assertEqual(skipped, {"b": ["c"]})
+
+    def test_cykl_nie_blokuje_kolejki(self):
+        nodes = [{"id": 1, "parent": 2}, {"id": 2, "parent": 1}]
+        processed = []
+
+        async def worker(batch):
+            processed.extend(node['id'] for node in batch)
+
+        self.run_queue(nodes, worker)
+        self.assertEqual(sorted(processed), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
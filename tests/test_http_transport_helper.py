@@ -0,0 +1,37 @@
+# tests/test_http_transport_helper.py
+import unittest
+import os
+import sys
+import asyncio
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.http_transport_helper import HttpTransportHelper
+from src.modules.config_helper import ConfigHelper
+
+class TestHttpTransportHelper(unittest.TestCase):
+    def setUp(self):
+        self.config_file_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'config', 'config.json')
+        self.config_helper = ConfigHelper(self.config_file_path)
+
+    def test_client_per_host(self):
+        async def run_test():
+            async with HttpTransportHelper(self.config_helper) as transport:
+                woocommerce_client = transport.woocommerce
+                self.assertIs(woocommerce_client, transport.client_for(f"https://{self.config_helper.WOOCOMMERCE_API_DOMAIN}/wp-json/wc/v3/products"))
+                self.assertIsNot(woocommerce_client, transport.idosell)
+                self.assertIs(transport.client_for("https://cdn.example.com/a.jpg"), transport.client_for("https://CDN.example.com/b.jpg"))
+            self.assertTrue(woocommerce_client.is_closed)
+            with self.assertRaises(RuntimeError):
+                transport.client_for("https://cdn.example.com/a.jpg")
+
+        asyncio.run(run_test())
+
+    def test_http2_disabled_without_h2(self):
+        transport = HttpTransportHelper(self.config_helper, http2=False)
+        self.assertFalse(transport.http2)
+        asyncio.run(transport.close())
+
+if __name__ == '__main__':
+    unittest.main()
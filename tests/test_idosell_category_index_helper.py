@@ -0,0 +1,37 @@
+# tests/test_idosell_category_index_helper.py
+import unittest
+import os
+import sys
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.idosell_category_index_helper import IdoSellCategoryIndex
+
+class TestIdoSellCategoryIndex(unittest.TestCase):
+    def setUp(self):
+        config = MagicMock()
+        config.IDOSELL_IMPORT_CONCURRENCY = 4
+        self.index = IdoSellCategoryIndex(config, 'klucz', http_client=None)
+
+    def add(self, category_id, parent_id, name):
+        self.index.add_category({"id": category_id, "parent_id": parent_id, "lang_data": [{"lang_id": "pol", "singular_name": name}]})
+
+    def test_sciezki_nazw(self):
+        self.add(3, 2, "Łóżka piętrowe")
+        self.add(2, 1, "Łóżka")
+        self.add(1, 0, "Meble")
+        # Rodzic spoza pobranych stron - ścieżka nieznana, więc kategoria nie może udawać głównej
+        self.add(4, 99, "Meble")
+        # Cykl w danych nie zawiesza budowania indeksu
+        self.add(5, 6, "A")
+        self.add(6, 5, "B")
+        self.index.build_paths()
+
+        self.assertEqual(self.index.find("Meble\\Łóżka\\Łóżka piętrowe")['id'], 3)
+        self.assertEqual(self.index.find("Meble")['id'], 1)
+        self.assertEqual(set(self.index.by_xpath), {"Meble", "Meble\\Łóżka", "Meble\\Łóżka\\Łóżka piętrowe"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# tests/test_image_recompression_helper.py
+import unittest
+import os
+import sys
+import asyncio
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.image_store_helper import ImageStore
+from src.modules.image_recompression_helper import ImageRecompressionHelper
+
+calls = []
+
+def fake_recompress_image(source_path, output_path, max_dimension, output_format, quality):
+    # Zastępuje Pillow: "kompresja" skraca plik o połowę
+    calls.append(source_path)
+    with open(source_path, 'rb') as file:
+        data = file.read()
+    with open(output_path, 'wb') as file:
+        file.write(data[:len(data) // 2])
+    return hashlib.sha256(data[:len(data) // 2]).hexdigest(), len(data) // 2
+
+class TestImageRecompressionHelper(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.store_dir.cleanup)
+        self.config = MagicMock()
+        self.config.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS = self.store_dir.name
+        self.config.IMAGE_RECOMPRESSION_ENABLED = False
+        self.config.IMAGE_RECOMPRESSION_MAX_DIMENSION = 1920
+        self.config.IMAGE_RECOMPRESSION_FORMAT = 'webp'
+        self.config.IMAGE_RECOMPRESSION_QUALITY = 82
+        self.store = ImageStore(self.config)
+        calls.clear()
+
+    def create_helper(self):
+        helper = ImageRecompressionHelper(self.config, self.store, executor=ThreadPoolExecutor(max_workers=2))
+        helper.enabled = True
+        helper.worker = fake_recompress_image
+        return helper
+
+    def test_wylaczona_optymalizacja(self):
+        helper = ImageRecompressionHelper(self.config, self.store)
+        self.assertFalse(helper.enabled)
+        self.assertEqual(asyncio.run(helper.optimize_paths(['a.png'])), {'a.png': 'a.png'})
+
+    def test_optymalizacja_i_pamiec_podreczna(self):
+        async def run_test():
+            await self.store.put(b'x' * 1000, 'wp-content/a.png')
+            await self.store.put(b'y' * 10, 'wp-content/animacja.gif')
+            helper = self.create_helper()
+            first = await helper.optimize_paths(['wp-content/a.png', 'wp-content/animacja.gif'])
+            await helper.close()
+            # Kolejne uruchomienie korzysta z zapisanych wyników zamiast ponownie przetwarzać grafikę
+            helper = self.create_helper()
+            second = await helper.optimize_paths(['wp-content/a.png'])
+            await helper.close()
+            return first, second
+
+        first, second = asyncio.run(run_test())
+
+        self.assertEqual(first, {'wp-content/a.png': 'optimized/wp-content/a.webp', 'wp-content/animacja.gif': 'wp-content/animacja.gif'})
+        self.assertEqual(second, {'wp-content/a.png': 'optimized/wp-content/a.webp'})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(os.path.getsize(self.store.full_path('optimized/wp-content/a.webp')), 500)
+
+if __name__ == '__main__':
+    unittest.main()
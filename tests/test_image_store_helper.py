@@ -0,0 +1,47 @@
+# tests/test_image_store_helper.py
+import unittest
+import os
+import sys
+import asyncio
+import tempfile
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.image_store_helper import ImageStore
+
+class TestImageStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config = MagicMock()
+        self.config.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS = self.temp_dir.name
+
+    def test_duplikaty_jako_aliasy(self):
+        store = ImageStore(self.config)
+
+        async def run_test():
+            first = await store.put(b'obraz', 'wp-content/uploads/a.jpg')
+            alias = await store.put(b'obraz', 'wp-content/uploads/kopia/b.jpg')
+            replaced = await store.put(b'inny obraz', 'wp-content/uploads/a.jpg')
+            return first, alias, replaced
+
+        first, alias, replaced = asyncio.run(run_test())
+
+        self.assertEqual(first, 'wp-content/uploads/a.jpg')
+        # Ta sama treść pod innym adresem nie jest zapisywana ponownie
+        self.assertEqual(alias, first)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, 'wp-content', 'uploads', 'kopia', 'b.jpg')))
+        self.assertEqual(store.resolve('wp-content/uploads/kopia/b.jpg'), first)
+        # Inna treść pod zajętą ścieżką dostaje nazwę z fragmentem skrótu
+        self.assertNotEqual(replaced, first)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, *replaced.split('/'))))
+
+        store.save()
+        reloaded = ImageStore(self.config)
+        self.assertIn(ImageStore.compute_digest(b'obraz'), reloaded)
+        self.assertEqual(reloaded.resolve('wp-content/uploads/kopia/b.jpg'), first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# tests/test_image_upload_helper.py
+import unittest
+import os
+import sys
+import asyncio
+import ftplib
+import tempfile
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.image_store_helper import ImageStore
+from src.modules.image_upload_helper import ImageUploadHelper, LocalDirectoryUploadTarget, FtpUploadTarget, referenced_image_paths
+from src.modules.json_storage_helper import atomic_write_json
+
+class TestImageUploadHelper(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.target_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.store_dir.cleanup)
+        self.addCleanup(self.target_dir.cleanup)
+        self.config = MagicMock()
+        self.config.OUTPUT_IMG_FOLDER_FOR_DESCRIPTIONS = self.store_dir.name
+        self.config.IMAGE_UPLOAD_CONCURRENCY = 2
+
+    def create_helper(self):
+        return ImageUploadHelper(self.config, LocalDirectoryUploadTarget(self.target_dir.name))
+
+    def test_wysylka_i_wznowienie(self):
+        store = ImageStore(self.config)
+
+        async def fill_store():
+            await store.put(b'a' * 100, 'wp-content/a.jpg')
+            await store.put(b'b' * 50, 'wp-content/b.jpg')
+            await store.put(b'a' * 100, 'inne/a-kopia.jpg')
+        asyncio.run(fill_store())
+        store.save()
+
+        summary = asyncio.run(self.create_helper().upload_all())
+
+        self.assertEqual(summary["uploaded_files"], 2)
+        self.assertEqual(summary["uploaded_bytes"], 150)
+        with open(os.path.join(self.target_dir.name, 'wp-content', 'a.jpg'), 'rb') as file:
+            self.assertEqual(file.read(), b'a' * 100)
+
+        # Kolejne uruchomienie nie wysyła ponownie plików, których treść się nie zmieniła
+        summary = asyncio.run(self.create_helper().upload_all())
+        self.assertEqual(summary["uploaded_files"], 0)
+        self.assertEqual(summary["skipped_files"], 2)
+
+        async def add_image():
+            store = ImageStore(self.config)
+            await store.put(b'c', 'wp-content/c.jpg')
+            store.save()
+        asyncio.run(add_image())
+
+        helper = self.create_helper()
+        self.assertEqual([item[0] for item in helper.pending_uploads()], ['wp-content/c.jpg'])
+
+    def test_tylko_grafiki_z_opisow(self):
+        store = ImageStore(self.config)
+
+        async def fill_store():
+            original = await store.put(b'o' * 100, 'wp-content/a.jpg')
+            optimized = await store.put(b'z' * 10, 'optimized/wp-content/a.webp')
+            await store.put(b'n' * 20, 'wp-content/nieuzywana.jpg')
+            return original, optimized
+        original, optimized = asyncio.run(fill_store())
+        store.save()
+        atomic_write_json(os.path.join(self.store_dir.name, 'recompressed_images.json'), {
+            f"{store.paths[original]}:webp-1600-80": {"path": optimized, "source_size": 100, "size": 10}
+        })
+
+        categories = [
+            {'description': '<p><img src="/data/include/cms/description/optimized/wp-content/a.webp"><img src="https://cdn.example.com/x.jpg"></p>', 'category_image': ''},
+            {'description': None, 'category_image': '/data/include/cms/description/optimized/wp-content/a.webp'},
+        ]
+        self.assertEqual(referenced_image_paths(categories), ['optimized/wp-content/a.webp'])
+
+        helper = ImageUploadHelper(self.config, LocalDirectoryUploadTarget(self.target_dir.name), referenced_paths=referenced_image_paths(categories))
+        self.assertEqual([item[0] for item in helper.pending_uploads()], ['optimized/wp-content/a.webp'])
+
+        # Bez listy odwołań pomijany jest oryginał zastąpiony wersją zoptymalizowaną
+        helper = self.create_helper()
+        self.assertEqual(sorted(item[0] for item in helper.pending_uploads()), ['optimized/wp-content/a.webp', 'wp-content/nieuzywana.jpg'])
+
+class TestFtpUploadTarget(unittest.TestCase):
+    def test_katalog_zapamietany_po_potwierdzeniu(self):
+        target = FtpUploadTarget('ftp.sklep.pl', 'user', 'haslo')
+        ftp = MagicMock()
+        ftp.pwd.return_value = '/'
+        # Katalog 'data' już istnieje, a do 'zablokowany' nie ma uprawnień
+        ftp.mkd.side_effect = ftplib.error_perm('550 Exists')
+        def cwd(directory):
+            if directory not in ('/', '/data'):
+                raise ftplib.error_perm('550 Denied')
+        ftp.cwd.side_effect = cwd
+
+        with self.assertRaises(ftplib.error_perm):
+            target._ensure_directory(ftp, '/data/zablokowany')
+
+        self.assertEqual(target._created_dirs, {'/data'})
+
+if __name__ == '__main__':
+    unittest.main()
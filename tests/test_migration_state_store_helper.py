@@ -0,0 +1,70 @@
+# tests/test_migration_state_store_helper.py
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.migration_state_store_helper import MigrationStateStore
+
+class TestMigrationStateStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config = MagicMock()
+        self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES = os.path.join(self.temp_dir.name, 'categories')
+        self.config.OUTPUT_DATA_FOLDER_FOR_MENU = os.path.join(self.temp_dir.name, 'menu')
+        self.config.STATE_DB_PATH = os.path.join(self.temp_dir.name, 'migration_state.db')
+        os.makedirs(self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES)
+        os.makedirs(self.config.OUTPUT_DATA_FOLDER_FOR_MENU)
+
+    def open_store(self):
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.connection.close)
+        return store
+
+    def test_jednorazowa_migracja_plikow_json(self):
+        category_cache_path = os.path.join(self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES, 'category_cache.json')
+        with open(category_cache_path, 'w') as file:
+            json.dump({"15": {"category_name": "Łóżka", "category_xpath": "Meble\\Łóżka", "id": 101, "parent_id": 100}}, file)
+        with open(os.path.join(self.config.OUTPUT_DATA_FOLDER_FOR_MENU, 'menu_cache.json'), 'w') as file:
+            # Drzewo menu zapisywane dawniej w tym samym pliku nie jest powiązaniem i jest pomijane
+            json.dump({"Meble": {"id": 7, "category_xpath": "Meble"}, "result": [{"item_id": 1}]}, file)
+
+        store = self.open_store()
+        self.assertEqual(store.mapping('category')["15"]["id"], 101)
+        self.assertEqual(dict(store.mapping('menu')), {"Meble": {"id": 7, "category_xpath": "Meble"}})
+        self.assertFalse(os.path.exists(category_cache_path))
+        self.assertTrue(os.path.exists(category_cache_path + '.migrated'))
+        store.close()
+
+        # Ponownie pojawiający się plik nie jest migrowany drugi raz
+        with open(category_cache_path, 'w') as file:
+            json.dump({"16": {"id": 102}}, file)
+        store = self.open_store()
+        self.assertNotIn("16", store.mapping('category'))
+
+    def test_zapis_z_opoznieniem_i_trwalosc(self):
+        store = self.open_store()
+        self.assertEqual(store.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        categories = store.mapping('category')
+        categories[1] = {"category_xpath": "Meble", "id": 100}
+        categories["2"] = {"category_xpath": "Meble\\Łóżka", "id": 101}
+        # Zmiany są od razu widoczne w pamięci, ale do bazy trafiają dopiero przy zapisie paczki
+        self.assertEqual(categories["1"]["id"], 100)
+        self.assertEqual(store.connection.execute("SELECT COUNT(*) FROM id_mappings").fetchone()[0], 0)
+        store.flush()
+        self.assertEqual(store.connection.execute("SELECT target_id FROM id_mappings WHERE entity = 'category' AND source_id = '2'").fetchone()[0], "101")
+        del categories["1"]
+        store.close()
+
+        store = self.open_store()
+        self.assertEqual(dict(store.mapping('category')), {"2": {"category_xpath": "Meble\\Łóżka", "id": 101}})
+        self.assertEqual(len(store.mapping('menu')), 0)
+
+if __name__ == '__main__':
+    unittest.main()
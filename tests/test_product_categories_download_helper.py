@@ -3,13 +3,17 @@ import unittest
 import os
 import sys
 import asyncio
+import re
+import tempfile
 
 # Dodanie katalogu głównego projektu do sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from unittest.mock import AsyncMock, patch, MagicMock
 from src.modules.product_categories_download_helper import CategoriesDownloadHelper
+from src.modules.product_categories_checkpoint_helper import CategoriesCheckpointHelper
 from src.modules.config_helper import ConfigHelper
+from src.modules.json_storage_helper import load_json
 
 class TestCategoriesDownloadHelper(unittest.TestCase):
     def setUp(self):
@@ -17,23 +21,25 @@ class TestCategoriesDownloadHelper(unittest.TestCase):
         self.config_helper = ConfigHelper(self.config_file_path)
         self.session = AsyncMock()
         self.helper = CategoriesDownloadHelper(self.session, self.config_helper)
+        # Punkt kontrolny zapisujemy w katalogu tymczasowym, aby testy nie zostawiały plików w katalogu danych
+        self.checkpoint_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.checkpoint_dir.cleanup)
+        self.helper.checkpoint_helper = CategoriesCheckpointHelper(self.config_helper, checkpoint_dir=os.path.join(self.checkpoint_dir.name, 'checkpoint'))
+
+    def test_pobieranie_wszystkich_kategorii(self):
+        # Klient HTTP jest wstrzykiwany z warstwy transportowej, więc mockujemy bezpośrednio sesję
+        mock_get = self.session.get
 
-    @patch('httpx.AsyncClient.get')
-    @patch('httpx.AsyncClient.head')
-    def test_pobieranie_wszystkich_kategorii(self, mock_head, mock_get):
         async def run_test():
-            # Mockowanie odpowiedzi HTTP HEAD
-            mock_head_response = MagicMock()
-            mock_head_response.status_code = 200
-            mock_head_response.headers = {
+            # Liczba kategorii i stron jest odczytywana z nagłówków odpowiedzi GET dla pierwszej strony (bez zapytania HEAD)
+            first_page_headers = {
                 'X-WP-Total': '4',  # Zmieniono na 4, aby pasowało do liczby kategorii
                 'X-WP-TotalPages': '2'  # 2 strony po 2 kategorie
             }
-            mock_head.return_value = mock_head_response
 
             # Mockowanie odpowiedzi HTTP GET dla różnych stron
             mock_get.side_effect = [
-                MagicMock(status_code=200, json=MagicMock(return_value=[
+                MagicMock(status_code=200, headers=first_page_headers, json=MagicMock(return_value=[
                     {
                         "id": 15,
                         "name": "Albums",
@@ -95,7 +101,7 @@ class TestCategoriesDownloadHelper(unittest.TestCase):
                         }
                     }
                 ])),
-                MagicMock(status_code=200, json=MagicMock(return_value=[
+                MagicMock(status_code=200, headers={}, json=MagicMock(return_value=[
                     {
                         "id": 10,
                         "name": "Hoodies",
@@ -157,8 +163,120 @@ class TestCategoriesDownloadHelper(unittest.TestCase):
             print("Categories:", categories)
             
             self.assertEqual(len(categories), 4)
+            self.session.head.assert_not_called()
+            # Zapytania zawierają projekcję pól, więc serwer nie zwraca m.in. 'yoast_head'
+            self.assertIn('_fields=', mock_get.call_args_list[0].args[0])
         
         asyncio.run(run_test())
 
+    @patch('asyncio.sleep', new_callable=AsyncMock)
+    def test_ponawianie_pojedynczej_strony(self, mock_sleep):
+        # Strona 2 zwraca najpierw 503, strona 3 zawsze 404; strona 1 nie może być pobrana ponownie
+        def make_response(status_code, payload=None, headers=None):
+            return MagicMock(status_code=status_code, headers=headers or {}, text="", json=MagicMock(return_value=payload))
+
+        calls = {}
+        pages_headers = {'X-WP-Total': '3', 'X-WP-TotalPages': '3'}
+        def get_side_effect(url, **kwargs):
+            page = int(re.search(r'[?&]page=(\d+)', url).group(1))
+            calls[page] = calls.get(page, 0) + 1
+            if page == 2 and calls[page] == 1:
+                return make_response(503, headers={'Retry-After': '1'})
+            if page == 3:
+                return make_response(404)
+            return make_response(200, [{"id": page, "name": f"Kategoria {page}"}], headers=pages_headers)
+
+        self.session.get.side_effect = get_side_effect
+
+        async def run_test():
+            endpoint = f"https://{self.config_helper.WOOCOMMERCE_API_DOMAIN}/wp-json/wc/v3/products/categories?per_page=1"
+            categories = await self.helper.pobieranie_wszystkich_kategorii(endpoint)
+            self.assertEqual([category['id'] for category in categories], [1, 2])
+            self.assertEqual(calls[1], 1)
+            self.assertEqual(calls[2], 2)
+            # Strona 3 nie jest ponawiana w serii (404), ale trafia do kolejki opróżnianej na końcu
+            self.assertEqual(calls[3], 2)
+
+        asyncio.run(run_test())
+
+        # Wznowienie pobiera tylko brakującą stronę 3, a strony 1 (plan) i 2 odtwarza z punktu kontrolnego
+        self.assertEqual(self.helper.checkpoint_helper.manifest['completed_pages'], [1, 2])
+        calls.clear()
+        self.helper.resume_download = True
+
+        async def run_resume():
+            endpoint = f"https://{self.config_helper.WOOCOMMERCE_API_DOMAIN}/wp-json/wc/v3/products/categories?per_page=1"
+            return await self.helper.pobieranie_wszystkich_kategorii(endpoint)
+
+        categories = asyncio.run(run_resume())
+        self.assertEqual([category['id'] for category in categories], [1, 2])
+        self.assertEqual(calls, {1: 1, 3: 2})
+
+    def test_walidatory_stron_z_kolejki_ponowien(self):
+        # Strona 2 zwraca najpierw 404 (bez ponowień w serii) i zostaje pobrana dopiero z kolejki nieudanych stron
+        def make_response(status_code, payload=None, headers=None):
+            return MagicMock(status_code=status_code, headers=headers or {}, text="", json=MagicMock(return_value=payload))
+
+        calls = {}
+        def get_side_effect(url, **kwargs):
+            page = int(re.search(r'[?&]page=(\d+)', url).group(1))
+            calls[page] = calls.get(page, 0) + 1
+            if page == 2 and calls[page] == 1:
+                return make_response(404)
+            return make_response(200, [{"id": page, "name": f"Kategoria {page}"}], headers={'X-WP-Total': '2', 'X-WP-TotalPages': '2', 'ETag': f'"p{page}"'})
+
+        self.session.get.side_effect = get_side_effect
+
+        async def run_test():
+            endpoint = f"https://{self.config_helper.WOOCOMMERCE_API_DOMAIN}/wp-json/wc/v3/products/categories?per_page=1"
+            return await self.helper.pobieranie_wszystkich_kategorii(endpoint)
+
+        categories = asyncio.run(run_test())
+        self.assertEqual(sorted(category['id'] for category in categories), [1, 2])
+        self.assertEqual(self.helper.pages_meta[2], {"etag": '"p2"', "last_modified": None, "ids": [2]})
+
+    def test_tryb_przyrostowy(self):
+        # Migawka z poprzedniej synchronizacji: kategorie 1 i 2 na stronie 1 oraz 3 na stronie 2 (z ETag)
+        def make_response(status_code, payload=None, headers=None):
+            return MagicMock(status_code=status_code, headers=headers or {}, text="", json=MagicMock(return_value=payload))
+
+        previous = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}, {"id": 3, "name": "C"}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_helper = self.helper.snapshot_helper
+            snapshot_helper.snapshot_path = os.path.join(temp_dir, 'category_snapshot.json')
+            self.helper.snapshot_enabled = True
+            self.helper.delta_mode = True
+            endpoint = self.helper.dodanie_projekcji_pol(f"{self.config_helper.WOOCOMMERCE_API_CATEGORIES_GATE_URL}?per_page=2")
+            snapshot_helper.save(endpoint, previous, {1: {"etag": None, "last_modified": None, "ids": [1, 2]}, 2: {"etag": '"v1"', "last_modified": None, "ids": [3]}})
+
+            pages_headers = {'X-WP-Total': '3', 'X-WP-TotalPages': '2'}
+            requests = []
+            def get_side_effect(url, headers=None):
+                requests.append((url, headers))
+                if '_fields=id&' in url or url.endswith('_fields=id'):
+                    return make_response(200, [{"id": 1}, {"id": 3}, {"id": 4}], headers={'X-WP-TotalPages': '1'})
+                if re.search(r'[?&]page=2', url):
+                    self.assertEqual(headers, {'If-None-Match': '"v1"'})
+                    return make_response(304)
+                return make_response(200, [{"id": 1, "name": "A"}, {"id": 4, "name": "D"}], headers=pages_headers)
+            self.session.get.side_effect = get_side_effect
+
+            async def run_test():
+                return await self.helper.pobieranie_wszystkich_kategorii(endpoint)
+
+            categories = asyncio.run(run_test())
+            delta = self.helper.categories_delta
+            self.assertEqual(sorted(category['id'] for category in categories), [1, 3, 4])
+            self.assertEqual(delta.added, [4])
+            self.assertEqual(sorted(delta.unchanged), [1, 3])
+            self.assertEqual(delta.deleted, [2])
+            self.assertEqual(delta.changed_ids, {4})
+
+            # Migawka jest zapisywana dopiero po udanym imporcie, więc do tego czasu zmiany pozostają do zaimportowania
+            self.assertEqual(sorted(load_json(snapshot_helper.snapshot_path)['categories']), ['1', '2', '3'])
+            self.assertTrue(self.helper.commit_snapshot())
+            self.assertEqual(sorted(load_json(snapshot_helper.snapshot_path)['categories']), ['1', '3', '4'])
+            self.assertFalse(self.helper.commit_snapshot())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+# tests/test_product_categories_export_helper.py
+import unittest
+import os
+import sys
+import json
+import tempfile
+from collections import ChainMap
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.product_categories_export_helper import ProductCategoriesExportHelper
+
+class TestProductCategoriesExportHelper(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config = MagicMock()
+        self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES = self.temp_dir.name
+        self.config.OUTPUT_CSV_FOLDER_FOR_CATEGORIES = self.temp_dir.name
+        self.exporter = ProductCategoriesExportHelper(self.config)
+
+    def read_json(self, base_filename):
+        path = os.path.join(self.temp_dir.name, f"{base_filename}_{self.exporter.current_date}.json")
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_eksport_nakladek(self):
+        raw = [
+            {"id": 1, "name": "Łóżka", "yoast_head": "<meta>", "yoast_head_json": {"title": "T", "og_type": "x"}},
+            {"id": 2, "name": "Szafy", "yoast_head": "<meta>", "yoast_head_json": {"title": "S"}},
+        ]
+        processed = [ChainMap({"link": f"https://sklep.pl/{category['id']}"}, category) for category in raw]
+        self.exporter.exclusion_plan = self.exporter.exclusion_plan.compile({"general": ["yoast_head"], "yoast_head_json": ["og_type"]})
+
+        self.exporter.export_categories(raw, processed, [])
+
+        # Dane źródłowe zapisywane są w tym samym formacie co json.dump(..., indent=4)
+        self.assertEqual(self.read_json("woocommerce_all_categories"), json.dumps(raw, ensure_ascii=False, indent=4))
+        exported = json.loads(self.read_json("woocommerce_all_categories_processed"))
+        self.assertEqual(exported[0], {"id": 1, "name": "Łóżka", "yoast_head_json": {"title": "T"}, "link": "https://sklep.pl/1"})
+        # Wykluczanie przy eksporcie nie zmienia danych źródłowych
+        self.assertIn("yoast_head", raw[0])
+        self.assertIn("og_type", raw[0]["yoast_head_json"])
+        self.assertEqual(self.read_json("woocommerce_all_categories_transformed"), "[]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,313 @@
+# tests/test_product_categories_import_helper.py
+import unittest
+import os
+import sys
+import json
+import asyncio
+import tempfile
+
+import httpx
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock, patch
+from src.modules.product_categories_import_helper import ProductCategoriesImportHelper
+from src.modules.hierarchical_scheduler_helper import run_hierarchical_ready_queue
+from src.modules.migration_state_store_helper import MigrationStateStore
+
+class TestProductCategoriesImportHelper(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config = MagicMock()
+        self.config.IDOSELL_API_DOMAIN = 'sklep.idosell.com'
+        self.config.IDOSELL_API_CATEGORIES_GATE_URL = 'https://sklep.idosell.com/api/admin/v3/products/categories'
+        self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES = self.temp_dir.name
+        self.config.OUTPUT_DATA_FOLDER_FOR_MENU = self.temp_dir.name
+        self.config.STATE_DB_PATH = os.path.join(self.temp_dir.name, 'migration_state.db')
+        self.config.OUTPUT_LOGS_FOLDER_FOR_CATEGORIES = os.path.join(self.temp_dir.name, 'logs')
+        self.config.SUPPORTED_LANGUAGES = ['pl']
+        self.config.IDOSELL_CATEGORIES_BATCH_SIZE = 50
+        self.config.IDOSELL_CATEGORIES_MAX_BATCH_SIZE = 100
+        self.config.IDOSELL_BATCH_MAX_PAYLOAD_KB = 512
+        self.config.IDOSELL_BATCH_TARGET_LATENCY = 10.0
+        self.config.IDOSELL_IMPORT_CONCURRENCY = 4
+        self.requests = []
+        self.next_id = 1000
+        # Kategorie istniejące w IdoSell zwracane przez GET (po dwie na stronę)
+        self.idosell_tree = []
+        self.tree_pages_requested = []
+
+    def tree_handler(self, request):
+        page = int(request.url.params['resultsPage'])
+        self.tree_pages_requested.append(page)
+        pages_count = max(1, (len(self.idosell_tree) + 1) // 2)
+        return httpx.Response(200, json={
+            "resultsNumberPage": pages_count,
+            "resultsPage": page,
+            "result": {"categories": self.idosell_tree[page * 2:page * 2 + 2]}
+        })
+
+    def handler(self, request):
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        results = []
+        for entry in payload['params']['categories']:
+            if entry['operation'] == 'edit':
+                results.append({"id": entry['id'], "faultCode": 0})
+                continue
+            self.next_id += 1
+            results.append({"id": self.next_id, "parent_id": entry.get('parent_id', 0), "faultCode": 0})
+        return httpx.Response(200, json={"result": {"categories": results}})
+
+    def run_import(self, categories, handler=None):
+        def dispatch(request):
+            if request.method == 'GET':
+                return self.tree_handler(request)
+            return (handler or self.handler)(request)
+
+        async def run_test():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(dispatch)) as client:
+                importer = ProductCategoriesImportHelper(self.config, 'klucz', http_client=client)
+                await importer.import_categories_into_idosell_as_product_categories_in_the_panel(categories)
+                await importer.close()
+                return importer
+        return asyncio.run(run_test())
+
+    def build_categories(self, roots, children_per_root):
+        categories = []
+        for root in range(1, roots + 1):
+            categories.append({"category_id": root, "parent_id": 0, "category_name": f"K{root}", "category_xpath": f"K{root}"})
+            for child in range(children_per_root):
+                child_id = roots + root * children_per_root + child
+                categories.append({"category_id": child_id, "parent_id": root, "category_name": f"P{child_id}", "category_xpath": f"K{root}\\P{child_id}"})
+        return categories
+
+    def test_paczki_z_rozwiazanymi_rodzicami(self):
+        categories = self.build_categories(roots=40, children_per_root=49)
+
+        self.run_import(categories)
+
+        # 2000 kategorii to kilkadziesiąt zapytań zamiast 2000
+        self.assertEqual(sum(len(payload['params']['categories']) for payload in self.requests), 2000)
+        self.assertLess(len(self.requests), 40)
+        # Pierwsza paczka zawiera wyłącznie kategorie główne, kolejne - dzieci z identyfikatorami rodziców z IdoSell
+        self.assertTrue(all(entry['parent_id'] == 0 for entry in self.requests[0]['params']['categories']))
+        child_parent_ids = {entry['parent_id'] for payload in self.requests[1:] for entry in payload['params']['categories']}
+        self.assertEqual(child_parent_ids, set(range(1001, 1041)))
+
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.close)
+        cache = store.mapping('category')
+        self.assertEqual(len(cache), 2000)
+        self.assertEqual(cache["1"]["id"], 1001)
+        self.assertEqual(cache["89"]["category_xpath"], 'K1\\P89')
+
+    def test_odrzucona_paczka_dzielona_na_mniejsze(self):
+        categories = self.build_categories(roots=8, children_per_root=0)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            if len(payload['params']['categories']) > 2:
+                self.requests.append(payload)
+                return httpx.Response(413, text="Payload too large")
+            return self.handler(request)
+
+        self.run_import(categories, handler)
+
+        sizes = [len(payload['params']['categories']) for payload in self.requests]
+        # Odrzucona paczka 8 kategorii jest dzielona, aż zmieści się w limicie serwera
+        self.assertEqual(sizes[0], 8)
+        self.assertIn(4, sizes)
+        self.assertEqual(sum(size for size in sizes if size <= 2), 8)
+
+    def test_podkategorie_nieudanej_kategorii_pominiete(self):
+        categories = self.build_categories(roots=2, children_per_root=2)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            self.requests.append(payload)
+            results = []
+            for entry in payload['params']['categories']:
+                if entry['lang_data'][0]['singular_name'] == 'K1':
+                    results.append({"faultCode": 1, "faultString": "Błąd"})
+                    continue
+                self.next_id += 1
+                results.append({"id": self.next_id, "parent_id": entry['parent_id'], "faultCode": 0})
+            return httpx.Response(200, json={"result": {"categories": results}})
+
+        self.run_import(categories, handler)
+
+        sent_names = [entry['lang_data'][0]['singular_name'] for payload in self.requests for entry in payload['params']['categories']]
+        # Podkategorie K1 nie są wysyłane jako kategorie główne - są pomijane i liczone jako nieudane
+        self.assertEqual(sorted(sent_names), ['K1', 'K2', 'P6', 'P7'])
+
+    def test_powiazania_zapisane_po_przerwaniu_importu(self):
+        categories = self.build_categories(roots=1, children_per_root=1)
+
+        def dispatch(request):
+            if request.method == 'GET':
+                return self.tree_handler(request)
+            if self.requests:
+                raise RuntimeError("Nieoczekiwany błąd")
+            return self.handler(request)
+
+        async def run_test():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(dispatch)) as client:
+                importer = ProductCategoriesImportHelper(self.config, 'klucz', http_client=client)
+                try:
+                    await importer.import_categories_into_idosell_as_product_categories_in_the_panel(categories)
+                finally:
+                    await importer.close()
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run_test())
+
+        # Kategoria zaimportowana przed błędem ma zapisane powiązanie
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.close)
+        self.assertEqual(store.mapping('category')["1"]["id"], 1001)
+
+    def test_odpowiedz_bez_json_odrzuca_paczke(self):
+        categories = self.build_categories(roots=4, children_per_root=0)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            if len(payload['params']['categories']) > 2:
+                self.requests.append(payload)
+                return httpx.Response(200, text="<html>Błąd bramki</html>")
+            return self.handler(request)
+
+        self.run_import(categories, handler)
+
+        # Paczka z odpowiedzią, której nie da się odczytać, jest dzielona i ponawiana jak paczka odrzucona
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.close)
+        self.assertEqual(sorted(store.mapping('category')), ["1", "2", "3", "4"])
+
+    def test_przekroczenie_czasu_pomija_tylko_poddrzewo(self):
+        categories = self.build_categories(roots=3, children_per_root=2)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            if any(entry['lang_data'][0]['singular_name'] == 'K1' for entry in payload['params']['categories']):
+                raise httpx.ReadTimeout("Przekroczono czas odpowiedzi", request=request)
+            return self.handler(request)
+
+        skipped = {}
+
+        async def scheduler_spy(*args, on_skipped=None, **kwargs):
+            def record_skipped(category, descendants):
+                skipped[category['category_xpath']] = sorted(descendant['category_xpath'] for descendant in descendants)
+                on_skipped(category, descendants)
+            return await run_hierarchical_ready_queue(*args, on_skipped=record_skipped, **kwargs)
+
+        with patch('src.modules.product_categories_import_helper.run_hierarchical_ready_queue', scheduler_spy):
+            self.run_import(categories, handler)
+
+        # Gałęzie K2 i K3 są importowane, a podkategorie K1 zgłaszane jako pominięte
+        self.assertEqual(skipped, {"K1": ["K1\\P5", "K1\\P6"]})
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.close)
+        self.assertEqual(sorted(store.mapping('category')), ["10", "2", "3", "7", "8", "9"])
+
+    def test_istniejace_kategorie_aktualizowane_jedna_paczka(self):
+        categories = self.build_categories(roots=3, children_per_root=0)
+        # Dawny plik cache jest przenoszony do bazy stanu przy pierwszym uruchomieniu
+        with open(os.path.join(self.temp_dir.name, 'category_cache.json'), 'w') as file:
+            json.dump({str(category_id): {"id": 500 + category_id, "parent_id": 0} for category_id in (1, 2, 3)}, file)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            self.requests.append(payload)
+            results = [{"id": 500 + index + 1, "parent_id": 0, "faultCode": 20 if entry['operation'] == 'add' else 0}
+                       for index, entry in enumerate(payload['params']['categories'])]
+            return httpx.Response(200, json={"result": {"categories": results}})
+
+        self.run_import(categories, handler)
+
+        self.assertEqual([[entry['operation'] for entry in payload['params']['categories']] for payload in self.requests],
+                         [['add', 'add', 'add'], ['edit', 'edit', 'edit']])
+        self.assertEqual([entry['id'] for entry in self.requests[1]['params']['categories']], [501, 502, 503])
+
+    def test_istniejace_kategorie_bez_powiazania(self):
+        categories = self.build_categories(roots=1, children_per_root=1)
+
+        def handler(request):
+            payload = json.loads(request.content)
+            self.requests.append(payload)
+            results = []
+            for entry in payload['params']['categories']:
+                if entry['operation'] == 'edit':
+                    results.append({"id": entry['id'], "faultCode": 0})
+                else:
+                    # Kategoria o tej nazwie już istnieje w IdoSell
+                    name = entry['lang_data'][0]['singular_name']
+                    results.append({"id": 700 if name == 'K1' else 701, "faultCode": 20})
+            return httpx.Response(200, json={"result": {"categories": results}})
+
+        self.run_import(categories, handler)
+
+        # Edycja używa identyfikatora z odpowiedzi API i rodzica z mapowania, także bez wpisu w cache
+        edits = [(entry['id'], entry['parent_id']) for payload in self.requests for entry in payload['params']['categories'] if entry['operation'] == 'edit']
+        self.assertEqual(edits, [(700, 0), (701, 700)])
+
+        # Odcisk zapamiętany po edycji pozwala pominąć niezmienione kategorie przy kolejnym imporcie
+        self.requests.clear()
+        self.idosell_tree = [
+            {"id": 700, "parent_id": 0, "lang_data": [{"lang_id": "pol", "singular_name": "K1"}]},
+            {"id": 701, "parent_id": 700, "lang_data": [{"lang_id": "pol", "singular_name": "P2"}]},
+        ]
+        self.run_import(categories, handler)
+        self.assertEqual(self.requests, [])
+
+    def test_plan_na_podstawie_drzewa_idosell(self):
+        self.config.SUPPORTED_LANGUAGES = ['pl', 'en']
+        self.idosell_tree = [
+            {"id": 501, "parent_id": 0, "lang_data": [{"lang_id": "pol", "singular_name": "K1"}]},
+            {"id": 502, "parent_id": 501, "lang_data": [{"lang_id": "pol", "singular_name": "P"}]},
+            {"id": 503, "parent_id": 0, "lang_data": [{"lang_id": "pol", "singular_name": "K2"}, {"lang_id": "eng", "singular_name": "Old"}]},
+        ]
+        categories = [
+            {"category_id": 1, "parent_id": 0, "category_name": "K1", "category_xpath": "K1"},
+            {"category_id": 2, "parent_id": 1, "category_name": "P", "category_xpath": "K1\\P"},
+            {"category_id": 3, "parent_id": 1, "category_name": "Q", "category_xpath": "K1\\Q"},
+            {"category_id": 4, "parent_id": 0, "category_name": "K2", "category_xpath": "K2",
+             "translations": {"pl": {"category_name": "K2"}, "en": {"category_name": "C2"}}},
+            {"category_id": 5, "parent_id": 0, "category_name": "K3", "category_xpath": "K3"},
+        ]
+
+        importer = self.run_import(categories)
+
+        # Drzewo pobierane jest stronami, a wysyłane są tylko faktyczne zmiany
+        self.assertEqual(sorted(self.tree_pages_requested), [0, 1])
+        sent = [[(entry['operation'], entry.get('id'), entry['parent_id']) for entry in payload['params']['categories']] for payload in self.requests]
+        self.assertEqual(sent, [[('edit', 503, 0), ('add', None, 0)], [('add', None, 501)]])
+        self.assertEqual(len(importer.category_index.by_xpath), 3)
+
+        store = MigrationStateStore(self.config)
+        self.addCleanup(store.close)
+        self.assertEqual({key: entry['id'] for key, entry in store.mapping('category').items()}, {"1": 501, "2": 502, "3": 1002, "4": 503, "5": 1001})
+
+    def test_niezmienione_kategorie_pomijane_przy_ponownym_imporcie(self):
+        categories = self.build_categories(roots=3, children_per_root=2)
+        self.run_import(categories)
+        self.assertEqual(sum(len(payload['params']['categories']) for payload in self.requests), 9)
+
+        # Drzewo IdoSell jest niedostępne - o pominięciu decyduje wyłącznie odcisk wysłanych danych
+        self.requests.clear()
+        categories[0] = dict(categories[0], category_name="K1 nowa nazwa")
+
+        def tree_unavailable(request):
+            return httpx.Response(401, text="Unauthorized")
+        self.tree_handler = tree_unavailable
+
+        importer = self.run_import(categories)
+        # Zmieniona kategoria jest aktualizowana pod zapamiętanym identyfikatorem, więc jej dzieci nie zmieniają rodzica i są pomijane
+        sent = [(entry['operation'], entry.get('id'), entry['lang_data'][0]['singular_name']) for payload in self.requests for entry in payload['params']['categories']]
+        self.assertEqual(sent, [('edit', 1001, "K1 nowa nazwa")])
+        self.assertIsNone(importer.category_index)
+
+if __name__ == '__main__':
+    unittest.main()
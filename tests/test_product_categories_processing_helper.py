@@ -0,0 +1,132 @@
+# tests/test_product_categories_processing_helper.py
+import unittest
+import os
+import sys
+import asyncio
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import AsyncMock, MagicMock
+from src.modules.product_categories_processing_helper import ProductCategoriesProcessingHelper
+from src.modules.config_helper import ConfigHelper
+
+class TestProductCategoriesProcessingHelper(unittest.TestCase):
+    def setUp(self):
+        self.config_file_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'config', 'config.json')
+        self.config_helper = ConfigHelper(self.config_file_path)
+        self.helper = ProductCategoriesProcessingHelper([], 'sklep.pl', 'kategoria-produktu', self.config_helper, transport=MagicMock())
+
+    def test_build_category_tree(self):
+        categories = [
+            {'id': 3, 'parent': 2, 'name': 'Wnuk', 'slug': 'wnuk'},
+            {'id': 1, 'parent': 0, 'name': 'Korzeń', 'slug': 'korzen'},
+            {'id': 2, 'parent': 1, 'name': 'Dziecko', 'slug': 'dziecko'},
+            {'id': 4, 'parent': 99, 'name': 'Sierota', 'slug': 'sierota'},
+        ]
+        self.helper.build_category_tree(categories)
+        by_id = {category['id']: category for category in categories}
+
+        self.assertEqual(by_id[3]['category_xpath'], 'Korzeń\\Dziecko\\Wnuk')
+        self.assertEqual(by_id[3]['parent_name'], 'Dziecko')
+        self.assertEqual(by_id[3]['parent_slug'], 'korzen/dziecko')
+        self.assertEqual(by_id[3]['parent_xpath'], 'Korzeń\\Dziecko')
+        self.assertEqual(by_id[3]['link'], 'https://sklep.pl/kategoria-produktu/korzen/dziecko/wnuk')
+
+        self.assertEqual(by_id[1]['parent_xpath'], '')
+        self.assertEqual(by_id[1]['link'], 'https://sklep.pl/kategoria-produktu/korzen')
+        # Kategoria z nieistniejącym rodzicem traktowana jest jak kategoria główna
+        self.assertEqual(by_id[4]['category_xpath'], 'Sierota')
+        self.assertEqual(by_id[4]['parent_name'], '')
+
+    def test_build_category_tree_gleboka_hierarchia(self):
+        depth = 5000
+        categories = [{'id': i, 'parent': i - 1, 'name': f'K{i}', 'slug': f'k{i}'} for i in range(1, depth + 1)]
+        self.helper.build_category_tree(categories)
+
+        self.assertEqual(categories[-1]['category_xpath'].count('\\'), depth - 1)
+        self.assertTrue(categories[-1]['parent_slug'].endswith(f'k{depth - 2}/k{depth - 1}'))
+
+    def test_sort_and_group_by_hierarchy(self):
+        categories = [
+            {'id': 5, 'parent': 1},
+            {'id': 1, 'parent': 0},
+            {'id': 3, 'parent': 1},
+            {'id': 2, 'parent': 0},
+            {'id': 4, 'parent': 3},
+            {'id': 7, 'parent': 42},
+            {'id': 8, 'parent': 7},
+        ]
+        sorted_categories = self.helper.sort_and_group_by_hierarchy(categories)
+
+        self.assertEqual([category['id'] for category in sorted_categories], [2, 1, 3, 4, 5, 7, 8])
+        # Kategoria, której rodzic został wykluczony, jest zgłaszana i nie znika z wyniku
+        self.assertEqual(self.helper.orphan_category_ids, [7])
+
+        by_id = {category['id']: category for category in sorted_categories}
+        self.assertEqual(self.helper.transform_category(by_id[7])['parent_id'], 0)
+        self.assertEqual(self.helper.transform_category(by_id[8])['parent_id'], 7)
+
+    def test_sort_and_group_by_hierarchy_gleboka_hierarchia(self):
+        depth = 5000
+        categories = [{'id': i, 'parent': i - 1} for i in range(depth, 0, -1)]
+        sorted_categories = self.helper.sort_and_group_by_hierarchy(categories)
+
+        self.assertEqual([category['id'] for category in sorted_categories], list(range(1, depth + 1)))
+        self.assertEqual(self.helper.orphan_category_ids, [])
+
+    def test_process_categories_nie_modyfikuje_danych_zrodlowych(self):
+        all_categories = [
+            {'id': 1, 'parent': 0, 'name': 'Korzeń', 'slug': 'korzen', 'display': 'default', 'description': ''},
+            {'id': 2, 'parent': 1, 'name': 'Dziecko', 'slug': 'dziecko', 'display': 'subcategories', 'description': ''},
+        ]
+        self.helper.all_categories = all_categories
+        self.helper.image_processor.process_images_in_descriptions = AsyncMock(return_value=['', ''])
+
+        processed = asyncio.run(self.helper.process_categories())
+
+        self.assertEqual(processed[1]['category_xpath'], 'Korzeń\\Dziecko')
+        self.assertEqual(processed[1]['display'], 'navigation')
+        # Pola wyliczone trafiają do nakładki, a dane źródłowe są współdzielone i niezmienione
+        self.assertNotIn('category_xpath', all_categories[1])
+        self.assertEqual(all_categories[1]['display'], 'subcategories')
+        self.assertIs(processed[1].maps[1], all_categories[1])
+
+    def test_miniatury_kategorii(self):
+        thumbnail_url = 'https://sklep.pl/wp-content/uploads/miniatura.jpg'
+        all_categories = [
+            {'id': 1, 'parent': 0, 'name': 'Z miniaturą', 'slug': 'a', 'description': '', 'image': {'src': thumbnail_url}},
+            {'id': 2, 'parent': 0, 'name': 'Bez miniatury', 'slug': 'b', 'description': '', 'image': None},
+        ]
+        self.helper.all_categories = all_categories
+        self.helper.image_processor.process_images_in_descriptions = AsyncMock(return_value=['', ''])
+        self.helper.image_processor.process_image_urls = AsyncMock(return_value={thumbnail_url: '/data/include/cms/description/wp-content/uploads/miniatura.jpg'})
+
+        asyncio.run(self.helper.process_categories())
+        transformed = {category['category_id']: category for category in self.helper.transform_categories()}
+
+        self.helper.image_processor.process_image_urls.assert_awaited_once_with(['', thumbnail_url], is_product=False)
+        self.assertEqual(transformed[1]['category_image'], '/data/include/cms/description/wp-content/uploads/miniatura.jpg')
+        self.assertEqual(transformed[2]['category_image'], '')
+
+    def test_potomkowie_zmienionych_kategorii(self):
+        # Zmiana nazwy kategorii 1 zmienia ścieżki jej dzieci i wnuków, więc one też trafiają do transformacji
+        all_categories = [
+            {'id': 1, 'parent': 0, 'name': 'Nowa nazwa', 'slug': 'nowa', 'description': ''},
+            {'id': 2, 'parent': 1, 'name': 'Dziecko', 'slug': 'dziecko', 'description': ''},
+            {'id': 3, 'parent': 2, 'name': 'Wnuk', 'slug': 'wnuk', 'description': ''},
+            {'id': 4, 'parent': 0, 'name': 'Inna', 'slug': 'inna', 'description': ''},
+        ]
+        self.helper.all_categories = all_categories
+        self.helper.changed_category_ids = {1}
+        self.helper.image_processor.process_images_in_descriptions = AsyncMock(side_effect=lambda descriptions, is_product: descriptions)
+        self.helper.image_processor.process_image_urls = AsyncMock(return_value={})
+
+        asyncio.run(self.helper.process_categories())
+        transformed = {category['category_id']: category for category in self.helper.transform_categories()}
+
+        self.assertEqual(sorted(transformed), [1, 2, 3])
+        self.assertEqual(transformed[3]['category_xpath'], 'Nowa nazwa\\Dziecko\\Wnuk')
+
+if __name__ == '__main__':
+    unittest.main()
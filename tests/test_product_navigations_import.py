@@ -0,0 +1,71 @@
+# tests/test_product_navigations_import.py
+import unittest
+import os
+import sys
+import json
+import asyncio
+import tempfile
+
+import httpx
+
+# Dodanie katalogu głównego projektu do sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from unittest.mock import MagicMock
+from src.modules.product_navigations_import import ProductNavigationsImport
+
+class TestProductNavigationsImport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.config = MagicMock()
+        self.config.IDOSELL_API_KEY = 'klucz'
+        self.config.IDOSELL_API_MENU_GATE_URL = 'https://sklep.idosell.com/api/admin/v3/menu/menu'
+        self.config.OUTPUT_DATA_FOLDER_FOR_CATEGORIES = self.temp_dir.name
+        self.config.OUTPUT_DATA_FOLDER_FOR_MENU = self.temp_dir.name
+        self.config.OUTPUT_LOGS_FOLDER_FOR_MENU = os.path.join(self.temp_dir.name, 'logs')
+        self.config.STATE_DB_PATH = os.path.join(self.temp_dir.name, 'migration_state.db')
+        self.config.SUPPORTED_LANGUAGES = ['pl']
+        self.config.IDOSELL_IMPORT_CONCURRENCY = 4
+        self.posted = []
+
+    def handler(self, request):
+        payload = json.loads(request.content)
+        self.posted.append(payload)
+        item = payload['menu_list'][0]
+        return httpx.Response(200, json={"result": [
+            {"item_textid": item['item_textid'], "faultCode": 0, "item_id": 100 + len(self.posted), "parent_id": item['parent_id']}
+        ]})
+
+    def run_import(self, categories):
+        async def run_test():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(self.handler)) as client:
+                importer = ProductNavigationsImport(self.config, http_client=client)
+                importer.console.input = MagicMock(return_value='')
+                await importer.import_categories_into_idosell_as_navigation_menu_in_shop(categories)
+                await importer.close()
+        asyncio.run(run_test())
+
+    def test_niezmienione_pozycje_menu_pomijane(self):
+        categories = [
+            {"category_id": 1, "category_name": "Meble", "category_xpath": "Meble", "description": "Opis"},
+            {"category_id": 2, "category_name": "Łóżka", "category_xpath": "Meble\\Łóżka", "description": "Opis"},
+            {"category_id": 3, "category_name": "Szafy", "category_xpath": "Meble\\Szafy", "description": "Opis"},
+        ]
+        self.run_import(categories)
+        self.assertEqual(len(self.posted), 3)
+        # Dziecko dostaje identyfikator rodzica z odpowiedzi na wcześniejsze zapytanie
+        self.assertEqual({payload['menu_list'][0]['item_textid']: payload['menu_list'][0]['parent_id'] for payload in self.posted[1:]},
+                         {"Meble\\Łóżka": 101, "Meble\\Szafy": 101})
+
+        self.posted.clear()
+        self.run_import(categories)
+        self.assertEqual(self.posted, [])
+
+        categories[2] = dict(categories[2], description="Nowy opis")
+        self.run_import(categories)
+        self.assertEqual([payload['menu_list'][0]['item_textid'] for payload in self.posted], ["Meble\\Szafy"])
+        self.assertEqual(self.posted[0]['menu_list'][0]['parent_id'], 101)
+
+if __name__ == '__main__':
+    unittest.main()